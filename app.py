@@ -10,8 +10,28 @@
 import streamlit as st
 import pandas as pd
 import numpy as np
+import altair as alt
+import io
+import os
 import time
 import random
+from collections import deque
+from contextlib import contextmanager
+
+from deadlock_engine import (
+    BankersAdmissionController,
+    DeadlockDetectorSingleInstance,
+    EventLog,
+    IncrementalDeadlockDetector,
+    PackedSystemState,
+    generate_requests,
+    generate_system,
+    load_state,
+    save_state,
+)
+
+# Start of this rerun (for the performance panel)
+RERUN_STARTED = time.perf_counter()
 
 # Page configuration
 st.set_page_config(
@@ -44,12 +64,22 @@ USER_GUIDE_SECTIONS = [
         "title": "System Configuration",
         "content": """
         **Step 1: Configure System**
-        1. Set the number of processes (3-10) using the slider
-        2. Set the number of resources (2-8) using the slider
+        1. Set the number of processes (3-10000) using the slider
+        2. Set the number of resources (2-1000) using the slider
         3. Click "Initialize System" to create a random configuration
         
+        **Large systems (more than 10 processes or 8 resources):**
+        - Allocation and Request tabs show a density heatmap instead of the full table
+        - Click a heatmap block to zoom into its cells, use the page selector to scroll through them
+        - Monitors list the first entries and summarize the rest
+        
+        **Saving and loading scenarios:**
+        - "Save Scenario" downloads the current matrices, process states and deadlock history as a small .npz file
+        - Upload a saved file and click "Load Scenario" to continue from exactly that state
+        - The action history starts over at the loaded state
+        
         **What happens during initialization:**
-        - Allocation matrix is randomly generated (0s and 1s only)
+        - Allocation matrix is randomly generated (0s and 1s only, at most one holder per resource)
         - Request matrix is randomly generated (0s and 1s only)
         - Available resources are calculated based on allocations
         - Process names are assigned from a predefined list
@@ -122,6 +152,11 @@ USER_GUIDE_SECTIONS = [
         - Request matrix is updated
         - Process status may change to "WAITING"
         - Detection should be run again to check for deadlocks
+        
+        **Avoidance Mode:**
+        - Enable "Avoidance mode" to run the Banker's safe-state check before a request is accepted
+        - Requests that would leave processes unable to complete are queued or refused
+        - Queued requests are granted automatically once recovery releases enough resources
         """
     },
     {
@@ -142,6 +177,16 @@ USER_GUIDE_SECTIONS = [
         - Process that lost the resource will request it again
         - Less disruptive than termination
         
+        **3. Minimum-Cost Termination:**
+        - Finds the smallest set of processes whose termination breaks every cycle
+        - Small deadlocks are solved exactly, large ones with a fast heuristic
+        - Recovers in one step instead of terminating one process per click
+        
+        **4. Recover Until Deadlock-Free:**
+        - Repeats termination or preemption until no process is deadlocked
+        - Only processes affected by each action are re-checked
+        - The action log lists every step and how many processes were still deadlocked
+        
         **Choosing Recovery Method:**
         - **Termination**: Use when you want to completely remove a process
         - **Preemption**: Use when you want to keep all processes but break the deadlock
@@ -168,6 +213,16 @@ USER_GUIDE_SECTIONS = [
         - Removes all status messages from the top
         - Cleans up the interface for better readability
         
+        **Action History (Undo/Redo):**
+        - Every state change (detection, request update, recovery, reset) is recorded as one step
+        - Undo/Redo move one step back or forward
+        - Jump to step moves directly to any recorded step
+        
+        **Performance Panel:**
+        - Collapsible panel at the bottom of the page
+        - Shows how long each phase of the last rerun took (setup, monitor cards, matrix tabs, detection, actions)
+        - Rolling latency history of the last reruns
+        
         **Deadlock History:**
         - Shows recent deadlock events
         - Includes timestamp and affected processes
@@ -225,1033 +280,857 @@ USER_GUIDE_SECTIONS = [
     }
 ]
 
-st.markdown("""
-<style>
-    /* Modern Dark Tech Theme */
-    :root {
-        --bg-dark: #0F172A;
-        --panel-dark: #1E293B;
-        --panel-darker: #0F172A;
-        --accent-purple: #A855F7;
-        --accent-purple-light: #C084FC;
-        --accent-blue: #38BDF8;
-        --accent-blue-light: #7DD3FC;
-        --success: #10B981;
-        --success-light: #34D399;
-        --danger: #EF4444;
-        --danger-light: #F87171;
-        --warning: #F59E0B;
-        --text-primary: #F1F5F9;
-        --text-secondary: #94A3B8;
-        --border-color: #334155;
-        --shadow-color: rgba(0, 0, 0, 0.3);
-    }
-    
-    /* Main App Styling */
-    .stApp {
-        background: linear-gradient(135deg, var(--bg-dark) 0%, #0D1524 100%);
-        color: var(--text-primary) !important;
-    }
-    
-    
-    
-    
-    /* Fix ALL Streamlit text colors */
-    .stMarkdown, p, h1, h2, h3, h4, h5, h6, div, span, label {
-        color: var(--text-primary) !important;
-    }
-    
-    /* Fix Button Styling */
-    .stButton > button {
-        background: linear-gradient(135deg, var(--accent-purple), var(--accent-blue));
-        color: white !important;
-        border: none;
-        padding: 12px 24px;
-        border-radius: 8px;
-        font-weight: 600;
-        font-size: 14px;
-        transition: all 0.3s;
-        width: 100%;
-    }
-    
-    .stButton > button:hover {
-        transform: translateY(-2px);
-        box-shadow: 0 6px 20px rgba(168, 85, 247, 0.4);
-        background: linear-gradient(135deg, var(--accent-purple-light), var(--accent-blue-light));
-    }
-    
-    .stButton > button:active {
-        transform: translateY(0);
-    }
-    
-    /* Toggle Button Special Styling - FIXED WITH CLEAR VISIBILITY */
-    div[data-testid="column"] button[kind="secondary"] {
-        background: linear-gradient(135deg, #DC2626, #B91C1C) !important;
-        color: white !important;
-        border: 2px solid #FCA5A5 !important;
-        border-radius: 6px !important;
-        font-weight: 700 !important;
-        padding: 10px !important;
-        min-height: 50px !important;
-        width: 100% !important;
-        transition: all 0.3s !important;
-        font-size: 14px !important;
-        text-shadow: 0 1px 2px rgba(0, 0, 0, 0.3) !important;
-        box-shadow: 0 2px 8px rgba(220, 38, 38, 0.3) !important;
-    }
-    
-    div[data-testid="column"] button[kind="secondary"]:hover {
-        background: linear-gradient(135deg, #EF4444, #DC2626) !important;
-        transform: translateY(-2px) !important;
-        box-shadow: 0 6px 20px rgba(239, 68, 68, 0.4) !important;
-        border-color: #F87171 !important;
-    }
-    
-    /* Inactive toggle button state */
-    div[data-testid="column"] button[kind="secondary"].toggle-inactive {
-        background: linear-gradient(135deg, #4B5563, #374151) !important;
-        border: 2px solid #6B7280 !important;
-        box-shadow: 0 2px 8px rgba(75, 85, 99, 0.3) !important;
-    }
-    
-    div[data-testid="column"] button[kind="secondary"].toggle-inactive:hover {
-        background: linear-gradient(135deg, #6B7280, #4B5563) !important;
-        border-color: #9CA3AF !important;
-        box-shadow: 0 6px 20px rgba(107, 114, 128, 0.4) !important;
-    }
-    
-    /* Fix Number Input Styling */
-    div[data-baseweb="input"] {
-        background: var(--panel-dark) !important;
-        border: 1px solid var(--border-color) !important;
-        border-radius: 8px !important;
-    }
-    
-    div[data-baseweb="input"] input {
-        color: var(--text-primary) !important;
-        background: transparent !important;
-    }
+# Static assets (theme CSS and rendered user guide)
+ASSETS_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "assets")
 
-    /* Add these lines */
-    div[data-baseweb="input"] input::placeholder {
-        color: rgba(255, 255, 255, 0.7) !important;
-    }
+@st.cache_resource(show_spinner=False)
+def load_theme_html():
+    """
+    Read the theme stylesheet once and wrap it in a <style> element
+    The element is byte-identical on every rerun, so after the first page load the
+    browser gets only a reference to its cached copy instead of the whole stylesheet
+    """
+    with open(os.path.join(ASSETS_DIR, "theme.css"), encoding="utf-8") as f:
+        return f"<style>\n{f.read()}</style>"
 
-    div[data-baseweb="input"] input[type="number"] {
-        color: black !important;
-    }
-    
-    /* Fix Select Box Styling */
-    div[data-baseweb="select"] {
-        background: var(--panel-dark) !important;
-        border: 1px solid var(--border-color) !important;
-        border-radius: 8px !important;
-    }
-    
-    div[data-baseweb="select"] div {
-        color: var(--text-primary) !important;
-        background: transparent !important;
-    }
-    
-    /* Fix Placeholder Text */
-    input::placeholder {
-        color: var(--text-secondary) !important;
-        opacity: 0.7 !important;
-    }
-    
-    /* Fix Labels */
-    label {
-        color: var(--text-secondary) !important;
-        font-weight: 500 !important;
-        margin-bottom: 8px !important;
-        display: block !important;
-    }
-    
-    /* Custom Scrollbar */
-    ::-webkit-scrollbar {
-        width: 8px;
-        height: 8px;
-    }
-    
-    ::-webkit-scrollbar-track {
-        background: var(--panel-dark);
-        border-radius: 4px;
-    }
-    
-    ::-webkit-scrollbar-thumb {
-        background: linear-gradient(to bottom, var(--accent-purple), var(--accent-blue));
-        border-radius: 4px;
-    }
-    
-    /* Main Header - Tech Style */
-    .tech-header {
-        background: linear-gradient(90deg, var(--panel-darker), var(--panel-dark));
-        padding: 30px 40px;
-        margin: -20px -20px 30px -20px;
-        border-bottom: 1px solid var(--accent-purple);
-        box-shadow: 0 4px 20px rgba(168, 85, 247, 0.15);
-        position: relative;
-        overflow: hidden;
-    }
-    
-    .tech-header::before {
-        content: '';
-        position: absolute;
-        top: 0;
-        left: 0;
-        right: 0;
-        height: 2px;
-        background: linear-gradient(90deg, var(--accent-purple), var(--accent-blue));
-    }
-    
-    .tech-header h1 {
-        color: var(--text-primary);
-        font-size: 36px;
-        font-weight: 700;
-        margin-bottom: 8px;
-        font-family: 'Segoe UI', system-ui, sans-serif;
-    }
-    
-    .tech-header p {
-        color: var(--accent-blue);
-        font-size: 16px;
-        margin: 0;
-        font-weight: 400;
-    }
-    
-    /* Tech Cards */
-    .tech-card {
-        background: var(--panel-dark);
-        border-radius: 12px;
-        padding: 24px;
-        margin-bottom: 20px;
-        border: 1px solid var(--border-color);
-        box-shadow: 0 4px 12px var(--shadow-color);
-        transition: all 0.3s cubic-bezier(0.4, 0, 0.2, 1);
-        position: relative;
-        overflow: hidden;
-    }
-    
-    .tech-card::before {
-        content: '';
-        position: absolute;
-        top: 0;
-        left: 0;
-        right: 0;
-        height: 2px;
-        background: linear-gradient(90deg, var(--accent-purple), var(--accent-blue));
-        opacity: 0;
-        transition: opacity 0.3s;
-    }
-    
-    .tech-card:hover::before {
-        opacity: 1;
-    }
-    
-    .tech-card:hover {
-        transform: translateY(-4px);
-        box-shadow: 0 8px 24px rgba(168, 85, 247, 0.2);
-        border-color: var(--accent-purple);
-    }
-    
-    .tech-card-title {
-        color: var(--accent-blue);
-        font-size: 20px;
-        font-weight: 600;
-        margin-bottom: 20px;
-        display: flex;
-        align-items: center;
-        gap: 12px;
-        font-family: 'Segoe UI', system-ui, sans-serif;
-    }
-    
-    /* User Guide Styles */
-    .guide-container {
-        background: linear-gradient(135deg, rgba(30, 41, 59, 0.9), rgba(15, 23, 42, 0.9));
-        border-radius: 12px;
-        padding: 25px;
-        margin: 20px 0;
-        border: 1px solid var(--border-color);
-        box-shadow: 0 8px 32px rgba(0, 0, 0, 0.3);
-    }
-    
-    .guide-section {
-        margin-bottom: 25px;
-        padding-bottom: 25px;
-        border-bottom: 1px solid rgba(148, 163, 184, 0.2);
-    }
-    
-    .guide-section:last-child {
-        border-bottom: none;
-        margin-bottom: 0;
-        padding-bottom: 0;
-    }
-    
-    .guide-section-title {
-        color: var(--accent-purple);
-        font-size: 22px;
-        font-weight: 700;
-        margin-bottom: 15px;
-        display: flex;
-        align-items: center;
-        gap: 10px;
-    }
-    
-    .guide-section-content {
-        color: var(--text-primary);
-        line-height: 1.7;
-        font-size: 15px;
-    }
-    
-    .guide-section-content strong {
-        color: var(--accent-blue-light);
-        font-weight: 600;
-    }
-    
-    .guide-bullet {
-        display: flex;
-        margin: 10px 0;
-        align-items: flex-start;
-        gap: 10px;
-    }
-    
-    .guide-bullet::before {
-        content: "•";
-        color: var(--accent-purple);
-        font-size: 20px;
-        line-height: 1;
-        margin-top: 2px;
-    }
-    
-    .guide-step {
-        background: rgba(168, 85, 247, 0.1);
-        border-radius: 8px;
-        padding: 15px;
-        margin: 15px 0;
-        border-left: 4px solid var(--accent-purple);
-    }
-    
-    .guide-step-number {
-        display: inline-block;
-        background: var(--accent-purple);
-        color: white;
-        width: 28px;
-        height: 28px;
-        border-radius: 50%;
-        text-align: center;
-        line-height: 28px;
-        font-weight: 700;
-        margin-right: 10px;
-        font-size: 14px;
-    }
-    
-    /* Status Indicators */
-    .status-indicator {
-        display: inline-flex;
-        align-items: center;
-        gap: 8px;
-        padding: 8px 16px;
-        border-radius: 20px;
-        font-weight: 600;
-        font-size: 14px;
-        margin: 5px;
-        color: white !important;
-    }
-    
-    .status-safe {
-        background: linear-gradient(135deg, rgba(16, 185, 129, 0.2), rgba(16, 185, 129, 0.1));
-        color: var(--success-light) !important;
-        border: 1px solid rgba(16, 185, 129, 0.3);
-        box-shadow: 0 0 15px rgba(16, 185, 129, 0.2);
-    }
-    
-    .status-deadlock {
-        background: linear-gradient(135deg, rgba(239, 68, 68, 0.2), rgba(239, 68, 68, 0.1));
-        color: var(--danger-light) !important;
-        border: 1px solid rgba(239, 68, 68, 0.3);
-        box-shadow: 0 0 15px rgba(239, 68, 68, 0.2);
-        animation: pulse 2s infinite;
-    }
-    
-    @keyframes pulse {
-        0% { box-shadow: 0 0 15px rgba(239, 68, 68, 0.2); }
-        50% { box-shadow: 0 0 25px rgba(239, 68, 68, 0.4); }
-        100% { box-shadow: 0 0 15px rgba(239, 68, 68, 0.2); }
-    }
-    
-    /* Resource Status Indicators */
-    .resource-status {
-        padding: 6px 12px;
-        border-radius: 20px;
-        font-size: 12px;
-        font-weight: 600;
-        margin: 2px;
-        display: inline-block;
-    }
-    
-    .resource-available {
-        background: rgba(16, 185, 129, 0.2);
-        color: var(--success-light) !important;
-        border: 1px solid rgba(16, 185, 129, 0.3);
-    }
-    
-    .resource-allocated {
-        background: rgba(56, 189, 248, 0.2);
-        color: var(--accent-blue) !important;
-        border: 1px solid rgba(56, 189, 248, 0.3);
-    }
-    
-    .resource-requested {
-        background: rgba(245, 158, 11, 0.2);
-        color: var(--warning) !important;
-        border: 1px solid rgba(245, 158, 11, 0.3);
-    }
-    
-    /* Matrix Tables - FIXED FOR ALL TABLES */
-    .matrix-container {
-        overflow-x: auto;
-        margin: 15px 0;
-    }
-    
-    .matrix-table {
-        width: 100%;
-        border-collapse: collapse;
-        font-family: 'Courier New', monospace;
-        font-size: 14px;
-        background: rgba(15, 23, 42, 0.5) !important;
-        color: var(--text-primary) !important;
-    }
-    
-    .matrix-table th {
-        background: linear-gradient(90deg, var(--panel-dark), rgba(56, 189, 248, 0.1)) !important;
-        padding: 14px;
-        text-align: center;
-        font-weight: 600;
-        color: var(--accent-blue) !important;
-        border: 1px solid var(--border-color);
-        font-family: 'Segoe UI', system-ui, sans-serif;
-    }
-    
-    .matrix-table td {
-        padding: 14px;
-        text-align: center;
-        border: 1px solid var(--border-color);
-        color: var(--text-primary) !important;
-        background: rgba(15, 23, 42, 0.3) !important;
-        transition: background 0.3s;
-    }
-    
-    .matrix-table tr:hover td {
-        background: rgba(168, 85, 247, 0.1) !important;
-    }
-    
-    /* Process Status Indicators */
-    .process-status {
-        padding: 6px 12px;
-        border-radius: 20px;
-        font-size: 12px;
-        font-weight: 600;
-        margin: 2px;
-    }
-    
-    .process-running {
-        background: rgba(16, 185, 129, 0.2);
-        color: var(--success-light) !important;
-        border: 1px solid rgba(16, 185, 129, 0.3);
-    }
-    
-    .process-blocked {
-        background: rgba(239, 68, 68, 0.2);
-        color: var(--danger-light) !important;
-        border: 1px solid rgba(239, 68, 68, 0.3);
-    }
-    
-    .process-waiting {
-        background: rgba(245, 158, 11, 0.2);
-        color: var(--warning) !important;
-        border: 1px solid rgba(245, 158, 11, 0.3);
-    }
-    
-    /* Footer */
-    .tech-footer {
-        text-align: center;
-        padding: 30px;
-        margin-top: 50px;
-        background: rgba(15, 23, 42, 0.8);
-        border-top: 1px solid var(--border-color);
-        color: var(--text-secondary) !important;
-        font-size: 14px;
-        position: relative;
-    }
-    
-    .tech-footer::before {
-        content: '';
-        position: absolute;
-        top: 0;
-        left: 20%;
-        right: 20%;
-        height: 1px;
-        background: linear-gradient(90deg, transparent, var(--accent-purple), transparent);
-    }
-    
-    /* Custom Tabs */
-    .stTabs [data-baseweb="tab-list"] {
-        gap: 4px;
-        background-color: var(--panel-dark);
-        padding: 6px;
-        border-radius: 10px;
-        border: 1px solid var(--border-color);
-    }
-    
-    .stTabs [data-baseweb="tab"] {
-        height: 50px;
-        white-space: pre-wrap;
-        background-color: transparent;
-        border-radius: 8px;
-        gap: 8px;
-        padding: 10px 20px;
-        font-weight: 500;
-        color: var(--text-secondary) !important;
-        border: 1px solid transparent;
-        transition: all 0.3s;
-    }
-    
-    .stTabs [data-baseweb="tab"]:hover {
-        background-color: rgba(168, 85, 247, 0.1);
-        color: var(--text-primary) !important;
-    }
-    
-    .stTabs [aria-selected="true"] {
-        background: linear-gradient(135deg, rgba(168, 85, 247, 0.2), rgba(56, 189, 248, 0.1));
-        color: var(--accent-blue) !important;
-        border: 1px solid var(--accent-purple);
-        box-shadow: 0 2px 8px rgba(168, 85, 247, 0.2);
-    }
-    
-    /* Success/Error Messages */
-    .stAlert {
-        border: 1px solid !important;
-        border-radius: 8px !important;
-        padding: 16px !important;
-        margin: 10px 0 !important;
-    }
-    
-    .stAlert[data-baseweb="notification"][kind="success"] {
-        background: linear-gradient(135deg, rgba(16, 185, 129, 0.1), transparent) !important;
-        border-color: rgba(16, 185, 129, 0.3) !important;
-        color: var(--success-light) !important;
-    }
-    
-    .stAlert[data-baseweb="notification"][kind="error"] {
-        background: linear-gradient(135deg, rgba(239, 68, 68, 0.1), transparent) !important;
-        border-color: rgba(239, 68, 68, 0.3) !important;
-        color: var(--danger-light) !important;
-    }
-    
-    .stAlert[data-baseweb="notification"][kind="warning"] {
-        background: linear-gradient(135deg, rgba(245, 158, 11, 0.1), transparent) !important;
-        border-color: rgba(245, 158, 11, 0.3) !important;
-        color: var(--warning) !important;
-    }
-    
-    /* Process Names - ORIGINAL STYLE */
-    .process-name {
-        font-family: 'Segoe UI', system-ui, sans-serif;
-        font-weight: 500;
-        color: var(--accent-blue-light) !important;
-    }
-    
-    .resource-name {
-        font-family: 'Segoe UI', system-ui, sans-serif;
-        font-weight: 500;
-        color: var(--accent-purple-light) !important;
-    }
-    
-    /* Dataframe Styling - FIXED */
-    .dataframe {
-        color: var(--text-primary) !important;
-        background: rgba(15, 23, 42, 0.5) !important;
-    }
-    
-    .dataframe th {
-        color: var(--accent-blue) !important;
-        background: rgba(30, 41, 59, 0.8) !important;
-        border: 1px solid var(--border-color) !important;
-    }
+@st.cache_resource(show_spinner=False)
+def load_user_guide_html():
+    """Render all user guide sections once, as a single cacheable element"""
+    sections = "".join(
+        f"""
+        <div class="guide-section">
+            <div class="guide-section-title">{section["title"]}</div>
+            <div class="guide-section-content">{section["content"]}</div>
+        </div>
+        """
+        for section in USER_GUIDE_SECTIONS
+    )
+    return f"""
+        <div class="guide-container">{sections}
+        </div>
+        """
+
+# Theme (static asset, built once per server process)
+st.markdown(load_theme_html(), unsafe_allow_html=True)
+
+# Process and Resource Names - ORIGINAL NAMES AS BEFORE
+PROCESS_NAMES = [
+    "Chrome Browser",
+    "VS Code Editor", 
+    "Spotify Player",
+    "Discord Client",
+    "Zoom Meeting",
+    "Adobe Photoshop",
+    "Blender 3D",
+    "MySQL Server",
+    "Docker Engine",
+    "Node.js Server"
+]
+
+RESOURCE_NAMES = [
+    "CPU Cores",
+    "GPU Memory", 
+    "RAM Allocation",
+    "Disk I/O",
+    "Network Bandwidth",
+    "USB Ports",
+    "Audio Channels",
+    "File Handles"
+]
+
+# Largest system shown with full matrix tables and one card per process/resource,
+# larger systems use the large-matrix viewer and paged cards
+FULL_VIEW_PROCESSES = len(PROCESS_NAMES)
+FULL_VIEW_RESOURCES = len(RESOURCE_NAMES)
+
+# Input limits for the system size
+MAX_PROCESSES = 10000
+MAX_RESOURCES = 1000
+
+# Large-matrix viewer: heatmap blocks per axis and size of one page of the zoomed cell table
+HEATMAP_BLOCKS = 64
+VIEWER_PAGE_ROWS = 25
+VIEWER_PAGE_COLUMNS = 16
+
+# Number of monitor cards / names listed before the rest is summarized
+MONITOR_LIMIT = 10
+
+# Number of reruns kept in the performance panel history
+PERF_HISTORY_SIZE = 50
+
+# Number of detections kept in the deadlock history
+DEADLOCK_HISTORY_LIMIT = 100
+
+# Initialize session state
+if 'system_initialized' not in st.session_state:
+    st.session_state.system_initialized = False
+    st.session_state.num_processes = 5
+    st.session_state.num_resources = 3
+    st.session_state.allocation = []
+    st.session_state.request = []
+    st.session_state.available = []
+    st.session_state.deadlock_history = []
+    st.session_state.process_status = []
     
-    .dataframe td {
-        color: var(--text-primary) !important;
-        background: rgba(15, 23, 42, 0.3) !important;
-        border: 1px solid var(--border-color) !important;
-    }
+    # Message states for persistence
+    st.session_state.message_init = None
+    st.session_state.message_detect = None
+    st.session_state.message_update = None
+    st.session_state.message_terminate = None
+    st.session_state.message_preempt = None
+    st.session_state.message_cycle = None
+    st.session_state.message_reset = None
     
-    /* Info Boxes */
-    .info-box {
-        padding: 15px;
-        background: rgba(56, 189, 248, 0.1);
-        border-radius: 8px;
-        border: 1px solid rgba(56, 189, 248, 0.3);
-        margin: 10px 0;
-        color: var(--accent-blue-light) !important;
-    }
+    # Toggle button states
+    st.session_state.toggle_states = {}
     
-    /* Sequence Display */
-    .sequence-display {
-        font-family: 'Courier New', monospace;
-        padding: 12px;
-        background: rgba(15, 23, 42, 0.5);
-        border-radius: 6px;
-        border: 1px solid var(--border-color);
-        color: var(--success-light) !important;
-        margin: 10px 0;
-        font-size: 14px;
-        line-height: 1.5;
-    }
+    # User guide state
+    st.session_state.show_user_guide = False
     
-    /* Request History Items */
-    .request-item {
-        border-left: 3px solid;
-        padding: 12px;
-        margin-bottom: 10px;
-        background: rgba(30, 41, 59, 0.5);
-        border-radius: 0 8px 8px 0;
-    }
+    # Incremental detector kept between reruns
+    st.session_state.incremental_detector = None
     
-    .request-item.granted {
-        border-left-color: var(--success);
-    }
+    # Resource -> holder index (-1 = not allocated)
+    st.session_state.holder = None
     
-    .request-item.denied {
-        border-left-color: var(--danger);
-    }
+    # Banker's admission control for request updates (avoidance mode)
+    st.session_state.admission_controller = None
     
-    /* Deadlock Cycle Visualization */
-    .deadlock-cycle {
-        padding: 15px;
-        background: rgba(239, 68, 68, 0.1);
-        border-radius: 8px;
-        border: 1px solid rgba(239, 68, 68, 0.3);
-        margin: 10px 0;
-        font-family: 'Courier New', monospace;
-        text-align: center;
-    }
+    # Actions of the last recover-until-deadlock-free run
+    st.session_state.recovery_log = []
     
-    .deadlock-cycle span {
-        color: var(--danger-light) !important;
-        font-weight: bold;
-        padding: 4px 8px;
-        border-radius: 4px;
-        background: rgba(239, 68, 68, 0.2);
-        margin: 0 5px;
-    }
+    # Performance panel: phase timings of the current rerun and rolling history
+    st.session_state.perf_phases = {}
+    st.session_state.perf_started = None
+    st.session_state.perf_history = deque(maxlen=PERF_HISTORY_SIZE)
     
-    .deadlock-cycle .arrow {
-        color: var(--accent-blue) !important;
-        margin: 0 10px;
-    }
+    # Undo/redo: append-only event log and the state rows touched by the running action
+    st.session_state.event_log = None
+    st.session_state.pending_event = None
 
-    /* Persistent Messages */
-    .persistent-message {
-        padding: 15px;
-        margin: 10px 0;
-        border-radius: 8px;
-        border-left: 4px solid;
-        background: rgba(30, 41, 59, 0.7);
-        animation: fadeIn 0.5s ease-in;
-    }
-    
-    @keyframes fadeIn {
-        from { opacity: 0; transform: translateY(-10px); }
-        to { opacity: 1; transform: translateY(0); }
-    }
-    
-    .message-success {
-        border-left-color: var(--success);
-    }
-    
-    .message-error {
-        border-left-color: var(--danger);
-    }
-    
-    .message-info {
-        border-left-color: var(--accent-blue);
-    }
+def initialize_system():
+    """Initialize system with SINGLE INSTANCE resource values (0 or 1 only)"""
+    n = st.session_state.num_processes
+    m = st.session_state.num_resources
     
-    .message-warning {
-        border-left-color: var(--warning);
-    }
+    allocation, request, available = generate_system(n, m)
+    load_system(allocation, request, available)
+    st.session_state.message_init = " System initialized with SINGLE INSTANCE resources (0 or 1 only)!"
 
-    /* Single Instance Indicators */
-    .single-instance-cell {
-        font-weight: bold;
-        text-align: center;
-        padding: 8px;
-        border-radius: 4px;
-        margin: 2px;
-        display: inline-block;
-        min-width: 30px;
-    }
-    
-    .allocated-true {
-        background: rgba(16, 185, 129, 0.3);
-        color: var(--success-light) !important;
-        border: 1px solid rgba(16, 185, 129, 0.5);
-    }
-    
-    .allocated-false {
-        background: rgba(56, 189, 248, 0.3);
-        color: var(--accent-blue) !important;
-        border: 1px solid rgba(56, 189, 248, 0.5);
-    }
-    
-    .requested-true {
-        background: rgba(245, 158, 11, 0.3);
-        color: var(--warning) !important;
-        border: 1px solid rgba(245, 158, 11, 0.5);
-    }
-    
-    .requested-false {
-        background: rgba(30, 41, 59, 0.5);
-        color: var(--text-secondary) !important;
-        border: 1px solid var(--border-color);
-    }
+def load_system(allocation, request, available, status=None, history=None):
+    """Make the given state the session's system (new or loaded) and rebuild everything derived from it"""
+    n = len(allocation)
+    m = len(available)
+    st.session_state.num_processes = n
+    st.session_state.num_resources = m
     
-    /* Toggle Button Styling - IMPROVED */
-    .toggle-button-container {
-        text-align: center;
-        margin: 5px 0;
-    }
+    # Store in session state
+    st.session_state.allocation = allocation
+    st.session_state.request = request
+    st.session_state.available = available
+    st.session_state.system_initialized = True
+    st.session_state.deadlock_history = list(history) if history else []
     
-    /* Available Resources Display - FIXED */
-    .available-resource-box {
-        padding: 10px;
-        margin: 8px 0;
-        border-radius: 8px;
-        background: rgba(30, 41, 59, 0.6);
-        border: 1px solid var(--border-color);
-    }
+    # Initialize process status
+    st.session_state.process_status = list(status) if status is not None else ["Running"] * n
     
-    .available-resource-box.available {
-        border-left: 4px solid var(--success);
-        background: rgba(16, 185, 129, 0.1);
-    }
+    # Initialize toggle states (request toggles of the previous system are stale)
+    st.session_state.toggle_states = {}
+    for key in [key for key in st.session_state if key.startswith('toggle_state_')]:
+        del st.session_state[key]
     
-    .available-resource-box.allocated {
-        border-left: 4px solid var(--accent-blue);
-        background: rgba(56, 189, 248, 0.1);
-    }
+    # Build incremental detector and holder index for the new state
+    st.session_state.incremental_detector = IncrementalDeadlockDetector(allocation, request, available)
+    st.session_state.holder = DeadlockDetectorSingleInstance(n, m).build_holder_index(allocation)
+    st.session_state.admission_controller = None
+    st.session_state.recovery_log = []
     
-    /* FIX: Hide Streamlit's default dataframe styling */
-    .stDataFrame {
-        background: transparent !important;
-    }
+    # New history starting at the initial state
+    st.session_state.event_log = EventLog(allocation, request, available, st.session_state.process_status)
+    st.session_state.pending_event = None
     
-    /* FIX: Force table background colors */
-    table {
-        background: rgba(15, 23, 42, 0.5) !important;
-        color: var(--text-primary) !important;
-    }
+    # Clear messages
+    st.session_state.message_init = None
+    st.session_state.message_detect = None
+    st.session_state.message_update = None
+    st.session_state.message_terminate = None
+    st.session_state.message_preempt = None
+    st.session_state.message_cycle = None
+    st.session_state.message_reset = None
+
+def get_incremental_detector():
+    """Returns the session's incremental detector, building it from the matrices if missing"""
+    if st.session_state.get('incremental_detector') is None:
+        st.session_state.incremental_detector = IncrementalDeadlockDetector(
+            st.session_state.allocation,
+            st.session_state.request,
+            st.session_state.available
+        )
+    return st.session_state.incremental_detector
+
+def get_holder_index():
+    """Returns the session's resource -> holder index, building it from the allocation if missing"""
+    if st.session_state.get('holder') is None:
+        detector = DeadlockDetectorSingleInstance(st.session_state.num_processes, st.session_state.num_resources)
+        st.session_state.holder = detector.build_holder_index(st.session_state.allocation)
+    return st.session_state.holder
+
+def release_held_resources(pid):
+    """Drop a terminated process from the holder index"""
+    holder = get_holder_index()
+    for j, h in enumerate(holder):
+        if h == pid:
+            holder[j] = -1
+
+def get_admission_controller():
+    """Returns the session's Banker's admission controller, building it from the matrices if missing"""
+    if st.session_state.get('admission_controller') is None:
+        st.session_state.admission_controller = BankersAdmissionController(
+            st.session_state.allocation,
+            st.session_state.request,
+            st.session_state.available
+        )
+    return st.session_state.admission_controller
+
+def apply_request_row(pid, row):
+    """Write a request row to the request matrix, the incremental detector and the process status"""
+    note_process(pid)
+    st.session_state.request[pid] = list(row)
+    get_incremental_detector().set_request_row(pid, st.session_state.request[pid])
+    
+    if sum(st.session_state.request[pid]) > 0:
+        st.session_state.process_status[pid] = "Waiting"
+    else:
+        st.session_state.process_status[pid] = "Running"
+
+def sync_admission_controller(terminated=None):
+    """
+    Reload the admission controller after allocations changed
+    Queued requests that became safe are granted; returns their process names
+    """
+    controller = st.session_state.get('admission_controller')
+    if controller is None:
+        return []
+    
+    if terminated is not None:
+        controller.cancel(terminated)
+    controller.load(
+        st.session_state.allocation,
+        st.session_state.request,
+        st.session_state.available
+    )
     
-    table th {
-        background: rgba(30, 41, 59, 0.8) !important;
-        color: var(--accent-blue) !important;
-        border: 1px solid var(--border-color) !important;
-    }
+    granted = []
+    for pid, row in controller.retry_pending():
+        apply_request_row(pid, row)
+        granted.append(PROCESS_NAMES[pid % len(PROCESS_NAMES)])
+    if granted:
+        st.session_state.message_update = f"Queued request(s) granted after recovery: {', '.join(granted)}"
+    return granted
+
+@st.cache_data(max_entries=32, show_spinner=False)
+def render_matrix_html(cells, shape, row_labels, column_labels, symbols, classes):
+    """
+    Render a 0/1 matrix as an HTML table (cell value -> symbol and CSS class)
+    cells are the matrix bytes, so the HTML is cached until the matrix content changes
+    Returns HTML string
+    """
+    matrix = np.frombuffer(cells, dtype=np.uint8).reshape(shape)
+    
+    # One lookup for all cells instead of styling them one by one
+    cell_html = np.array(
+        [f'<td class="{css}">{symbol}</td>' for symbol, css in zip(symbols, classes)],
+        dtype=object
+    )[matrix]
+    
+    header = "".join(f"<th>{label}</th>" for label in column_labels)
+    rows = [
+        f"<tr><th>{label}</th>{''.join(row)}</tr>"
+        for label, row in zip(row_labels, cell_html.tolist())
+    ]
+    return (
+        '<div class="matrix-container"><table class="matrix-table">'
+        f"<thead><tr><th></th>{header}</tr></thead>"
+        f"<tbody>{''.join(rows)}</tbody></table></div>"
+    )
+
+def process_label(i):
+    """Process name, with its index once names repeat in large systems"""
+    name = PROCESS_NAMES[i % len(PROCESS_NAMES)]
+    return name if st.session_state.num_processes <= FULL_VIEW_PROCESSES else f"{name} #{i}"
+
+def resource_label(j):
+    """Resource name, with its index once names repeat in large systems"""
+    name = RESOURCE_NAMES[j % len(RESOURCE_NAMES)]
+    return name if st.session_state.num_resources <= FULL_VIEW_RESOURCES else f"{name} #{j}"
+
+def format_process_list(pids, limit=MONITOR_LIMIT):
+    """Comma separated process names, the rest of a long list only counted"""
+    names = ", ".join(PROCESS_NAMES[pid % len(PROCESS_NAMES)] for pid in pids[:limit])
+    if len(pids) > limit:
+        names += f" and {len(pids) - limit} more"
+    return names
+
+def matrix_html(matrix, symbols, classes, row_start=0, column_start=0):
+    """Cached HTML table for a session matrix (allocation or request) or a window of it"""
+    cells = np.ascontiguousarray(matrix, dtype=np.uint8)
+    n, m = cells.shape
+    return render_matrix_html(
+        cells.tobytes(),
+        cells.shape,
+        tuple(process_label(i) for i in range(row_start, row_start + n)),
+        tuple(resource_label(j) for j in range(column_start, column_start + m)),
+        symbols,
+        classes
+    )
+
+@st.cache_data(max_entries=8, show_spinner=False)
+def downsample_density(cells, shape, blocks):
+    """
+    Downsample a 0/1 matrix to at most blocks x blocks cells (fraction of ones per block)
+    Returns (density matrix, row block edges, column block edges)
+    """
+    matrix = np.frombuffer(cells, dtype=np.uint8).reshape(shape)
+    row_edges = np.unique(np.linspace(0, shape[0], min(blocks, shape[0]) + 1).astype(int))
+    column_edges = np.unique(np.linspace(0, shape[1], min(blocks, shape[1]) + 1).astype(int))
+    
+    # Block sums with one reduceat per axis
+    sums = np.add.reduceat(matrix.astype(np.int64), row_edges[:-1], axis=0)
+    sums = np.add.reduceat(sums, column_edges[:-1], axis=1)
+    sizes = np.outer(np.diff(row_edges), np.diff(column_edges))
+    return sums / sizes, row_edges, column_edges
+
+@st.fragment
+def render_matrix_viewer(kind, matrix, symbols, classes):
+    """
+    Large-matrix viewer: downsampled density heatmap, click a block to zoom into
+    a paginated cell table of that window
+    The browser only receives the heatmap blocks and one page of cells,
+    zooming and paging rerun only this fragment
+    """
+    cells = np.asarray(matrix, dtype=np.uint8)
+    n, m = cells.shape
+    density, row_edges, column_edges = downsample_density(cells.tobytes(), cells.shape, HEATMAP_BLOCKS)
+    
+    block_rows, block_columns = np.indices(density.shape)
+    heatmap_df = pd.DataFrame({
+        "block_row": block_rows.ravel(),
+        "block_col": block_columns.ravel(),
+        "density": density.ravel().round(3)
+    })
+    block = alt.selection_point(name="block", fields=["block_row", "block_col"])
+    chart = alt.Chart(heatmap_df).mark_rect().encode(
+        x=alt.X("block_col:O", title=f"Resources ({len(column_edges) - 1} blocks)", axis=alt.Axis(labels=False, ticks=False)),
+        y=alt.Y("block_row:O", title=f"Processes ({len(row_edges) - 1} blocks)", axis=alt.Axis(labels=False, ticks=False)),
+        color=alt.Color("density:Q", scale=alt.Scale(domain=[0, 1], scheme="purples"), title="Density"),
+        opacity=alt.condition(block, alt.value(1.0), alt.value(0.6)),
+        tooltip=["block_row", "block_col", "density"]
+    ).add_params(block).properties(height=320)
+    event = st.altair_chart(chart, use_container_width=True, on_select="rerun", key=f"heatmap_{kind}")
+    
+    # Zoom window = clicked block (first block by default), widened to at least one page
+    selected = event.selection.get("block") if event else None
+    block_row, block_col = (selected[0]["block_row"], selected[0]["block_col"]) if selected else (0, 0)
+    row_start = int(row_edges[block_row])
+    row_end = min(n, max(int(row_edges[block_row + 1]), row_start + VIEWER_PAGE_ROWS))
+    column_start = min(int(column_edges[block_col]), max(0, m - VIEWER_PAGE_COLUMNS))
+    column_end = min(m, column_start + VIEWER_PAGE_COLUMNS)
+    
+    pages = (row_end - row_start + VIEWER_PAGE_ROWS - 1) // VIEWER_PAGE_ROWS
+    page = st.number_input(
+        f"Page (of {pages})",
+        min_value=1,
+        max_value=pages,
+        value=1,
+        key=f"viewer_page_{kind}_{block_row}_{block_col}"
+    )
+    page_start = row_start + (page - 1) * VIEWER_PAGE_ROWS
+    page_end = min(row_end, page_start + VIEWER_PAGE_ROWS)
     
-    table td {
-        background: rgba(15, 23, 42, 0.3) !important;
-        color: var(--text-primary) !important;
-        border: 1px solid var(--border-color) !important;
-    }
+    st.markdown(f"""
+    <div style="color: var(--text-secondary); font-size: 12px; margin: 5px 0;">
+        Processes {page_start}-{page_end - 1}, resources {column_start}-{column_end - 1}
+        of a {n} x {m} matrix (click a heatmap block to zoom)
+    </div>
+    """, unsafe_allow_html=True)
+    st.write(
+        matrix_html(cells[page_start:page_end, column_start:column_end], symbols, classes, page_start, column_start),
+        unsafe_allow_html=True
+    )
 
-</style>
-""", unsafe_allow_html=True)
+@st.cache_data(max_entries=32, show_spinner=False)
+def render_available_html(cells, labels):
+    """
+    Render the available vector as an HTML table (Resource, Status, Value)
+    Returns HTML string
+    """
+    vector = np.frombuffer(cells, dtype=np.uint8)
+    status_html = np.array(
+        [
+            '<td class="cell-free">Allocated</td><td class="cell-free">0</td>',
+            '<td class="cell-allocated">Available</td><td class="cell-allocated">1</td>'
+        ],
+        dtype=object
+    )[vector]
+    
+    css = np.array(["cell-free", "cell-allocated"], dtype=object)[vector]
+    rows = [
+        f'<tr><td class="{row_css}">{label}</td>{cells_html}</tr>'
+        for label, row_css, cells_html in zip(labels, css.tolist(), status_html.tolist())
+    ]
+    return (
+        '<div class="matrix-container"><table class="matrix-table">'
+        "<thead><tr><th>Resource</th><th>Status</th><th>Value</th></tr></thead>"
+        f"<tbody>{''.join(rows)}</tbody></table></div>"
+    )
+
+def available_html(available):
+    """Cached HTML table for the available vector"""
+    cells = np.asarray(available, dtype=np.uint8)
+    return render_available_html(
+        cells.tobytes(),
+        tuple(RESOURCE_NAMES[j % len(RESOURCE_NAMES)] for j in range(len(cells)))
+    )
+
+def record_phase(name, start):
+    """Add the time since start to a phase of the current rerun"""
+    phases = st.session_state.perf_phases
+    phases[name] = phases.get(name, 0.0) + time.perf_counter() - start
+
+@contextmanager
+def timed_phase(name):
+    """Time a block as one phase of the current rerun (also when it ends with st.rerun)"""
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        record_phase(name, start)
+
+def finish_rerun():
+    """
+    Close the timing record of the current rerun and add it to the history
+    Reruns triggered by st.rerun() after an action are counted together with the action
+    """
+    total = time.perf_counter() - st.session_state.perf_started
+    record = {"Total": total * 1000}
+    for name, seconds in st.session_state.perf_phases.items():
+        record[name] = seconds * 1000
+    record["Other Rendering"] = max(0.0, record["Total"] - sum(st.session_state.perf_phases.values()) * 1000)
+    st.session_state.perf_history.append(record)
+    st.session_state.perf_phases = {}
+    st.session_state.perf_started = None
 
-# Deadlock Detection & Recovery Algorithms for SINGLE RESOURCE INSTANCES
-class DeadlockDetectorSingleInstance:
-    def __init__(self, num_processes, num_resources):
-        self.num_processes = num_processes
-        self.num_resources = num_resources
+def render_performance_panel():
+    """Collapsible panel with the phase breakdown of the last rerun and the latency history"""
+    history = list(st.session_state.perf_history)
+    if not history:
+        return
+    
+    with st.expander("Performance Panel"):
+        last = history[-1]
+        totals = [record["Total"] for record in history]
+        
+        metric_cols = st.columns(3)
+        metric_cols[0].metric("Last Rerun", f"{last['Total']:.1f} ms")
+        metric_cols[1].metric("Median", f"{pd.Series(totals).median():.1f} ms")
+        metric_cols[2].metric("95th Percentile", f"{pd.Series(totals).quantile(0.95):.1f} ms")
+        
+        # Where the time of the last rerun went
+        breakdown = pd.DataFrame(
+            [{"Phase": name, "Time (ms)": round(value, 2)} for name, value in last.items() if name != "Total"]
+        ).sort_values("Time (ms)", ascending=False)
+        st.dataframe(breakdown, use_container_width=True, hide_index=True)
+        
+        # Rolling latency history per phase
+        st.caption(f"Latency of the last {len(history)} reruns (ms)")
+        st.line_chart(pd.DataFrame(history).fillna(0.0))
+
+@contextmanager
+def timed_fragment(name):
+    """
+    Time a fragment: a phase of the full rerun, or its own history record
+    when only the fragment reran
+    """
+    start = time.perf_counter()
+    full_rerun = st.session_state.perf_started is not None
+    try:
+        yield
+    finally:
+        if full_rerun:
+            record_phase(name, start)
+    
+    if not full_rerun:
+        elapsed = (time.perf_counter() - start) * 1000
+        st.session_state.perf_history.append({"Total": elapsed, name: elapsed})
+
+def toggle_request_cell(pid, resource):
+    """Flip one cell of the pending request row of a process (button callback)"""
+    toggle_state = st.session_state[f'toggle_state_{pid}']
+    toggle_state[resource] = 1 - toggle_state[resource]
+
+@st.fragment
+def render_request_simulation():
+    """
+    Process selection, request toggles and request update of the simulate card
+    Runs as a fragment: toggling a request only reruns this function, the rest of the
+    page reruns when an update is written to the request matrix
+    """
+    with timed_fragment("Simulate Request"):
+        st.markdown('<label>Select Process</label>', unsafe_allow_html=True)
+        if st.session_state.num_processes <= FULL_VIEW_PROCESSES:
+            selected_process = st.selectbox(
+                "",
+                PROCESS_NAMES[:st.session_state.num_processes],
+                key="selected_process",
+                label_visibility="collapsed"
+            )
+            pid = PROCESS_NAMES.index(selected_process)
+        else:
+            # Too many processes for a dropdown - select by index
+            pid = st.number_input(
+                "",
+                min_value=0,
+                max_value=st.session_state.num_processes - 1,
+                value=0,
+                key="selected_process_index",
+                label_visibility="collapsed"
+            )
+            selected_process = process_label(pid)
         
-    def detect_deadlock(self, allocation, request, available):
-        """
-        Detect deadlock using Wait-For Graph algorithm for SINGLE INSTANCE resources
-        Returns list of deadlocked processes
-        """
-        n = self.num_processes
-        m = self.num_resources
-        
-        # Initialize work vector (copy of available)
-        work = available.copy()
-        
-        # Finish[i] = true if process has no allocated resources
-        finish = [False] * n
-        for i in range(n):
-            if sum(allocation[i]) == 0:  # No resources allocated
-                finish[i] = True
-        
-        # Detection algorithm for single instance resources
-        while True:
-            found = False
-            for i in range(n):
-                if not finish[i]:
-                    # Check if all requests can be satisfied (single instance check)
-                    can_allocate = True
-                    for j in range(m):
-                        # For single instance: request[i][j] is either 0 or 1
-                        # work[j] is either 0 or 1
-                        if request[i][j] == 1 and work[j] == 0:
-                            can_allocate = False
-                            break
-                    
-                    if can_allocate:
-                        # Process can complete - release its SINGLE INSTANCE resources
-                        for j in range(m):
-                            if allocation[i][j] == 1:
-                                work[j] = 1  # Resource becomes available
-                        finish[i] = True
-                        found = True
-            
-            if not found:
-                break
+        st.markdown('<label>Toggle Resource Requests (Single Instance: 0 or 1)</label>', unsafe_allow_html=True)
+        st.markdown("""
+        <div style="color: var(--text-secondary); font-size: 13px; margin-bottom: 10px;">
+            <strong>Instructions:</strong> Click buttons to toggle resource requests<br>
+            <span style="color: #F87171;">Red button</span> = Resource Requested (1)<br>
+            <span style="color: #9CA3AF;">Gray button</span> = Not Requested (0)
+        </div>
+        """, unsafe_allow_html=True)
         
-        # Identify deadlocked processes
-        deadlocked = [i for i in range(n) if not finish[i]]
-        return deadlocked
-    
-    def find_deadlock_cycle(self, request, allocation):
-        """
-        Find the cycle in deadlock if exists for SINGLE INSTANCE resources
-        Returns list of processes in the cycle
-        """
-        n = self.num_processes
-        
-        # Build wait-for graph for single instance resources
-        wait_for = [[] for _ in range(n)]
-        
-        for i in range(n):
-            for j in range(n):
-                if i != j:
-                    # Process i waits for process j if:
-                    # i requests a resource that j holds
-                    waiting = False
-                    for k in range(self.num_resources):
-                        if request[i][k] == 1 and allocation[j][k] == 1:
-                            waiting = True
-                            break
-                    if waiting:
-                        wait_for[i].append(j)
-        
-        # Detect cycle using DFS
-        visited = [False] * n
-        rec_stack = [False] * n
-        cycle = []
-        
-        def dfs(v, path):
-            visited[v] = True
-            rec_stack[v] = True
-            path.append(v)
-            
-            for neighbor in wait_for[v]:
-                if not visited[neighbor]:
-                    if dfs(neighbor, path):
-                        return True
-                elif rec_stack[neighbor]:
-                    # Cycle detected
-                    start_idx = path.index(neighbor)
-                    global cycle
-                    cycle = path[start_idx:]
-                    return True
-            
-            path.pop()
-            rec_stack[v] = False
-            return False
+        # Large systems show one page of resources at a time
+        first_resource = 0
+        last_resource = st.session_state.num_resources
+        if st.session_state.num_resources > FULL_VIEW_RESOURCES:
+            resource_pages = (st.session_state.num_resources + FULL_VIEW_RESOURCES - 1) // FULL_VIEW_RESOURCES
+            resource_page = st.number_input(
+                f"Resource page (of {resource_pages})",
+                min_value=1,
+                max_value=resource_pages,
+                value=1,
+                key="toggle_resource_page"
+            )
+            first_resource = (resource_page - 1) * FULL_VIEW_RESOURCES
+            last_resource = min(st.session_state.num_resources, first_resource + FULL_VIEW_RESOURCES)
         
-        for i in range(n):
-            if not visited[i]:
-                if dfs(i, []):
-                    break
+        # Create toggle buttons in a grid
+        cols_per_row = min(4, last_resource - first_resource)
+        num_rows = (last_resource - first_resource + cols_per_row - 1) // cols_per_row
         
-        return cycle
-    
-    def recover_by_process_termination(self, deadlocked, allocation, request, available):
-        """
-        Recover from deadlock by terminating processes for SINGLE INSTANCE resources
-        Returns modified matrices
-        """
-        if not deadlocked:
-            return allocation, request, available, []
-        
-        # Select process with maximum wait dependencies
-        terminated = deadlocked[0]
-        max_dependencies = 0
-        
-        for pid in deadlocked:
-            # Count how many resources this process is requesting
-            dependencies = sum(request[pid])
-            if dependencies > max_dependencies:
-                max_dependencies = dependencies
-                terminated = pid
-        
-        # Release SINGLE INSTANCE resources of terminated process
-        new_allocation = [row[:] for row in allocation]
-        new_request = [row[:] for row in request]
-        new_available = available[:]
-        
-        for j in range(self.num_resources):
-            if new_allocation[terminated][j] == 1:
-                new_available[j] = 1  # Resource becomes available
-                new_allocation[terminated][j] = 0
-            new_request[terminated][j] = 0  # Clear all requests
-        
-        return new_allocation, new_request, new_available, [terminated]
-    
-    def recover_by_resource_preemption(self, deadlocked, allocation, request, available):
-        """
-        Recover from deadlock by resource preemption for SINGLE INSTANCE resources
-        Returns modified matrices
-        """
-        if not deadlocked:
-            return allocation, request, available, []
+        # Initialize session state for toggle buttons if not exists
+        if f'toggle_state_{pid}' not in st.session_state:
+            st.session_state[f'toggle_state_{pid}'] = st.session_state.request[pid].copy()
         
-        # Find resource that is most requested among deadlocked processes
-        preempted_resource = -1
-        max_requests = -1
+        # Use session state for toggle values
+        current_toggle_state = st.session_state[f'toggle_state_{pid}']
         
-        for j in range(self.num_resources):
-            request_count = sum(request[pid][j] for pid in deadlocked)
-            if request_count > max_requests:
-                max_requests = request_count
-                preempted_resource = j
+        for row in range(num_rows):
+            cols = st.columns(cols_per_row)
+            for col_idx in range(cols_per_row):
+                j = first_resource + row * cols_per_row + col_idx
+                if j < last_resource:
+                    with cols[col_idx]:
+                        resource_name = resource_label(j)
+                        current_value = current_toggle_state[j]
+                        
+                        # Create the toggle button with JavaScript for visual feedback
+                        button_text = f"Requested" if current_value == 1 else f"Not Requested"
+                        
+                        # Create the toggle button (the callback flips the value before the fragment reruns)
+                        st.button(
+                            button_text,
+                            key=f"toggle_{pid}_{j}",
+                            help=f"Click to toggle request for {resource_name}",
+                            use_container_width=True,
+                            on_click=toggle_request_cell,
+                            args=(pid, j)
+                        )
+                        
+                        # Visual indicator for current state
+                        indicator_color = "#F87171" if current_value == 1 else "#9CA3AF"
+                        st.markdown(f"""
+                        <div style='text-align: center; margin-top: 5px;'>
+                            <div style='font-size: 11px; color: {indicator_color}; font-weight: 600;'>{resource_name}</div>
+                            <div style='font-size: 10px; color: var(--text-secondary);'>Value: {current_value}</div>
+                        </div>
+                        """, unsafe_allow_html=True)
         
-        if preempted_resource == -1:
-            return allocation, request, available, []
+        # Deadlock avoidance: check every request update with the Banker's safe-state test
+        avoidance_mode = st.checkbox(
+            "Avoidance mode (Banker's safe-state check)",
+            key="avoidance_mode",
+            help="Requests that would lead to an unsafe state are not written to the request matrix"
+        )
+        if avoidance_mode:
+            unsafe_policy = st.radio(
+                "Unsafe requests",
+                ["Queue", "Refuse"],
+                horizontal=True,
+                key="unsafe_policy"
+            )
+            controller = get_admission_controller()
+            controller.queue_unsafe = unsafe_policy == "Queue"
+            if controller.pending:
+                st.markdown(f"""
+                <div style="color: var(--text-secondary); font-size: 12px; margin-bottom: 10px;">
+                    Queued requests: {format_process_list(list(controller.pending))}
+                </div>
+                """, unsafe_allow_html=True)
+        else:
+            # Request updates bypass the controller now, rebuild it when avoidance is turned on again
+            st.session_state.admission_controller = None
         
-        # Find process holding this resource
-        preempted_process = -1
-        for pid in range(self.num_processes):
-            if allocation[pid][preempted_resource] == 1:
-                preempted_process = pid
-                break
+        # Update request button
+        if st.button("Update Request", use_container_width=True, key="update_request"):
+            with st.spinner("Updating request..."), timed_phase("Request Update"):
+                new_row = st.session_state[f'toggle_state_{pid}'].copy()
+                outcome = get_admission_controller().submit(pid, new_row) if avoidance_mode else "granted"
+                
+                if outcome == "granted":
+                    # Update request matrix with toggle state
+                    apply_request_row(pid, new_row)
+                    st.session_state.message_update = f"Request updated for {selected_process}"
+                elif outcome == "queued":
+                    st.session_state.message_update = f"Request for {selected_process} queued - granting it now would lead to an unsafe state"
+                else:
+                    st.session_state.message_update = f"Request for {selected_process} refused - granting it would lead to an unsafe state"
+                commit_event(f"Update request: {selected_process}")
+                st.rerun()
         
-        if preempted_process == -1:
-            return allocation, request, available, []
+        # Show update status if exists
+        if st.session_state.message_update:
+            st.markdown(f"""
+            <div style="margin: 10px 0; padding: 15px; background: rgba(56, 189, 248, 0.1); 
+                      border-radius: 8px; border-left: 4px solid var(--accent-blue);">
+                <strong>Last Update:</strong><br>
+                {st.session_state.message_update}
+            </div>
+            """, unsafe_allow_html=True)
         
-        # Preempt the SINGLE INSTANCE resource
-        new_allocation = [row[:] for row in allocation]
-        new_request = [row[:] for row in request]
-        new_available = available[:]
+        # Show current request status
+        st.markdown(f"""
+        <div style="margin: 15px 0; padding: 12px; background: rgba(30, 41, 59, 0.5); border-radius: 8px;">
+            <div style="color: var(--text-secondary); font-size: 12px; margin-bottom: 5px;">
+                Current Request Status for {selected_process}:
+            </div>
+            <div style="display: flex; flex-wrap: wrap; gap: 5px;">
+        """, unsafe_allow_html=True)
         
-        # Release resource from current holder
-        new_allocation[preempted_process][preempted_resource] = 0
-        new_request[preempted_process][preempted_resource] = 1  # Process will request it back
+        requested_resources = []
+        for j in range(st.session_state.num_resources):
+            current_value = st.session_state.request[pid][j]
+            resource_name = resource_label(j)
+            if current_value == 1:
+                requested_resources.append(resource_name)
         
-        # Make resource available
-        new_available[preempted_resource] = 1
+        if requested_resources:
+            for resource in requested_resources[:MONITOR_LIMIT]:
+                st.markdown(f'<div style="background: rgba(245, 158, 11, 0.2); color: var(--warning); padding: 4px 8px; border-radius: 4px; font-size: 11px;">{resource}: ↑</div>', unsafe_allow_html=True)
+            if len(requested_resources) > MONITOR_LIMIT:
+                st.markdown(f'<div style="color: var(--text-secondary); font-size: 11px;">and {len(requested_resources) - MONITOR_LIMIT} more</div>', unsafe_allow_html=True)
+        else:
+            st.markdown('<div style="color: var(--text-secondary); font-size: 11px;">No resources requested</div>', unsafe_allow_html=True)
         
-        return new_allocation, new_request, new_available, [(preempted_process, preempted_resource)]
+        st.markdown("</div></div>", unsafe_allow_html=True)
 
-# Process and Resource Names - ORIGINAL NAMES AS BEFORE
-PROCESS_NAMES = [
-    "Chrome Browser",
-    "VS Code Editor", 
-    "Spotify Player",
-    "Discord Client",
-    "Zoom Meeting",
-    "Adobe Photoshop",
-    "Blender 3D",
-    "MySQL Server",
-    "Docker Engine",
-    "Node.js Server"
-]
+# Timing record of this rerun (kept if the previous rerun was interrupted by st.rerun())
+if st.session_state.perf_started is None:
+    st.session_state.perf_started = RERUN_STARTED
+record_phase("Session Setup", RERUN_STARTED)
+
+# Event log (undo/redo)
+def get_event_log():
+    """Returns the session's event log, starting it at the current state if missing"""
+    if st.session_state.get('event_log') is None:
+        st.session_state.event_log = EventLog(
+            st.session_state.allocation,
+            st.session_state.request,
+            st.session_state.available,
+            st.session_state.process_status
+        )
+    return st.session_state.event_log
+
+def get_pending_event():
+    """State saved before the running action changed it (started on first use)"""
+    if st.session_state.get('pending_event') is None:
+        get_event_log()
+        st.session_state.pending_event = {
+            "rows": {},
+            "available": st.session_state.available.copy(),
+            "status": None,
+            "request_matrix": None
+        }
+    return st.session_state.pending_event
+
+def note_process(pid):
+    """Remember the rows and status of a process before the running action changes them"""
+    pending = get_pending_event()
+    if pid not in pending["rows"]:
+        pending["rows"][pid] = (
+            st.session_state.allocation[pid].copy(),
+            st.session_state.request[pid].copy(),
+            st.session_state.process_status[pid]
+        )
+
+def note_all_statuses():
+    """Remember every process status (detection and reset change all of them)"""
+    pending = get_pending_event()
+    if pending["status"] is None:
+        pending["status"] = list(st.session_state.process_status)
+
+def note_request_matrix():
+    """Remember the whole request matrix (bulk replacement)"""
+    pending = get_pending_event()
+    if pending["request_matrix"] is None:
+        pending["request_matrix"] = tuple(PackedSystemState.pack_rows(st.session_state.request))
+
+def commit_event(label):
+    """
+    Record the changes of the running action as one event of the log
+    Only the noted rows are compared, so the cost is proportional to the change
+    """
+    pending = st.session_state.get('pending_event')
+    st.session_state.pending_event = None
+    if pending is None:
+        return
+    
+    changes = []
+    if pending["request_matrix"] is not None:
+        new_rows = tuple(PackedSystemState.pack_rows(st.session_state.request))
+        if new_rows != pending["request_matrix"]:
+            changes.append(("request_matrix", None, pending["request_matrix"], new_rows))
+    
+    for pid, (allocation_row, request_row, status) in pending["rows"].items():
+        for j, (old, new) in enumerate(zip(allocation_row, st.session_state.allocation[pid])):
+            if old != new:
+                changes.append(("allocation", (pid, j), old, new))
+        if pending["request_matrix"] is None:
+            for j, (old, new) in enumerate(zip(request_row, st.session_state.request[pid])):
+                if old != new:
+                    changes.append(("request", (pid, j), old, new))
+        if pending["status"] is None and status != st.session_state.process_status[pid]:
+            changes.append(("status", pid, status, st.session_state.process_status[pid]))
+    
+    for j, (old, new) in enumerate(zip(pending["available"], st.session_state.available)):
+        if old != new:
+            changes.append(("available", j, old, new))
+    
+    if pending["status"] is not None:
+        for pid, (old, new) in enumerate(zip(pending["status"], st.session_state.process_status)):
+            if old != new:
+                changes.append(("status", pid, old, new))
+    
+    get_event_log().record(label, changes)
 
-RESOURCE_NAMES = [
-    "CPU Cores",
-    "GPU Memory", 
-    "RAM Allocation",
-    "Disk I/O",
-    "Network Bandwidth",
-    "USB Ports",
-    "Audio Channels",
-    "File Handles"
-]
+def apply_logged_changes(loaded, changes):
+    """
+    Write undo/redo changes back to the session state and the derived structures
+    loaded is a full state to load first (jump from a snapshot) or None
+    """
+    detector = get_incremental_detector()
+    holder = get_holder_index()
+    reload = loaded is not None
+    
+    if loaded is not None:
+        allocation, request, available, status = loaded
+        st.session_state.allocation = allocation
+        st.session_state.request = request
+        st.session_state.available = available
+        st.session_state.process_status = status
+    
+    for field, index, value in changes:
+        if field == "allocation":
+            i, j = index
+            st.session_state.allocation[i][j] = value
+            if not reload:
+                detector.set_allocation(i, j, value)
+                if value:
+                    holder[j] = i
+                elif holder[j] == i:
+                    holder[j] = -1
+        elif field == "request":
+            i, j = index
+            st.session_state.request[i][j] = value
+            st.session_state.pop(f'toggle_state_{i}', None)
+            if not reload:
+                detector.set_request(i, j, value)
+        elif field == "available":
+            st.session_state.available[index] = value
+            if not reload:
+                detector.set_available(index, value)
+        elif field == "status":
+            st.session_state.process_status[index] = value
+        elif field == "request_matrix":
+            m = st.session_state.num_resources
+            st.session_state.request = [PackedSystemState.unpack_row(bits, m) for bits in value]
+            reload = True
+    
+    if reload:
+        # Bulk change - rebuild the derived structures once
+        detector.load(st.session_state.allocation, st.session_state.request, st.session_state.available)
+        st.session_state.holder = None
+        for pid in range(st.session_state.num_processes):
+            st.session_state.pop(f'toggle_state_{pid}', None)
+    
+    # Pending requests refer to the old state
+    st.session_state.admission_controller = None
 
-# Initialize session state
-if 'system_initialized' not in st.session_state:
-    st.session_state.system_initialized = False
-    st.session_state.num_processes = 5
-    st.session_state.num_resources = 3
-    st.session_state.allocation = []
-    st.session_state.request = []
-    st.session_state.available = []
-    st.session_state.deadlock_history = []
-    st.session_state.process_status = []
-    
-    # Message states for persistence
-    st.session_state.message_init = None
-    st.session_state.message_detect = None
-    st.session_state.message_update = None
-    st.session_state.message_terminate = None
-    st.session_state.message_preempt = None
-    st.session_state.message_cycle = None
-    st.session_state.message_reset = None
-    
-    # Toggle button states
-    st.session_state.toggle_states = {}
-    
-    # User guide state
-    st.session_state.show_user_guide = False
+# Save / load scenarios
+def scenario_data():
+    """
+    Returns a callable that encodes the current state as a bit-packed .npz file
+    (the download button only runs it when clicked)
+    """
+    allocation = st.session_state.allocation
+    request = st.session_state.request
+    available = st.session_state.available
+    status = st.session_state.process_status
+    history = st.session_state.deadlock_history
+    
+    def encode():
+        buffer = io.BytesIO()
+        save_state(buffer, allocation, request, available, status, history)
+        return buffer.getvalue()
+    return encode
 
-def initialize_system():
-    """Initialize system with SINGLE INSTANCE resource values (0 or 1 only)"""
-    np.random.seed(42)
-    
-    n = st.session_state.num_processes
-    m = st.session_state.num_resources
-    
-    # Generate SINGLE INSTANCE allocation matrix (only 0 or 1)
-    allocation = np.random.randint(0, 2, (n, m)).tolist()
-    
-    # Generate SINGLE INSTANCE request matrix (only 0 or 1)
-    request = np.random.randint(0, 2, (n, m)).tolist()
-    
-    # Generate available SINGLE INSTANCE resources
-    # For single instance: each resource is either available (1) or not (0)
-    total_allocated = np.sum(allocation, axis=0)
-    available = []
-    for j in range(m):
-        # If no one has allocated this resource, it's available
-        if total_allocated[j] == 0:
-            available.append(1)
-        else:
-            # If someone has it, it's not available
-            available.append(0)
-    
-    # Ensure at least one resource is available
-    if sum(available) == 0:
-        available[random.randint(0, m-1)] = 1
-    
-    # Store in session state
-    st.session_state.allocation = allocation
-    st.session_state.request = request
-    st.session_state.available = available
-    st.session_state.system_initialized = True
-    st.session_state.deadlock_history = []
-    
-    # Initialize process status
-    st.session_state.process_status = ["Running"] * n
-    
-    # Initialize toggle states
-    st.session_state.toggle_states = {}
-    
-    # Clear messages
-    st.session_state.message_init = " System initialized with SINGLE INSTANCE resources (0 or 1 only)!"
-    st.session_state.message_detect = None
-    st.session_state.message_update = None
-    st.session_state.message_terminate = None
-    st.session_state.message_preempt = None
-    st.session_state.message_cycle = None
-    st.session_state.message_reset = None
+def load_scenario():
+    """Load the uploaded scenario file (button callback, runs before the widgets are drawn)"""
+    uploaded = st.session_state.get('scenario_file')
+    if uploaded is None:
+        return
+    
+    try:
+        saved = load_state(uploaded)
+    except (ValueError, KeyError, OSError) as error:
+        st.session_state.message_init = f" Could not load scenario: {error}"
+        return
+    if not (3 <= saved.num_processes <= MAX_PROCESSES and 2 <= saved.num_resources <= MAX_RESOURCES):
+        st.session_state.message_init = (
+            f" Could not load scenario: {saved.num_processes} processes x {saved.num_resources} resources "
+            f"is outside the supported size"
+        )
+        return
+    
+    allocation, request, available = saved.to_matrices()
+    status = saved.status()
+    if None in status:
+        status = ["Waiting" if any(row) else "Running" for row in request]
+    load_system(allocation, request, available, status, saved.history)
+    
+    # The size inputs start over from the loaded system's size
+    st.session_state.pop('input_processes', None)
+    st.session_state.pop('input_resources', None)
+    st.session_state.message_init = (
+        f" Scenario loaded: {saved.num_processes} processes, {saved.num_resources} resources"
+    )
 
 # Header with User Guide Toggle
 header_col1, header_col2 = st.columns([4, 1])
@@ -1270,17 +1149,8 @@ with header_col2:
 
 # User Guide Section
 if st.session_state.show_user_guide:
-    st.markdown('<div class="guide-container">', unsafe_allow_html=True)
-    
-    for section in USER_GUIDE_SECTIONS:
-        st.markdown(f"""
-        <div class="guide-section">
-            <div class="guide-section-title">{section["title"]}</div>
-            <div class="guide-section-content">{section["content"]}</div>
-        </div>
-        """, unsafe_allow_html=True)
-    
-    st.markdown('</div>', unsafe_allow_html=True)
+    # Whole guide as one static element (sent once, referenced by the browser cache afterwards)
+    st.markdown(load_user_guide_html(), unsafe_allow_html=True)
     
     # Close Guide Button
     if st.button("Close User Guide", use_container_width=True, key="close_guide"):
@@ -1374,7 +1244,7 @@ with col1:
     num_processes = st.number_input(
         "",
         min_value=3,
-        max_value=10,
+        max_value=MAX_PROCESSES,
         value=st.session_state.num_processes,
         key="input_processes",
         label_visibility="collapsed"
@@ -1384,7 +1254,7 @@ with col1:
     num_resources = st.number_input(
         "",
         min_value=2,
-        max_value=8,
+        max_value=MAX_RESOURCES,
         value=st.session_state.num_resources,
         key="input_resources",
         label_visibility="collapsed"
@@ -1394,15 +1264,35 @@ with col1:
     st.session_state.num_resources = num_resources
     
     if st.button("Initialize System", use_container_width=True, key="init_btn"):
-        with st.spinner("Initializing system with single instance resources..."):
-            time.sleep(0.5)
+        with st.spinner("Initializing system with single instance resources..."), timed_phase("Initialize"):
             initialize_system()
             st.rerun()
     
+    # Save the current state / load a saved one
+    with st.expander("Save / Load Scenario"):
+        if st.session_state.system_initialized:
+            st.download_button(
+                "Save Scenario",
+                data=scenario_data(),
+                file_name="deadlock_scenario.npz",
+                mime="application/octet-stream",
+                use_container_width=True,
+                key="save_btn"
+            )
+        st.file_uploader("Scenario file", type=["npz"], key="scenario_file")
+        st.button(
+            "Load Scenario",
+            use_container_width=True,
+            key="load_btn",
+            on_click=load_scenario,
+            disabled=st.session_state.get('scenario_file') is None
+        )
+    
     st.markdown("</div>", unsafe_allow_html=True)
     
     # Available Resources Card
     if st.session_state.system_initialized:
+        phase_start = time.perf_counter()
         st.markdown("""
         <div class="tech-card">
             <div class="tech-card-title">
@@ -1410,8 +1300,8 @@ with col1:
             </div>
         """, unsafe_allow_html=True)
         
-        for j in range(st.session_state.num_resources):
-            resource_name = RESOURCE_NAMES[j % len(RESOURCE_NAMES)]
+        for j in range(min(st.session_state.num_resources, MONITOR_LIMIT)):
+            resource_name = resource_label(j)
             is_available = st.session_state.available[j] == 1
             
             if is_available:
@@ -1426,14 +1316,10 @@ with col1:
                 box_class = "allocated"
             
             # Find which process has this resource
-            holder = None
-            for i in range(st.session_state.num_processes):
-                if st.session_state.allocation[i][j] == 1:
-                    holder = i
-                    break
+            holder = get_holder_index()[j]
             
             holder_info = ""
-            if holder is not None:
+            if holder != -1:
                 holder_info = f"<div style='color: var(--text-secondary); font-size: 12px; margin-top: 4px;'>Held by: {PROCESS_NAMES[holder % len(PROCESS_NAMES)]}</div>"
             else:
                 holder_info = "<div style='color: var(--text-secondary); font-size: 12px; margin-top: 4px;'>Not allocated to any process</div>"
@@ -1452,6 +1338,14 @@ with col1:
             </div>
             """, unsafe_allow_html=True)
         
+        if st.session_state.num_resources > MONITOR_LIMIT:
+            st.markdown(f"""
+            <div style="color: var(--text-secondary); font-size: 12px;">
+                Showing {MONITOR_LIMIT} of {st.session_state.num_resources} resources
+                ({sum(st.session_state.available)} available)
+            </div>
+            """, unsafe_allow_html=True)
+        
         st.markdown("</div>", unsafe_allow_html=True)
         
         # Process Status Card
@@ -1462,8 +1356,8 @@ with col1:
             </div>
         """, unsafe_allow_html=True)
         
-        for i in range(st.session_state.num_processes):
-            process_name = PROCESS_NAMES[i % len(PROCESS_NAMES)]
+        for i in range(min(st.session_state.num_processes, MONITOR_LIMIT)):
+            process_name = process_label(i)
             status = st.session_state.process_status[i]
             
             # Count allocated and requested resources
@@ -1500,11 +1394,22 @@ with col1:
             </div>
             """, unsafe_allow_html=True)
         
+        if st.session_state.num_processes > MONITOR_LIMIT:
+            status_counts = pd.Series(st.session_state.process_status).value_counts()
+            summary = ", ".join(f"{count} {status.lower()}" for status, count in status_counts.items())
+            st.markdown(f"""
+            <div style="color: var(--text-secondary); font-size: 12px;">
+                Showing {MONITOR_LIMIT} of {st.session_state.num_processes} processes ({summary})
+            </div>
+            """, unsafe_allow_html=True)
+        
         st.markdown("</div>", unsafe_allow_html=True)
+        record_phase("Monitor Cards", phase_start)
 
 with col2:
     if st.session_state.system_initialized:
         # System Matrices Card
+        phase_start = time.perf_counter()
         st.markdown("""
         <div class="tech-card">
             <div class="tech-card-title">
@@ -1513,6 +1418,10 @@ with col2:
         """, unsafe_allow_html=True)
         
         tab1, tab2, tab3 = st.tabs(["Allocation", "Request", "Available"])
+        large_system = (
+            st.session_state.num_processes > FULL_VIEW_PROCESSES
+            or st.session_state.num_resources > FULL_VIEW_RESOURCES
+        )
         
         with tab1:
             # Display allocation matrix with symbols
@@ -1522,30 +1431,14 @@ with col2:
             </div>
             """, unsafe_allow_html=True)
             
-            # Create DataFrame for allocation
-            alloc_data = []
-            for i in range(st.session_state.num_processes):
-                row = {}
-                for j in range(st.session_state.num_resources):
-                    resource_name = RESOURCE_NAMES[j % len(RESOURCE_NAMES)]
-                    value = st.session_state.allocation[i][j]
-                    row[resource_name] = "✔" if value == 1 else "✘"
-                alloc_data.append(row)
-            
-            alloc_df = pd.DataFrame(
-                alloc_data,
-                index=PROCESS_NAMES[:st.session_state.num_processes]
-            )
-            
-            # Apply custom styling
-            def color_allocation(val):
-                if val == "✔":
-                    return 'background-color: rgba(16, 185, 129, 0.2); color: var(--success-light);'
-                else:
-                    return 'background-color: rgba(56, 189, 248, 0.2); color: var(--accent-blue);'
-            
-            styled_alloc = alloc_df.style.applymap(color_allocation)
-            st.write(styled_alloc.to_html(escape=False), unsafe_allow_html=True)
+            # Allocation table (cached until the matrix changes), heatmap viewer for large systems
+            if large_system:
+                render_matrix_viewer("allocation", st.session_state.allocation, ("✘", "✔"), ("cell-free", "cell-allocated"))
+            else:
+                st.write(
+                    matrix_html(st.session_state.allocation, ("✘", "✔"), ("cell-free", "cell-allocated")),
+                    unsafe_allow_html=True
+                )
         
         with tab2:
             # Display request matrix with symbols
@@ -1555,30 +1448,14 @@ with col2:
             </div>
             """, unsafe_allow_html=True)
             
-            # Create DataFrame for request
-            request_data = []
-            for i in range(st.session_state.num_processes):
-                row = {}
-                for j in range(st.session_state.num_resources):
-                    resource_name = RESOURCE_NAMES[j % len(RESOURCE_NAMES)]
-                    value = st.session_state.request[i][j]
-                    row[resource_name] = "↑" if value == 1 else "–"
-                request_data.append(row)
-            
-            request_df = pd.DataFrame(
-                request_data,
-                index=PROCESS_NAMES[:st.session_state.num_processes]
-            )
-            
-            # Apply custom styling
-            def color_request(val):
-                if val == "↑":
-                    return 'background-color: rgba(245, 158, 11, 0.2); color: var(--warning);'
-                else:
-                    return 'background-color: rgba(30, 41, 59, 0.5); color: var(--text-secondary);'
-            
-            styled_request = request_df.style.applymap(color_request)
-            st.write(styled_request.to_html(escape=False), unsafe_allow_html=True)
+            # Request table (cached until the matrix changes), heatmap viewer for large systems
+            if large_system:
+                render_matrix_viewer("request", st.session_state.request, ("–", "↑"), ("cell-idle", "cell-requested"))
+            else:
+                st.write(
+                    matrix_html(st.session_state.request, ("–", "↑"), ("cell-idle", "cell-requested")),
+                    unsafe_allow_html=True
+                )
         
         with tab3:
             # Display available resources - USING DATAFRAME FOR PROPER DISPLAY
@@ -1588,28 +1465,8 @@ with col2:
             </div>
             """, unsafe_allow_html=True)
             
-            # Create DataFrame for available resources
-            available_data = []
-            for j in range(st.session_state.num_resources):
-                resource_name = RESOURCE_NAMES[j % len(RESOURCE_NAMES)]
-                is_available = st.session_state.available[j] == 1
-                available_data.append({
-                    "Resource": resource_name,
-                    "Status": "Available" if is_available else "Allocated",
-                    "Value": "1" if is_available else "0"
-                })
-            
-            avail_df = pd.DataFrame(available_data)
-            
-            # Apply custom styling
-            def color_available(row):
-                if row['Status'] == "Available":
-                    return ['background-color: rgba(16, 185, 129, 0.2); color: var(--success-light);'] * 3
-                else:
-                    return ['background-color: rgba(56, 189, 248, 0.2); color: var(--accent-blue);'] * 3
-            
-            styled_avail = avail_df.style.apply(color_available, axis=1)
-            st.write(styled_avail.to_html(escape=False, index=False), unsafe_allow_html=True)
+            # Available table (cached until the vector changes), first resources only for large systems
+            st.write(available_html(st.session_state.available[:VIEWER_PAGE_ROWS if large_system else None]), unsafe_allow_html=True)
             
             # Summary
             total_available = sum(st.session_state.available)
@@ -1623,6 +1480,7 @@ with col2:
             """, unsafe_allow_html=True)
         
         st.markdown("</div>", unsafe_allow_html=True)
+        record_phase("Matrix Tabs", phase_start)
         
         # Deadlock Detection Card
         st.markdown("""
@@ -1633,10 +1491,13 @@ with col2:
         """, unsafe_allow_html=True)
         
         if st.button("Run Deadlock Detection", use_container_width=True, key="detect_btn"):
-            with st.spinner("Running single instance detection algorithm..."):
-                time.sleep(0.8)
+            with st.spinner("Running single instance detection algorithm..."), timed_phase("Detection"):
                 detector = DeadlockDetectorSingleInstance(st.session_state.num_processes, st.session_state.num_resources)
                 
+                # Full pass - verify the maintained holder index against the matrix
+                if detector.check_holder_index(get_holder_index(), st.session_state.allocation):
+                    st.session_state.holder = detector.build_holder_index(st.session_state.allocation)
+                
                 # Detect deadlock
                 deadlocked = detector.detect_deadlock(
                     st.session_state.allocation,
@@ -1647,25 +1508,26 @@ with col2:
                 # Find cycle
                 cycle = detector.find_deadlock_cycle(
                     st.session_state.request,
-                    st.session_state.allocation
+                    st.session_state.allocation,
+                    get_holder_index()
                 )
                 
+                note_all_statuses()
                 if deadlocked:
                     # Update process status
-                    for i in range(st.session_state.num_processes):
-                        if i in deadlocked:
-                            st.session_state.process_status[i] = "Blocked"
+                    for i in deadlocked:
+                        st.session_state.process_status[i] = "Blocked"
                     
-                    deadlocked_names = [PROCESS_NAMES[i % len(PROCESS_NAMES)] for i in deadlocked]
-                    st.session_state.message_detect = f"DEADLOCK DETECTED! {len(deadlocked)} process(es) are blocked: {', '.join(deadlocked_names)}"
+                    st.session_state.message_detect = f"DEADLOCK DETECTED! {len(deadlocked)} process(es) are blocked: {format_process_list(deadlocked)}"
                     
-                    # Add to history
+                    # Add to history (bounded)
                     st.session_state.deadlock_history.append({
                         'time': time.strftime("%H:%M:%S"),
                         'deadlocked': len(deadlocked),
                         'processes': deadlocked.copy(),
                         'resolved': False
                     })
+                    del st.session_state.deadlock_history[:-DEADLOCK_HISTORY_LIMIT]
                     
                 else:
                     # Update process status
@@ -1677,6 +1539,7 @@ with col2:
                     
                     st.session_state.message_detect = "NO DEADLOCK DETECTED! All processes can proceed normally."
                 
+                commit_event("Detection")
                 st.rerun()
         
         # Show detection status if exists
@@ -1708,118 +1571,8 @@ with col2:
             </div>
         """, unsafe_allow_html=True)
         
-        st.markdown('<label>Select Process</label>', unsafe_allow_html=True)
-        selected_process = st.selectbox(
-            "",
-            PROCESS_NAMES[:st.session_state.num_processes],
-            key="selected_process",
-            label_visibility="collapsed"
-        )
-        pid = PROCESS_NAMES.index(selected_process)
-        
-        st.markdown('<label>Toggle Resource Requests (Single Instance: 0 or 1)</label>', unsafe_allow_html=True)
-        st.markdown("""
-        <div style="color: var(--text-secondary); font-size: 13px; margin-bottom: 10px;">
-            <strong>Instructions:</strong> Click buttons to toggle resource requests<br>
-            <span style="color: #F87171;">Red button</span> = Resource Requested (1)<br>
-            <span style="color: #9CA3AF;">Gray button</span> = Not Requested (0)
-        </div>
-        """, unsafe_allow_html=True)
-        
-        # Create toggle buttons in a grid
-        cols_per_row = min(4, st.session_state.num_resources)
-        num_rows = (st.session_state.num_resources + cols_per_row - 1) // cols_per_row
-        
-        # Initialize session state for toggle buttons if not exists
-        if f'toggle_state_{pid}' not in st.session_state:
-            st.session_state[f'toggle_state_{pid}'] = st.session_state.request[pid].copy()
-        
-        # Use session state for toggle values
-        current_toggle_state = st.session_state[f'toggle_state_{pid}']
-        
-        for row in range(num_rows):
-            cols = st.columns(cols_per_row)
-            for col_idx in range(cols_per_row):
-                j = row * cols_per_row + col_idx
-                if j < st.session_state.num_resources:
-                    with cols[col_idx]:
-                        resource_name = RESOURCE_NAMES[j % len(RESOURCE_NAMES)]
-                        current_value = current_toggle_state[j]
-                        
-                        # Create the toggle button with JavaScript for visual feedback
-                        button_text = f"Requested" if current_value == 1 else f"Not Requested"
-                        
-                        # Create the toggle button
-                        if st.button(
-                            button_text,
-                            key=f"toggle_{pid}_{j}",
-                            help=f"Click to toggle request for {resource_name}",
-                            use_container_width=True
-                        ):
-                            # Toggle the value
-                            current_toggle_state[j] = 1 if current_value == 0 else 0
-                            st.session_state[f'toggle_state_{pid}'] = current_toggle_state
-                            st.rerun()
-                        
-                        # Visual indicator for current state
-                        indicator_color = "#F87171" if current_value == 1 else "#9CA3AF"
-                        st.markdown(f"""
-                        <div style='text-align: center; margin-top: 5px;'>
-                            <div style='font-size: 11px; color: {indicator_color}; font-weight: 600;'>{resource_name}</div>
-                            <div style='font-size: 10px; color: var(--text-secondary);'>Value: {current_value}</div>
-                        </div>
-                        """, unsafe_allow_html=True)
-        
-        # Update request button
-        if st.button("Update Request", use_container_width=True, key="update_request"):
-            with st.spinner("Updating request..."):
-                time.sleep(0.3)
-                
-                # Update request matrix with toggle state
-                st.session_state.request[pid] = st.session_state[f'toggle_state_{pid}'].copy()
-                
-                # Update process status
-                if sum(st.session_state.request[pid]) > 0:
-                    st.session_state.process_status[pid] = "Waiting"
-                else:
-                    st.session_state.process_status[pid] = "Running"
-                
-                st.session_state.message_update = f"Request updated for {selected_process}"
-                st.rerun()
-        
-        # Show update status if exists
-        if st.session_state.message_update:
-            st.markdown(f"""
-            <div style="margin: 10px 0; padding: 15px; background: rgba(56, 189, 248, 0.1); 
-                      border-radius: 8px; border-left: 4px solid var(--accent-blue);">
-                <strong>Last Update:</strong><br>
-                {st.session_state.message_update}
-            </div>
-            """, unsafe_allow_html=True)
-        
-        # Show current request status
-        st.markdown(f"""
-        <div style="margin: 15px 0; padding: 12px; background: rgba(30, 41, 59, 0.5); border-radius: 8px;">
-            <div style="color: var(--text-secondary); font-size: 12px; margin-bottom: 5px;">
-                Current Request Status for {selected_process}:
-            </div>
-            <div style="display: flex; flex-wrap: wrap; gap: 5px;">
-        """, unsafe_allow_html=True)
-        
-        requested_resources = []
-        for j in range(st.session_state.num_resources):
-            current_value = st.session_state.request[pid][j]
-            resource_name = RESOURCE_NAMES[j % len(RESOURCE_NAMES)]
-            if current_value == 1:
-                requested_resources.append(resource_name)
-        
-        if requested_resources:
-            for resource in requested_resources:
-                st.markdown(f'<div style="background: rgba(245, 158, 11, 0.2); color: var(--warning); padding: 4px 8px; border-radius: 4px; font-size: 11px;">{resource}: ↑</div>', unsafe_allow_html=True)
-        else:
-            st.markdown('<div style="color: var(--text-secondary); font-size: 11px;">No resources requested</div>', unsafe_allow_html=True)
-        
-        st.markdown("</div></div>", unsafe_allow_html=True)
+        # Toggles and local widgets rerun only this fragment, committed updates rerun the app
+        render_request_simulation()
         
         st.markdown("</div>", unsafe_allow_html=True)
 
@@ -1833,13 +1586,10 @@ with col3:
             </div>
         """, unsafe_allow_html=True)
         
-        # First, check current deadlock status
-        detector = DeadlockDetectorSingleInstance(st.session_state.num_processes, st.session_state.num_resources)
-        deadlocked = detector.detect_deadlock(
-            st.session_state.allocation,
-            st.session_state.request,
-            st.session_state.available
-        )
+        # First, check current deadlock status (only changed cells are re-evaluated)
+        with timed_phase("Detection"):
+            detector = DeadlockDetectorSingleInstance(st.session_state.num_processes, st.session_state.num_resources)
+            deadlocked = get_incremental_detector().deadlocked()
         
         if deadlocked:
             st.warning(f"""
@@ -1853,15 +1603,15 @@ with col3:
             
             with col_a:
                 if st.button("Process Termination", use_container_width=True, key="terminate_btn"):
-                    with st.spinner("Terminating process to recover..."):
-                        time.sleep(1)
-                        
+                    with st.spinner("Terminating process to recover..."), timed_phase("Recovery"):
                         new_allocation, new_request, new_available, terminated = detector.recover_by_process_termination(
                             deadlocked,
                             st.session_state.allocation,
                             st.session_state.request,
                             st.session_state.available
                         )
+                        for pid in terminated:
+                            note_process(pid)
                         
                         # Update system state
                         st.session_state.allocation = new_allocation
@@ -1871,6 +1621,9 @@ with col3:
                         # Update process status
                         if terminated:
                             pid = terminated[0]
+                            get_incremental_detector().terminate(pid)
+                            release_held_resources(pid)
+                            sync_admission_controller(terminated=pid)
                             st.session_state.process_status[pid] = "Terminated"
                             # Mark as resolved in history
                             if st.session_state.deadlock_history:
@@ -1878,19 +1631,21 @@ with col3:
                             
                             st.session_state.message_terminate = f"Process {PROCESS_NAMES[pid % len(PROCESS_NAMES)]} terminated. Resources released."
                         
+                        commit_event("Process termination")
                         st.rerun()
             
             with col_b:
                 if st.button("Resource Preemption", use_container_width=True, key="preempt_btn"):
-                    with st.spinner("Preempting resource..."):
-                        time.sleep(1)
-                        
+                    with st.spinner("Preempting resource..."), timed_phase("Recovery"):
                         new_allocation, new_request, new_available, preempted = detector.recover_by_resource_preemption(
                             deadlocked,
                             st.session_state.allocation,
                             st.session_state.request,
-                            st.session_state.available
+                            st.session_state.available,
+                            get_holder_index()
                         )
+                        for pid, _ in preempted:
+                            note_process(pid)
                         
                         # Update system state
                         st.session_state.allocation = new_allocation
@@ -1900,6 +1655,9 @@ with col3:
                         # Update process status
                         if preempted:
                             pid, resource = preempted[0]
+                            get_incremental_detector().preempt(pid, resource)
+                            get_holder_index()[resource] = -1
+                            sync_admission_controller()
                             st.session_state.process_status[pid] = "Waiting"
                             # Mark as resolved in history
                             if st.session_state.deadlock_history:
@@ -1907,13 +1665,98 @@ with col3:
                             
                             st.session_state.message_preempt = f"Resource {RESOURCE_NAMES[resource % len(RESOURCE_NAMES)]} preempted from {PROCESS_NAMES[pid % len(PROCESS_NAMES)]}"
                         
+                        commit_event("Resource preemption")
                         st.rerun()
             
+            if st.button("Minimum-Cost Termination", use_container_width=True, key="min_terminate_btn"):
+                with st.spinner("Planning minimum set of processes to terminate..."), timed_phase("Recovery"):
+                    new_allocation, new_request, new_available, terminated = detector.recover_by_minimum_termination(
+                        deadlocked,
+                        st.session_state.allocation,
+                        st.session_state.request,
+                        st.session_state.available
+                    )
+                    for pid in terminated:
+                        note_process(pid)
+                    
+                    # Update system state
+                    st.session_state.allocation = new_allocation
+                    st.session_state.request = new_request
+                    st.session_state.available = new_available
+                    
+                    # Update process status of every victim
+                    for pid in terminated:
+                        get_incremental_detector().terminate(pid)
+                        release_held_resources(pid)
+                        sync_admission_controller(terminated=pid)
+                        st.session_state.process_status[pid] = "Terminated"
+                    
+                    if terminated:
+                        # Mark as resolved in history
+                        if st.session_state.deadlock_history:
+                            st.session_state.deadlock_history[-1]['resolved'] = True
+                        
+                        names = format_process_list(terminated)
+                        st.session_state.message_terminate = f"Processes {names} terminated ({len(terminated)} of {len(deadlocked)} deadlocked). Resources released."
+                    
+                    commit_event("Minimum-cost termination")
+                    st.rerun()
+            
+            # Repeat one strategy until the system is deadlock-free
+            fixpoint_strategy = st.radio(
+                "Recover until deadlock-free using",
+                ["Termination", "Preemption"],
+                horizontal=True,
+                key="fixpoint_strategy"
+            )
+            if st.button("Recover Until Deadlock-Free", use_container_width=True, key="fixpoint_btn"):
+                with st.spinner("Recovering until deadlock-free..."), timed_phase("Recovery"):
+                    # Victims are picked and detection is updated incrementally after every action
+                    log = get_incremental_detector().recover_until_deadlock_free(fixpoint_strategy.lower())
+                    
+                    # Apply the same actions to the session matrices
+                    for entry in log:
+                        note_process(entry["process"])
+                    for entry in log:
+                        pid, resource = entry["process"], entry["resource"]
+                        if entry["action"] == "terminate":
+                            for j in range(st.session_state.num_resources):
+                                if st.session_state.allocation[pid][j] == 1:
+                                    st.session_state.available[j] = 1
+                                    st.session_state.allocation[pid][j] = 0
+                                st.session_state.request[pid][j] = 0
+                            release_held_resources(pid)
+                            st.session_state.process_status[pid] = "Terminated"
+                            if st.session_state.admission_controller is not None:
+                                st.session_state.admission_controller.cancel(pid)
+                        else:
+                            st.session_state.allocation[pid][resource] = 0
+                            st.session_state.request[pid][resource] = 1
+                            st.session_state.available[resource] = 1
+                            get_holder_index()[resource] = -1
+                            st.session_state.process_status[pid] = "Waiting"
+                    sync_admission_controller()
+                    
+                    st.session_state.recovery_log = log
+                    remaining = get_incremental_detector().deadlocked()
+                    if not remaining and st.session_state.deadlock_history:
+                        st.session_state.deadlock_history[-1]['resolved'] = True
+                    
+                    if remaining:
+                        st.session_state.message_cycle = f"{len(log)} recovery action(s) applied, {len(remaining)} process(es) still deadlocked ({fixpoint_strategy.lower()} can't resolve the rest)"
+                    else:
+                        st.session_state.message_cycle = f"Deadlock resolved with {len(log)} recovery action(s)"
+                    
+                    commit_event(f"Recover until deadlock-free ({fixpoint_strategy.lower()})")
+                    st.rerun()
+            
             st.markdown("""
             <div class="info-box">
                 <strong>Recovery Methods:</strong><br>
                 1. <strong>Process Termination</strong>: Kill process to release its single instance resources<br>
-                2. <strong>Resource Preemption</strong>: Take single resource from holder and make available
+                2. <strong>Resource Preemption</strong>: Take single resource from holder and make available<br>
+                3. <strong>Minimum-Cost Termination</strong>: Kill the fewest processes that break every wait-for cycle<br>
+                4. <strong>Recover Until Deadlock-Free</strong>: Repeat one method until no process is deadlocked
             </div>
             """, unsafe_allow_html=True)
         else:
@@ -1943,6 +1786,21 @@ with col3:
             </div>
             """, unsafe_allow_html=True)
         
+        # Action log of the last recover-until-deadlock-free run
+        if st.session_state.recovery_log:
+            with st.expander(f"Recovery Action Log ({len(st.session_state.recovery_log)} actions)"):
+                log_rows = []
+                for step, entry in enumerate(st.session_state.recovery_log, start=1):
+                    resource = entry["resource"]
+                    log_rows.append({
+                        "Step": step,
+                        "Action": entry["action"].capitalize(),
+                        "Process": PROCESS_NAMES[entry["process"] % len(PROCESS_NAMES)],
+                        "Resource": RESOURCE_NAMES[resource % len(RESOURCE_NAMES)] if resource is not None else "-",
+                        "Still Deadlocked": entry["deadlocked"]
+                    })
+                st.dataframe(pd.DataFrame(log_rows), use_container_width=True, hide_index=True)
+        
         st.markdown("</div>", unsafe_allow_html=True)
         
         # System Operations Card
@@ -1957,16 +1815,10 @@ with col3:
         
         with col_x:
             if st.button("Run Complete Cycle", use_container_width=True, key="complete_cycle"):
-                with st.spinner("Running detection-recovery cycle..."):
-                    time.sleep(1)
-                    
+                with st.spinner("Running detection-recovery cycle..."), timed_phase("Recovery"):
                     # Step 1: Detect
                     detector = DeadlockDetectorSingleInstance(st.session_state.num_processes, st.session_state.num_resources)
-                    deadlocked = detector.detect_deadlock(
-                        st.session_state.allocation,
-                        st.session_state.request,
-                        st.session_state.available
-                    )
+                    deadlocked = get_incremental_detector().deadlocked()
                     
                     if deadlocked:
                         # Step 2: Auto-recover
@@ -1979,12 +1831,17 @@ with col3:
                                 st.session_state.request,
                                 st.session_state.available
                             )
+                            for pid in terminated:
+                                note_process(pid)
                             st.session_state.allocation = new_allocation
                             st.session_state.request = new_request
                             st.session_state.available = new_available
                             
                             if terminated:
                                 pid = terminated[0]
+                                get_incremental_detector().terminate(pid)
+                                release_held_resources(pid)
+                                sync_admission_controller(terminated=pid)
                                 st.session_state.process_status[pid] = "Terminated"
                                 st.session_state.message_cycle = f"Auto-recovery: {PROCESS_NAMES[pid % len(PROCESS_NAMES)]} terminated"
                         
@@ -1993,31 +1850,44 @@ with col3:
                                 deadlocked,
                                 st.session_state.allocation,
                                 st.session_state.request,
-                                st.session_state.available
+                                st.session_state.available,
+                                get_holder_index()
                             )
+                            for pid, _ in preempted:
+                                note_process(pid)
                             st.session_state.allocation = new_allocation
                             st.session_state.request = new_request
                             st.session_state.available = new_available
                             
                             if preempted:
                                 pid, resource = preempted[0]
+                                get_incremental_detector().preempt(pid, resource)
+                                get_holder_index()[resource] = -1
+                                sync_admission_controller()
                                 st.session_state.process_status[pid] = "Waiting"
                                 st.session_state.message_cycle = f"Auto-recovery: {RESOURCE_NAMES[resource % len(RESOURCE_NAMES)]} preempted"
                         
                     else:
                         st.session_state.message_cycle = "System verified as deadlock-free."
                     
+                    commit_event("Complete cycle")
                     st.rerun()
         
         with col_y:
             if st.button("Reset All Requests", use_container_width=True, key="reset_requests"):
-                with st.spinner("Resetting requests..."):
-                    time.sleep(0.5)
-                    
+                with st.spinner("Resetting requests..."), timed_phase("Reset Requests"):
                     # Reset request matrix (0/1 only)
                     n = st.session_state.num_processes
                     m = st.session_state.num_resources
-                    st.session_state.request = np.random.randint(0, 2, (n, m)).tolist()
+                    note_request_matrix()
+                    note_all_statuses()
+                    st.session_state.request = generate_requests(n, m)
+                    st.session_state.admission_controller = None
+                    get_incremental_detector().load(
+                        st.session_state.allocation,
+                        st.session_state.request,
+                        st.session_state.available
+                    )
                     
                     # Reset toggle states
                     for pid in range(n):
@@ -2029,6 +1899,7 @@ with col3:
                     
                     st.session_state.message_reset = "All requests have been reset to random values"
                     
+                    commit_event("Reset requests")
                     st.rerun()
         
         # Show operation messages if exist
@@ -2066,8 +1937,7 @@ with col3:
                 status_icon = "✓" if history['resolved'] else "✗"
                 status_text = "Resolved" if history['resolved'] else "Pending"
                 
-                process_names = [PROCESS_NAMES[pid % len(PROCESS_NAMES)] for pid in history['processes']]
-                process_list = ", ".join(process_names)
+                process_list = format_process_list(history['processes'])
                 
                 st.markdown(f"""
                 <div class="request-item {'granted' if history['resolved'] else 'denied'}">
@@ -2095,6 +1965,60 @@ with col3:
                 """, unsafe_allow_html=True)
             
             st.markdown("</div>", unsafe_allow_html=True)
+        
+        # Action History Card (undo/redo over the event log)
+        event_log = get_event_log()
+        st.markdown(f"""
+        <div class="tech-card">
+            <div class="tech-card-title">
+                Action History
+            </div>
+            <div style="color: var(--text-secondary); font-size: 12px; margin-bottom: 10px;">
+                Step {event_log.position} of {event_log.last_step}
+                ({event_log.last_step - event_log.first_step} recorded actions)
+            </div>
+        """, unsafe_allow_html=True)
+        
+        col_undo, col_redo = st.columns(2)
+        with col_undo:
+            if st.button("Undo", use_container_width=True, key="undo_btn", disabled=not event_log.can_undo()):
+                with timed_phase("Undo/Redo"):
+                    apply_logged_changes(None, event_log.undo())
+                st.rerun()
+        with col_redo:
+            if st.button("Redo", use_container_width=True, key="redo_btn", disabled=not event_log.can_redo()):
+                with timed_phase("Undo/Redo"):
+                    apply_logged_changes(None, event_log.redo())
+                st.rerun()
+        
+        if event_log.last_step > event_log.first_step:
+            target_step = st.number_input(
+                "Jump to step",
+                min_value=event_log.first_step,
+                max_value=event_log.last_step,
+                value=event_log.position,
+                key=f"jump_step_{event_log.position}"
+            )
+            if st.button("Jump", use_container_width=True, key="jump_btn", disabled=target_step == event_log.position):
+                with timed_phase("Undo/Redo"):
+                    apply_logged_changes(*event_log.jump(target_step))
+                st.rerun()
+            
+            # Most recent actions, the current step highlighted
+            for step, label in reversed(event_log.labels(event_log.last_step - 5)):
+                current = step == event_log.position
+                st.markdown(f"""
+                <div style="font-size: 12px; padding: 4px 8px; border-radius: 4px;
+                          color: {'var(--accent-blue)' if current else 'var(--text-secondary)'} !important;
+                          background: {'rgba(56, 189, 248, 0.1)' if current else 'transparent'};">
+                    {step}. {label}{' (current)' if current else ''}
+                </div>
+                """, unsafe_allow_html=True)
+        
+        st.markdown("</div>", unsafe_allow_html=True)
+
+# Performance panel (filled in once every phase of this rerun was timed)
+performance_panel = st.empty()
 
 # Footer
 st.markdown("""
@@ -2134,4 +2058,9 @@ if not st.session_state.system_initialized:
                 Set processes & resources, then click "Initialize System"
             </div>
         </div>
-        """, unsafe_allow_html=True)
\ No newline at end of file
+        """, unsafe_allow_html=True)
+
+# Close the timing record of this rerun and show the performance panel
+finish_rerun()
+with performance_panel.container():
+    render_performance_panel()
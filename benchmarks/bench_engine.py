@@ -0,0 +1,328 @@
+"""
+Benchmark suite for the deadlock engine
+
+Sweeps problem size (n, m), density and graph shape (random, ring, chain, star,
+standing) and records wall time, peak traced memory and net allocated blocks for
+detection, cycle finding and both recovery strategies on every backend, and for
+streaming lock events through a DeadlockMonitor loaded with the system and for
+extra waits between the system's own processes (inside its deadlocks on the ring
+and standing shapes).
+
+Usage:
+    python -m benchmarks.bench_engine --save benchmarks/baseline.json
+    python -m benchmarks.bench_engine --compare benchmarks/baseline.json
+"""
+
+import argparse
+import gc
+import json
+import platform
+import statistics
+import tempfile
+import time
+import tracemalloc
+
+import numpy as np
+
+from deadlock_engine import (
+    DeadlockDetectorSingleInstance,
+    DeadlockMonitor,
+    IncrementalDeadlockDetector,
+    MappedSystemState,
+    PackedSystemState,
+    SparseSystemState,
+)
+
+SHAPES = ("random", "ring", "chain", "star", "standing")
+
+# Lock events streamed through the monitor per measured run
+MONITOR_ROUNDS = 200
+
+
+def generate_case(shape, n, m, density, seed=0):
+    """
+    Build a SINGLE INSTANCE system of the given shape
+    random: each resource held by a random process with probability density, random requests
+    ring:   process i holds resource i and requests resource i+1 (one cycle over k = min(n, m))
+    chain:  like ring but the last process requests nothing (no deadlock, k detection rounds)
+    star:   process 0 holds resource 0 and requests all others, every holder requests resource 0
+    standing: k // 2 separate deadlocks, processes 2i and 2i+1 each request what the other holds
+    Returns boolean allocation, request and available arrays
+    """
+    allocation = np.zeros((n, m), dtype=bool)
+    request = np.zeros((n, m), dtype=bool)
+    k = min(n, m)
+
+    if shape == "random":
+        rng = np.random.default_rng(seed)
+        held = rng.random(m) < density
+        allocation[rng.integers(0, n, m)[held], np.flatnonzero(held)] = True
+        request = (rng.random((n, m)) < density) & ~allocation
+    elif shape in ("ring", "chain"):
+        allocation[np.arange(k), np.arange(k)] = True
+        request[np.arange(k), (np.arange(k) + 1) % k] = True
+        if shape == "chain":
+            request[k - 1] = False
+    elif shape == "star":
+        allocation[np.arange(k), np.arange(k)] = True
+        request[0, 1:k] = True
+        request[1:k, 0] = True
+    elif shape == "standing":
+        pairs = np.arange(k - k % 2)
+        allocation[pairs, pairs] = True
+        request[pairs, pairs ^ 1] = True
+    else:
+        raise ValueError(f"unknown shape {shape!r}")
+
+    available = ~allocation.any(axis=0)
+    return allocation, request, available
+
+
+def build_operations(allocation, request, available, directory=None):
+    """
+    Returns {(function, backend): callable} for one system
+    Input conversion is done up front so only the operation itself is measured
+    directory is an empty directory for the disk-backed state (no mapped backend without it)
+    """
+    n, m = allocation.shape
+    detector = DeadlockDetectorSingleInstance(n, m)
+
+    alloc_list = allocation.astype(int).tolist()
+    request_list = request.astype(int).tolist()
+    available_list = available.astype(int).tolist()
+    packed = PackedSystemState.from_matrices(allocation, request, available)
+    holder = detector.build_holder_index(allocation)
+    deadlocked = detector.detect_deadlock_vectorized(allocation, request, available)
+    incremental = IncrementalDeadlockDetector(allocation, request, available)
+    sparse = SparseSystemState.from_matrices(allocation, request, available)
+
+    monitor = load_monitor(allocation, request)
+    events = monitor_events(MONITOR_ROUNDS)
+    waits = wait_pairs(len(monitor.graph), MONITOR_ROUNDS)
+
+    operations = {
+        # detect_deadlock converts the lists and runs the vectorized engine
+        ("detect_deadlock", "dispatch_lists"): lambda: detector.detect_deadlock(
+            alloc_list, request_list, available_list
+        ),
+        ("detect_deadlock", "numpy"): lambda: detector.detect_deadlock_vectorized(allocation, request, available),
+        ("detect_deadlock", "packed"): lambda: detector.detect_deadlock_packed(packed),
+        ("detect_deadlock", "sparse"): lambda: detector.detect_deadlock_sparse(sparse),
+        ("detect_deadlock", "incremental_load"): lambda: IncrementalDeadlockDetector(allocation, request, available),
+        ("detect_deadlock", "incremental_update"): lambda: (
+            incremental.set_request(0, 0, 1), incremental.set_request(0, 0, 0), incremental.deadlocked()
+        ),
+        ("find_deadlock_cycle", "list"): lambda: detector.find_deadlock_cycle(request_list, alloc_list),
+        ("find_deadlock_cycle", "holder_index"): lambda: detector.find_deadlock_cycle(request, None, holder),
+        ("find_deadlock_components", "holder_index"): lambda: detector.find_deadlock_components(
+            request, None, deadlocked, holder
+        ),
+        ("recover_by_process_termination", "list"): lambda: detector.recover_by_process_termination(
+            deadlocked, alloc_list, request_list, available_list
+        ),
+        ("recover_by_resource_preemption", "list"): lambda: detector.recover_by_resource_preemption(
+            deadlocked, alloc_list, request_list, available_list
+        ),
+        ("recover_by_resource_preemption", "holder_index"): lambda: detector.recover_by_resource_preemption(
+            deadlocked, alloc_list, request_list, available_list, holder
+        ),
+        ("monitor_events", "dynamic_graph"): lambda: monitor.handle_events(events),
+        ("wait_for_edges", "dynamic_graph"): lambda: add_and_remove_edges(monitor.graph, waits),
+    }
+    if directory is not None:
+        mapped = MappedSystemState.from_matrices(directory, allocation, request, available)
+        operations[("detect_deadlock", "mapped")] = lambda: detector.detect_deadlock_mapped(mapped)
+    return operations
+
+
+def load_monitor(allocation, request):
+    """Returns a DeadlockMonitor holding the system's state (process i, resource r by index)"""
+    monitor = DeadlockMonitor()
+    for process, resource in zip(*np.nonzero(allocation)):
+        monitor.acquire(monitor.process(int(process)), monitor.resource(int(resource)))
+    for process, resource in zip(*np.nonzero(request)):
+        monitor.request(monitor.process(int(process)), monitor.resource(int(resource)))
+    return monitor
+
+
+def monitor_events(rounds, seed=0):
+    """
+    Contended lock traffic of extra processes, separate from the loaded system
+    Each round one process takes a lock, another one waits for it and gets it, so every
+    round inserts and deletes a wait-for edge. The monitor's state is the same afterwards
+    Returns list of event dicts
+    """
+    rng = np.random.default_rng(seed)
+    events = []
+    for i, (first, second) in enumerate(rng.integers(0, 64, (rounds, 2))):
+        holder, waiter, lock = f"worker-{first}", f"worker-{64 + second}", f"lock-{i % 16}"
+        events += [
+            {"event": "acquire", "process": holder, "resource": lock},
+            {"event": "request", "process": waiter, "resource": lock},
+            {"event": "release", "process": holder, "resource": lock},
+            {"event": "acquire", "process": waiter, "resource": lock},
+            {"event": "release", "process": waiter, "resource": lock},
+        ]
+    return events
+
+
+def wait_pairs(num_nodes, rounds, seed=0):
+    """Returns rounds random (waiter, holder) node pairs of a graph ([] without nodes)"""
+    if not num_nodes:
+        return []
+    return np.random.default_rng(seed).integers(0, num_nodes, (rounds, 2)).tolist()
+
+
+def add_and_remove_edges(graph, pairs):
+    """Add and remove one wait-for edge per pair; the graph has the same edges afterwards"""
+    for u, v in pairs:
+        graph.insert_edge(u, v)
+        graph.delete_edge(u, v)
+
+
+def measure(operation, repeat):
+    """
+    Time an operation, then run it once more under tracemalloc
+    Returns dict with wall times, peak traced bytes and net allocated blocks
+    """
+    times = []
+    for _ in range(repeat):
+        gc.collect()
+        start = time.perf_counter()
+        operation()
+        times.append(time.perf_counter() - start)
+
+    gc.collect()
+    tracemalloc.start()
+    before = tracemalloc.take_snapshot()
+    result = operation()
+    after = tracemalloc.take_snapshot()
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    del result
+
+    net_blocks = sum(stat.count_diff for stat in after.compare_to(before, "filename"))
+    return {
+        "min_s": min(times),
+        "median_s": statistics.median(times),
+        "peak_bytes": peak,
+        "net_blocks": net_blocks,
+    }
+
+
+def iter_cases(processes, resources, densities, shapes):
+    """Yield (shape, n, m, density) for the sweep; density only matters for random systems"""
+    for shape in shapes:
+        for n in processes:
+            for m in resources:
+                for density in (densities if shape == "random" else [None]):
+                    yield shape, n, m, density
+
+
+def run_suite(processes, resources, densities, shapes, repeat=5, max_cells=2_000_000, backends=None):
+    """
+    Run every operation/backend over the sweep
+    Systems with more than max_cells matrix cells are skipped for the list backends
+    Returns list of result records
+    """
+    records = []
+    for shape, n, m, density in iter_cases(processes, resources, densities, shapes):
+        allocation, request, available = generate_case(shape, n, m, density or 0.0)
+        with tempfile.TemporaryDirectory(prefix="bench-mapped-") as directory:
+            operations = build_operations(allocation, request, available, directory)
+            for (function, backend), operation in operations.items():
+                if backends and backend not in backends:
+                    continue
+                if backend in ("list", "dispatch_lists") and n * m > max_cells:
+                    continue
+                record = {
+                    "function": function,
+                    "backend": backend,
+                    "shape": shape,
+                    "n": n,
+                    "m": m,
+                    "density": density,
+                }
+                record.update(measure(operation, repeat))
+                records.append(record)
+                print(f"{function:<32} {backend:<18} {shape:<6} n={n:<6} m={m:<6} "
+                      f"density={density!s:<5} {record['median_s'] * 1e3:10.3f} ms "
+                      f"{record['peak_bytes'] / 1024:10.1f} KiB")
+    return records
+
+
+def record_key(record):
+    return (record["function"], record["backend"], record["shape"], record["n"], record["m"], record["density"])
+
+
+def save_results(records, path):
+    payload = {
+        "created": time.strftime("%Y-%m-%d %H:%M:%S"),
+        "python": platform.python_version(),
+        "numpy": np.__version__,
+        "machine": platform.machine(),
+        "records": records,
+    }
+    with open(path, "w") as f:
+        json.dump(payload, f, indent=2)
+
+
+def compare_results(baseline_path, records, threshold=1.2):
+    """
+    Compare records against a saved baseline
+    Returns list of (key, baseline median, current median) for regressions above threshold
+    """
+    with open(baseline_path) as f:
+        baseline = {record_key(record): record for record in json.load(f)["records"]}
+
+    regressions = []
+    for record in records:
+        old = baseline.get(record_key(record))
+        if old is None:
+            continue
+        ratio = record["median_s"] / old["median_s"] if old["median_s"] else float("inf")
+        marker = "REGRESSION" if ratio > threshold else ("faster" if ratio < 1 / threshold else "")
+        print(f"{' '.join(map(str, record_key(record))):<70} {ratio:6.2f}x {marker}")
+        if ratio > threshold:
+            regressions.append((record_key(record), old["median_s"], record["median_s"]))
+    return regressions
+
+
+def _int_list(value):
+    return [int(v) for v in value.split(",")]
+
+
+def _float_list(value):
+    return [float(v) for v in value.split(",")]
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Deadlock engine benchmark suite")
+    parser.add_argument("--processes", type=_int_list, default=[10, 100, 1000])
+    parser.add_argument("--resources", type=_int_list, default=[8, 64, 512])
+    parser.add_argument("--density", type=_float_list, default=[0.01, 0.1])
+    parser.add_argument("--shapes", type=lambda v: v.split(","), default=list(SHAPES))
+    parser.add_argument("--backends", type=lambda v: v.split(","), default=None)
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument("--save", help="write results as a baseline JSON file")
+    parser.add_argument("--compare", help="compare results with a baseline JSON file")
+    parser.add_argument("--threshold", type=float, default=1.2, help="slowdown ratio reported as regression")
+    args = parser.parse_args(argv)
+
+    records = run_suite(args.processes, args.resources, args.density, args.shapes, args.repeat,
+                        backends=args.backends)
+
+    if args.save:
+        save_results(records, args.save)
+        print(f"Saved {len(records)} results to {args.save}")
+
+    if args.compare:
+        regressions = compare_results(args.compare, records, args.threshold)
+        if regressions:
+            print(f"{len(regressions)} regression(s) above {args.threshold}x")
+            return 1
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
@@ -0,0 +1,44 @@
+"""
+Headless deadlock detection & recovery engine for SINGLE INSTANCE resources
+
+Nothing here imports Streamlit or pandas. Submodules are only loaded when one
+of the exported names is first used, so importing the package itself is cheap.
+"""
+
+import importlib
+
+_EXPORTS = {
+    "BankersAdmissionController": "avoidance",
+    "DeadlockDetectorSingleInstance": "detector",
+    "DeadlockDetectorMultiInstance": "multi_instance",
+    "DeadlockMonitor": "stream",
+    "DynamicWaitForGraph": "dynamic",
+    "EventLog": "history",
+    "IncrementalDeadlockDetector": "incremental",
+    "LockWatcher": "locks",
+    "MappedSystemState": "mapped",
+    "PackedSystemState": "packed",
+    "SavedState": "storage",
+    "SparseSystemState": "sparse",
+    "TaskWatcher": "aio",
+    "generate_system": "state",
+    "generate_requests": "state",
+    "generate_multi_instance_system": "state",
+    "run_sweep": "montecarlo",
+    "save_state": "storage",
+    "load_state": "storage",
+}
+
+__all__ = list(_EXPORTS)
+
+
+def __getattr__(name):
+    if name not in _EXPORTS:
+        raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+    value = getattr(importlib.import_module(f".{_EXPORTS[name]}", __name__), name)
+    globals()[name] = value
+    return value
+
+
+def __dir__():
+    return sorted(set(globals()) | set(__all__))
@@ -0,0 +1,344 @@
+"""
+Deadlock detection for asyncio tasks
+
+Drop-in replacements for asyncio.Lock, Semaphore and Event that record which task
+holds and which task awaits them. Tasks are the processes and primitives the SINGLE
+INSTANCE resources of the detector's model; a semaphore can have several holders and
+is free again as soon as any of them finishes.
+
+An Event has no holder unless a task claims it (event.claim()): the task that is
+going to set it. Waiting for an unclaimed event never counts as waiting for a task.
+
+Only the public asyncio API is used. An acquire marks its task as waiting around
+the awaited super().acquire(); an uncontended one returns within the same step of
+the task, so its mark is gone before anything else runs. A TaskWatcher callback
+samples the marks every interval on the loop itself, so the sample is consistent,
+and runs DeadlockDetectorSingleInstance only when a waited-for primitive is held by
+a task that is waiting too. Uncontended semaphore acquires only record their holder
+while a watcher is running.
+
+A task awaiting another task waits for it. asyncio only exposes the awaited future
+as the CPython attribute Task._fut_waiter, so TaskWatcher.start() (and install())
+raise RuntimeError on a Python without it rather than miss those deadlocks.
+
+Usage:
+    from deadlock_engine import aio
+
+    async def main():
+        watcher = aio.install(interval=1.0, on_deadlock=print)   # patches asyncio
+        ...
+        aio.uninstall()
+"""
+
+import asyncio
+import time
+import weakref
+
+from .detector import DeadlockDetectorSingleInstance
+from .locks import _label
+from .sparse import SparseSystemState
+
+# Originals, restored by uninstall()
+_ORIGINALS = {"Lock": asyncio.Lock, "Semaphore": asyncio.Semaphore, "Event": asyncio.Event}
+
+# task -> (primitive, monotonic start) while the task has to wait
+_waiting = {}
+
+# Number of running TaskWatchers; without one only semaphore acquires that had to wait record their holder
+_armed = 0
+
+# The future a task awaits, needed to follow awaited tasks (CPython 3.8 to 3.13 at least)
+_TASK_AWAITS = hasattr(asyncio.Task, "_fut_waiter")
+
+
+async def _wait(task, primitive, wait):
+    """Await wait() with the task marked as waiting for primitive"""
+    token = _waiting[task] = (primitive, time.monotonic())
+    try:
+        return await wait()
+    finally:
+        if _waiting.get(task) is token:
+            del _waiting[task]
+
+
+class Lock(asyncio.Lock):
+    """asyncio.Lock that records its holder"""
+    def __init__(self, name=None):
+        super().__init__()
+        self._owner = None
+        self.label = _label("Lock", name)
+
+    async def acquire(self):
+        # A free lock can still make the task wait behind a woken waiter, so always mark
+        task = asyncio.current_task()
+        token = _waiting[task] = (self, time.monotonic())
+        try:
+            await super().acquire()
+        finally:
+            if _waiting.get(task) is token:
+                del _waiting[task]
+        self._owner = task
+        return True
+
+    def release(self):
+        super().release()
+        self._owner = None
+
+    def _holders(self):
+        return () if self._owner is None else (self._owner,)
+
+
+class Semaphore(asyncio.Semaphore):
+    """
+    asyncio.Semaphore that records its holders (tasks with unreleased acquires)
+    A release from a task that holds nothing while a watcher runs can't be matched to a
+    holder, so the semaphore stops reporting holders from then on rather than report
+    wrong ones. A release outside a running loop adds a permit nobody held
+    """
+    def __init__(self, value=1, name=None):
+        super().__init__(value)
+        # Finished tasks drop out with their last reference
+        self._holding = weakref.WeakKeyDictionary()
+        self._recorded = False
+        self.label = _label("Semaphore", name)
+
+    async def acquire(self):
+        if self.locked():
+            task = asyncio.current_task()
+            await _wait(task, self, super().acquire)
+        else:
+            # acquire() doesn't wait when locked() is False
+            await super().acquire()
+            if not _armed:
+                return True
+            task = asyncio.current_task()
+        holding = self._holding
+        if holding is not None:
+            holding[task] = holding.get(task, 0) + 1
+            self._recorded = True
+        return True
+
+    def release(self):
+        if _armed or self._recorded:
+            self._release_holder()
+        super().release()
+
+    def _release_holder(self):
+        """Drop one acquire of the releasing task from the holders"""
+        holding = self._holding
+        if holding is None:
+            return
+        task = _current_task()
+        count = holding.get(task) if task is not None else None
+        if count is None:
+            if _armed and task is not None:
+                self._holding = None
+        elif count > 1:
+            holding[task] = count - 1
+        else:
+            del holding[task]
+
+    def _holders(self):
+        if self._holding is None:
+            return ()
+        return tuple(task for task in list(self._holding) if not task.done())
+
+
+class Event(asyncio.Event):
+    """asyncio.Event whose waiters wait for the task that claimed it (if any)"""
+    def __init__(self, name=None):
+        super().__init__()
+        self._owner = None
+        self.label = _label("Event", name)
+
+    def claim(self, task=None):
+        """Declare the task that is going to set the event (default: the current task)"""
+        self._owner = task or asyncio.current_task()
+
+    async def wait(self):
+        if self.is_set():
+            return True
+        return await _wait(asyncio.current_task(), self, super().wait)
+
+    def set(self):
+        self._owner = None
+        super().set()
+
+    def _holders(self):
+        return () if self._owner is None else (self._owner,)
+
+
+class TaskWatcher:
+    """
+    Periodic deadlock check of the tasks of one event loop
+    The check is a plain loop.call_later callback: it costs a pass over the waiting
+    tasks, and the detector only runs when a waited-for primitive is held by a waiting
+    task. Every new deadlock is passed to on_deadlock(report)
+    """
+    def __init__(self, loop=None, interval=1.0, on_deadlock=None):
+        self.loop = loop
+        self.interval = interval
+        self.on_deadlock = on_deadlock
+        self.deadlocks = []
+        self._reported = frozenset()
+        self._handle = None
+
+    def start(self):
+        global _armed
+        if not _TASK_AWAITS:
+            raise RuntimeError("asyncio.Task has no _fut_waiter on this Python: awaited tasks can't be followed")
+        if self.loop is None:
+            self.loop = asyncio.get_running_loop()
+        if self._handle is None:
+            _armed += 1
+        self._handle = self.loop.call_later(self.interval, self._tick)
+        return self
+
+    def stop(self):
+        global _armed
+        if self._handle is not None:
+            self._handle.cancel()
+            self._handle = None
+            _armed -= 1
+
+    def _tick(self):
+        self._handle = self.loop.call_later(self.interval, self._tick)
+        self.poll()
+
+    def poll(self):
+        """
+        Check the waiting tasks of the loop (call from the loop's thread)
+        Returns the new deadlock report or None
+        """
+        loop = self.loop
+        waits = {task: wait for task, wait in list(_waiting.items()) if task.get_loop() is loop and not task.done()}
+
+        # A holder awaiting another task (await task) waits for that task
+        holders = [holder for resource, _ in waits.values() for holder in _holders(resource)]
+        candidate = False
+        while holders:
+            holder = holders.pop()
+            if holder in waits:
+                candidate = True
+                continue
+            awaited = holder._fut_waiter
+            if isinstance(awaited, asyncio.Task) and not awaited.done():
+                waits[holder] = (awaited, None)
+                holders.append(awaited)
+
+        # A cycle needs a waiting task holding what another one waits for
+        if not candidate:
+            self._reported = frozenset()
+            return None
+
+        deadlocked = self._detect(waits)
+        if deadlocked == self._reported:
+            return None
+        self._reported = deadlocked
+        if not deadlocked:
+            return None
+
+        report = self._report(waits, deadlocked)
+        self.deadlocks.append(report)
+        if self.on_deadlock is not None:
+            self.on_deadlock(report)
+        return report
+
+    def _detect(self, waits):
+        """Returns frozenset of deadlocked tasks among the waiting ones"""
+        tasks = {}
+        primitives = {}
+        requested = ([], [])
+        allocated = ([], [])
+        for task, (primitive, _) in waits.items():
+            pid = tasks.setdefault(task, len(tasks))
+            if primitive not in primitives:
+                rid = primitives[primitive] = len(primitives)
+                for holder in _holders(primitive):
+                    allocated[0].append(tasks.setdefault(holder, len(tasks)))
+                    allocated[1].append(rid)
+            requested[0].append(pid)
+            requested[1].append(primitives[primitive])
+
+        state = SparseSystemState.from_pairs(len(tasks), len(primitives), allocated, requested)
+        detector = DeadlockDetectorSingleInstance(len(tasks), len(primitives))
+        found = set(detector.detect_deadlock(state))
+        return frozenset(task for task, pid in tasks.items() if pid in found)
+
+    def _report(self, waits, deadlocked):
+        """Deadlock report: one cycle (task -> what it awaits -> holder ...) and every deadlocked task"""
+        path = []
+        seen = {}
+        task = next(iter(deadlocked))
+        while task not in seen:
+            seen[task] = len(path)
+            path.append(task)
+            task = next(holder for holder in _holders(waits[task][0]) if holder in deadlocked)
+        cycle = path[seen[task]:]
+
+        now = time.monotonic()
+        return {
+            "cycle": [_task_label(task) for task in cycle],
+            "primitives": [_resource_label(waits[task][0]) for task in cycle],
+            "deadlocked": sorted(_task_label(task) for task in deadlocked),
+            "waiting_for": max((now - waits[task][1] for task in cycle if waits[task][1] is not None), default=0.0),
+        }
+
+
+def _current_task():
+    """The running task, or None outside a running loop"""
+    try:
+        asyncio.get_running_loop()
+    except RuntimeError:
+        return None
+    return asyncio.current_task()
+
+
+def _holders(resource):
+    """Tasks holding a primitive; an awaited task holds itself"""
+    if isinstance(resource, asyncio.Task):
+        return (resource,)
+    return resource._holders()
+
+
+def _task_label(task):
+    coro = task.get_coro()
+    name = getattr(coro, "__qualname__", None)
+    return f"{task.get_name()} ({name})" if name else task.get_name()
+
+
+def _resource_label(resource):
+    if isinstance(resource, asyncio.Task):
+        return f"task {_task_label(resource)}"
+    return resource.label
+
+
+_watcher = None
+
+
+def install(interval=1.0, on_deadlock=None, loop=None):
+    """
+    Replace asyncio.Lock/Semaphore/Event by the instrumented classes and start a watcher
+    on the running loop (or loop); only primitives created afterwards are instrumented
+    Returns the TaskWatcher
+    """
+    global _watcher
+    if _watcher is not None:
+        raise RuntimeError("asyncio instrumentation is already installed")
+    watcher = TaskWatcher(loop, interval, on_deadlock).start()
+    for name, value in (("Lock", Lock), ("Semaphore", Semaphore), ("Event", Event)):
+        setattr(asyncio, name, value)
+        setattr(asyncio.locks, name, value)
+    _watcher = watcher
+    return _watcher
+
+
+def uninstall():
+    """Restore the asyncio classes and stop the watcher (instrumented primitives keep working)"""
+    global _watcher
+    for name, value in _ORIGINALS.items():
+        setattr(asyncio, name, value)
+        setattr(asyncio.locks, name, value)
+    if _watcher is not None:
+        _watcher.stop()
+        _watcher = None
@@ -0,0 +1,292 @@
+"""
+Banker's-algorithm admission control for SINGLE INSTANCE resources
+"""
+
+from .packed import PackedSystemState
+
+GRANTED = "granted"
+QUEUED = "queued"
+REFUSED = "refused"
+
+# Gap between order labels of neighbouring processes in the safe sequence
+LABEL_GAP = 1 << 32
+
+
+class BankersAdmissionController:
+    """
+    Safe-state check for request updates before they are written to the request matrix
+
+    The last safe sequence is kept as a linked list with sortable labels, so
+    "every requested resource is released before this process runs" is one label
+    comparison per requested resource. A process that can't run at its position
+    anymore is moved after the last holder it waits for; only when that fails is
+    the safety algorithm re-run from the process' position.
+    """
+    def __init__(self, allocation, request, available, queue_unsafe=True):
+        self.queue_unsafe = queue_unsafe
+        self.pending = {}
+        self.load(allocation, request, available)
+
+    def load(self, allocation, request, available):
+        """Rebuild the safe sequence from full matrices (pending requests are kept)"""
+        self.state = PackedSystemState.from_matrices(allocation, request, available)
+        n = self.state.num_processes
+        m = self.state.num_resources
+
+        self.held = [self._bits_to_set(row) for row in self.state.allocation_rows]
+        self.requested = [self._bits_to_set(row) for row in self.state.request_rows]
+        self.holders = [set() for _ in range(m)]
+        self.requesters = [set() for _ in range(m)]
+        for pid in range(n):
+            for j in self.held[pid]:
+                self.holders[j].add(pid)
+            for j in self.requested[pid]:
+                self.requesters[j].add(pid)
+
+        # Safe sequence as a linked list with order labels (None = not in the sequence)
+        self.head = self.tail = None
+        self.next = [None] * n
+        self.prev = [None] * n
+        self.label = [None] * n
+        self.unsafe = set(range(n))
+        self._commit(None, *self._simulate(None))
+
+    @staticmethod
+    def _bits_to_set(bits):
+        resources = set()
+        while bits:
+            low = bits & -bits
+            resources.add(low.bit_length() - 1)
+            bits ^= low
+        return resources
+
+    def is_safe(self):
+        return not self.unsafe
+
+    def safe_sequence(self):
+        """Returns processes in an order in which they can all complete (unsafe ones excluded)"""
+        order = []
+        pid = self.head
+        while pid is not None:
+            order.append(pid)
+            pid = self.next[pid]
+        return order
+
+    # Label checks
+    def _released_before(self, resource, position, exclude=None):
+        """True if the resource is available or held by a process ordered before the label"""
+        if self.state.is_available(resource):
+            return True
+        return any(
+            h != exclude and self.label[h] is not None and self.label[h] < position
+            for h in self.holders[resource]
+        )
+
+    def _earliest_holder(self, resource, exclude):
+        ordered = [h for h in self.holders[resource] if h != exclude and self.label[h] is not None]
+        return min(ordered, key=self.label.__getitem__) if ordered else None
+
+    def _find_later_slot(self, pid, wanted):
+        """
+        Find the process after which pid can complete with its new request
+        Returns that process or None if pid can't simply be moved down the sequence
+        """
+        target = None
+        for j in wanted:
+            if self.state.is_available(j):
+                continue
+            holder = self._earliest_holder(j, pid)
+            if holder is None:
+                return None
+            if target is None or self.label[holder] > self.label[target]:
+                target = holder
+
+        # Processes that now complete before pid must not need what only pid releases
+        low, high = self.label[pid], self.label[target]
+        for j in self.held[pid]:
+            for q in self.requesters[j]:
+                if q != pid and self.label[q] is not None and low < self.label[q] <= high:
+                    if not self._released_before(j, self.label[q], exclude=pid):
+                        return None
+        return target
+
+    # Safe sequence maintenance
+    def _unlink(self, pid):
+        before, after = self.prev[pid], self.next[pid]
+        if before is None:
+            self.head = after
+        else:
+            self.next[before] = after
+        if after is None:
+            self.tail = before
+        else:
+            self.prev[after] = before
+        self.prev[pid] = self.next[pid] = self.label[pid] = None
+
+    def _link_after(self, target, pid):
+        after = self.next[target]
+        if after is not None and self.label[after] - self.label[target] < 2:
+            self._relabel()
+        upper = self.label[after] if after is not None else self.label[target] + 2 * LABEL_GAP
+
+        self.prev[pid], self.next[pid] = target, after
+        self.next[target] = pid
+        if after is None:
+            self.tail = pid
+        else:
+            self.prev[after] = pid
+        self.label[pid] = (self.label[target] + upper) // 2
+
+    def _relabel(self):
+        pid, label = self.head, 0
+        while pid is not None:
+            self.label[pid] = label
+            label += LABEL_GAP
+            pid = self.next[pid]
+
+    def _simulate(self, start, pid=None, wanted_bits=None):
+        """
+        Re-run the safety algorithm from process start of the sequence (None = after its end)
+        pid/wanted_bits optionally replace one request row for a what-if check
+        Returns (new sequence from start on, unsafe set)
+        """
+        allocation_rows = self.state.allocation_rows
+        request_rows = self.state.request_rows
+
+        # Work before start = available + everything released earlier in the sequence
+        work = self.state.available
+        node = self.head
+        while node is not None and node != start:
+            work |= allocation_rows[node]
+            node = self.next[node]
+
+        # Try the previous order first, it is usually still valid
+        remaining = []
+        while node is not None:
+            remaining.append(node)
+            node = self.next[node]
+        remaining.extend(sorted(self.unsafe))
+
+        def requested(i):
+            return wanted_bits if i == pid else request_rows[i]
+
+        # Processes without allocated resources release nothing and can always go first
+        sequence = [i for i in remaining if not allocation_rows[i]]
+        pending = [i for i in remaining if allocation_rows[i]]
+
+        while pending:
+            still_waiting = []
+            for i in pending:
+                if requested(i) & ~work:
+                    still_waiting.append(i)
+                else:
+                    sequence.append(i)
+                    work |= allocation_rows[i]
+            if len(still_waiting) == len(pending):
+                break
+            pending = still_waiting
+
+        return sequence, set(pending)
+
+    def _commit(self, before, sequence, unsafe):
+        """Replace everything after process before (None = the whole sequence) with a new order"""
+        node = self.next[before] if before is not None else self.head
+        while node is not None:
+            following = self.next[node]
+            self.prev[node] = self.next[node] = self.label[node] = None
+            node = following
+
+        label = self.label[before] + LABEL_GAP if before is not None else 0
+        last = before
+        for pid in sequence:
+            self.label[pid] = label
+            label += LABEL_GAP
+            self.prev[pid] = last
+            if last is None:
+                self.head = pid
+            else:
+                self.next[last] = pid
+            last = pid
+
+        if last is None:
+            self.head = None
+        else:
+            self.next[last] = None
+        self.tail = last
+        for pid in unsafe:
+            self.label[pid] = None
+        self.unsafe = unsafe
+
+    # Admission
+    def check(self, pid, row):
+        """
+        What-if check of a new request row
+        The request is admitted if it doesn't add processes that can't complete
+        (in a safe state that means the state stays safe, like the Banker's algorithm)
+        Returns (admitted, plan) - plan describes how the safe sequence changes
+        """
+        wanted = {j for j, value in enumerate(row) if value}
+
+        if pid in self.unsafe:
+            # Only the processes after the end of the safe sequence are re-evaluated
+            before, start = self.tail, None
+        else:
+            # Processes without allocations and processes that can still complete
+            # at their position leave the rest of the sequence unchanged
+            position = self.label[pid]
+            if not self.held[pid] or all(self._released_before(j, position, exclude=pid) for j in wanted):
+                return True, None
+
+            target = self._find_later_slot(pid, wanted)
+            if target is not None:
+                return True, ("move", target)
+            before, start = self.prev[pid], pid
+
+        bits = PackedSystemState.pack_rows([row])[0]
+        sequence, unsafe = self._simulate(start, pid, bits)
+        return unsafe <= self.unsafe, ("simulate", before, sequence, unsafe)
+
+    def submit(self, pid, row):
+        """
+        Admission control for a request update
+        Returns GRANTED (request matrix updated), QUEUED (kept for retry) or REFUSED
+        """
+        admitted, plan = self.check(pid, row)
+        if not admitted:
+            if self.queue_unsafe:
+                self.pending[pid] = list(row)
+                return QUEUED
+            return REFUSED
+
+        self._set_request_row(pid, row)
+        if plan is not None and plan[0] == "move":
+            self._unlink(pid)
+            self._link_after(plan[1], pid)
+        elif plan is not None:
+            self._commit(*plan[1:])
+        self.pending.pop(pid, None)
+        return GRANTED
+
+    def _set_request_row(self, pid, row):
+        wanted = {j for j, value in enumerate(row) if value}
+        for j in self.requested[pid] - wanted:
+            self.requesters[j].discard(pid)
+        for j in wanted - self.requested[pid]:
+            self.requesters[j].add(pid)
+        self.requested[pid] = wanted
+        self.state.set_request_row(pid, row)
+
+    def cancel(self, pid):
+        """Drop a queued request (e.g. when the process was terminated)"""
+        self.pending.pop(pid, None)
+
+    def retry_pending(self):
+        """
+        Try queued requests again (call after resources were released)
+        Returns list of (pid, row) that were granted
+        """
+        granted = []
+        for pid, row in list(self.pending.items()):
+            if self.submit(pid, row) == GRANTED:
+                granted.append((pid, row))
+        return granted
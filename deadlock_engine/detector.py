@@ -0,0 +1,583 @@
+"""
+Deadlock detection & recovery algorithms for SINGLE INSTANCE resources
+"""
+
+import numpy as np
+
+from .incremental import IncrementalDeadlockDetector
+from .mapped import POPCOUNT, MappedSystemState
+from .packed import PackedSystemState
+from .planner import minimum_feedback_vertex_set
+from .sparse import SparseSystemState, gather
+
+
+class DeadlockDetectorSingleInstance:
+    def __init__(self, num_processes, num_resources):
+        self.num_processes = num_processes
+        self.num_resources = num_resources
+        
+    def detect_deadlock(self, allocation, request=None, available=None):
+        """
+        Detect deadlock using Wait-For Graph algorithm for SINGLE INSTANCE resources
+        allocation can also be a PackedSystemState, MappedSystemState or SparseSystemState
+        holding the whole state (request/available unused)
+        Returns list of deadlocked processes
+        """
+        if isinstance(allocation, PackedSystemState):
+            return self.detect_deadlock_packed(allocation)
+        if isinstance(allocation, MappedSystemState):
+            return self.detect_deadlock_mapped(allocation)
+        if isinstance(allocation, SparseSystemState):
+            return self.detect_deadlock_sparse(allocation)
+        return self.detect_deadlock_vectorized(
+            np.asarray(allocation, dtype=bool),
+            np.asarray(request, dtype=bool),
+            np.asarray(available, dtype=bool)
+        )
+    
+    def detect_deadlock_vectorized(self, allocation, request, available):
+        """
+        NumPy engine for single instance deadlock detection
+        Takes boolean allocation/request (n x m) and available (m) arrays
+        Returns list of deadlocked processes (same set as the list-based algorithm)
+        """
+        work = np.array(available, dtype=bool)
+        
+        # Nested lists without processes or resources come in as 1-D arrays
+        shape = (len(allocation), len(work))
+        allocation = np.asarray(allocation, dtype=bool).reshape(shape)
+        request = np.asarray(request, dtype=bool).reshape(shape)
+        
+        # Finish[i] = true if process has no allocated resources
+        finish = ~allocation.any(axis=1)
+        
+        # Number of requested resources that are not yet in the work vector
+        missing = (request & ~work).sum(axis=1)
+        
+        # Every process whose requests are all satisfied finishes in the same round,
+        # and only the newly released columns are used to update the counters
+        ready = ~finish & (missing == 0)
+        while ready.any():
+            finish |= ready
+            released = allocation[ready].any(axis=0) & ~work
+            if released.any():
+                work |= released
+                missing -= request[:, released].sum(axis=1)
+            ready = ~finish & (missing == 0)
+        
+        # Identify deadlocked processes
+        return np.flatnonzero(~finish).tolist()
+    
+    def detect_deadlock_packed(self, state):
+        """
+        Single instance deadlock detection on a PackedSystemState
+        "request subset of work" and "work |= allocation" are one AND/OR per process row
+        Returns list of deadlocked processes
+        """
+        work = state.available
+        allocation_rows = state.allocation_rows
+        request_rows = state.request_rows
+        
+        # Processes without allocated resources are finished from the start
+        pending = [i for i in range(state.num_processes) if allocation_rows[i]]
+        
+        while pending:
+            still_waiting = []
+            for i in pending:
+                if request_rows[i] & ~work:
+                    still_waiting.append(i)
+                else:
+                    # Process can complete - release its resources in one OR
+                    work |= allocation_rows[i]
+            if len(still_waiting) == len(pending):
+                break
+            pending = still_waiting
+        
+        return pending
+    
+    def detect_deadlock_mapped(self, state):
+        """
+        Single instance deadlock detection on a disk-backed MappedSystemState
+        Streams over the pending process rows in blocks; inside a block the rows are re-checked
+        until nothing changes, so wait chains within a block finish in one pass over the file
+        Returns list of deadlocked processes
+        """
+        work = np.array(state.available)
+        
+        # Processes without allocated resources are finished from the start
+        finish = np.zeros(state.num_processes, dtype=bool)
+        for pids, allocation in state.read_blocks(matrices=("allocation",)):
+            finish[pids] = ~allocation.any(axis=1)
+        pending = np.flatnonzero(~finish)
+        
+        while len(pending):
+            still_waiting = [pending[:0]]
+            for rows, allocation, request in state.read_blocks(pending):
+                waiting = np.ones(len(rows), dtype=bool)
+                while True:
+                    ready = waiting & ~(request & ~work).any(axis=1)
+                    if not ready.any():
+                        break
+                    # Processes can complete - release their resources
+                    work |= np.bitwise_or.reduce(allocation[ready], axis=0)
+                    waiting &= ~ready
+                still_waiting.append(rows[waiting])
+            still_waiting = np.concatenate(still_waiting)
+            if len(still_waiting) == len(pending):
+                break
+            pending = still_waiting
+        
+        return pending.tolist()
+    
+    def detect_deadlock_sparse(self, state):
+        """
+        Single instance deadlock detection on a SparseSystemState in O(nnz)
+        Every released resource is visited once and decrements the missing counter of its
+        requesters; only those requesters can become ready in the next round
+        Returns list of deadlocked processes
+        """
+        work = state.available.copy()
+        
+        # Finish[i] = true if process has no allocated resources
+        finish = np.diff(state.allocation_indptr) == 0
+        
+        # Number of requested resources that are not yet in the work vector
+        missing = np.bincount(state.request_rows()[~work[state.request_indices]], minlength=state.num_processes)
+        requester_indptr, requester_rows = state.requesters()
+        
+        ready = np.flatnonzero(~finish & (missing == 0))
+        while len(ready):
+            finish[ready] = True
+            _, released = gather(state.allocation_indptr, state.allocation_indices, ready)
+            released = np.unique(released[~work[released]])
+            work[released] = True
+            
+            _, waiting = gather(requester_indptr, requester_rows, released)
+            waiting, counts = np.unique(waiting, return_counts=True)
+            missing[waiting] -= counts
+            ready = waiting[(missing[waiting] == 0) & ~finish[waiting]]
+        
+        return np.flatnonzero(~finish).tolist()
+    
+    def build_holder_index(self, allocation):
+        """
+        Build resource -> holder index for SINGLE INSTANCE resources
+        allocation can also be a MappedSystemState (the allocation file is streamed in blocks)
+        or a SparseSystemState
+        Returns list where holder[j] is the process holding resource j (-1 if not allocated)
+        """
+        if isinstance(allocation, SparseSystemState):
+            # First (lowest) holder of every column of the transposed allocation
+            indptr, holders = allocation.holders()
+            holder = np.full(allocation.num_resources, -1, dtype=np.int64)
+            held = np.flatnonzero(np.diff(indptr))
+            holder[held] = holders[indptr[held]]
+            return holder.tolist()
+        
+        if isinstance(allocation, MappedSystemState):
+            state = allocation
+            holder = np.full(state.num_resources, -1, dtype=np.int64)
+            for pids, allocation in state.read_blocks(matrices=("allocation",)):
+                # Only byte columns with resources still looking for a holder are unpacked
+                columns = np.flatnonzero(np.packbits(holder == -1, bitorder="little"))
+                if not columns.size:
+                    break
+                columns = columns[allocation[:, columns].any(axis=0)]
+                if not columns.size:
+                    continue
+                bits = np.unpackbits(allocation[:, columns], axis=1, bitorder="little")
+                resources = (columns[:, None] * 8 + np.arange(8)).ravel()
+                first = bits.any(axis=0) & (resources < state.num_resources)
+                first[first] &= holder[resources[first]] == -1
+                holder[resources[first]] = pids[0] + bits.argmax(axis=0)[first]
+            return holder.tolist()
+        
+        allocation = np.asarray(allocation, dtype=bool)
+        if allocation.size == 0:
+            return [-1] * (allocation.shape[1] if allocation.ndim == 2 else 0)
+        
+        # First holder of every column, like the Resource Monitor shows it
+        return np.where(allocation.any(axis=0), allocation.argmax(axis=0), -1).tolist()
+    
+    def check_holder_index(self, holder, allocation):
+        """
+        Check a maintained holder index against the allocation matrix
+        Returns list of inconsistent resources (wrong holder or more than one holder)
+        """
+        allocation = np.asarray(allocation, dtype=bool)
+        expected = self.build_holder_index(allocation)
+        if len(holder) != len(expected):
+            return list(range(max(len(holder), len(expected))))
+        
+        shared = allocation.reshape(len(allocation), len(expected)).sum(axis=0) > 1
+        return [j for j in range(len(expected)) if holder[j] != expected[j] or shared[j]]
+    
+    def build_wait_for_graph(self, request, allocation, holder=None):
+        """
+        Build wait-for graph for SINGLE INSTANCE resources in O(nnz)
+        Process i waits for process j if i requests a resource that j holds
+        A maintained holder index can be passed to skip scanning the allocation matrix
+        request can also be a SparseSystemState (sparse product request * allocation^T)
+        Returns adjacency lists (wait_for[i] = processes i is waiting for)
+        """
+        if isinstance(request, SparseSystemState):
+            indptr, waits_for = request.wait_for_graph()
+            return [edges.tolist() for edges in np.split(waits_for, indptr[1:-1])]
+        
+        request = np.asarray(request, dtype=bool)
+        if request.size == 0:
+            # No requests (or nested lists without processes or resources) - nobody waits
+            return [[] for _ in range(len(request))]
+        n = request.shape[0]
+        
+        # Resource -> holder mapping (a single holder per resource for single instances)
+        if holder is not None:
+            holders = [[h] if h != -1 else [] for h in holder]
+        else:
+            holders = [[] for _ in range(request.shape[1])]
+            for pid, resource in zip(*np.nonzero(np.asarray(allocation, dtype=bool))):
+                holders[resource].append(int(pid))
+        
+        wait_for = [[] for _ in range(n)]
+        for pid, resource in zip(*np.nonzero(request)):
+            pid = int(pid)
+            for holder in holders[resource]:
+                if holder != pid:
+                    wait_for[pid].append(holder)
+        
+        # Several requested resources can be held by the same process
+        return [list(dict.fromkeys(edges)) for edges in wait_for]
+    
+    @staticmethod
+    def strongly_connected_components(wait_for):
+        """
+        Iterative Tarjan's algorithm (no recursion limit on long wait chains)
+        Returns list of strongly connected components
+        """
+        n = len(wait_for)
+        index = [-1] * n
+        low = [0] * n
+        on_stack = [False] * n
+        stack = []
+        components = []
+        counter = 0
+        
+        for root in range(n):
+            if index[root] != -1:
+                continue
+            
+            index[root] = low[root] = counter
+            counter += 1
+            stack.append(root)
+            on_stack[root] = True
+            work = [(root, 0)]
+            
+            while work:
+                v, pos = work[-1]
+                if pos < len(wait_for[v]):
+                    work[-1] = (v, pos + 1)
+                    w = wait_for[v][pos]
+                    if index[w] == -1:
+                        index[w] = low[w] = counter
+                        counter += 1
+                        stack.append(w)
+                        on_stack[w] = True
+                        work.append((w, 0))
+                    elif on_stack[w]:
+                        low[v] = min(low[v], index[w])
+                else:
+                    work.pop()
+                    if work:
+                        parent = work[-1][0]
+                        low[parent] = min(low[parent], low[v])
+                    if low[v] == index[v]:
+                        component = []
+                        while True:
+                            w = stack.pop()
+                            on_stack[w] = False
+                            component.append(w)
+                            if w == v:
+                                break
+                        components.append(component)
+        
+        return components
+    
+    def find_deadlock_components(self, request, allocation, deadlocked=None, holder=None):
+        """
+        Find every group of processes waiting on each other in a cycle
+        If deadlocked is given, only edges between those processes are considered
+        Returns list of strongly connected components (sorted process lists, size >= 2)
+        """
+        wait_for = self.build_wait_for_graph(request, allocation, holder)
+        
+        if deadlocked is not None:
+            keep = set(deadlocked)
+            wait_for = [
+                [j for j in edges if j in keep] if i in keep else []
+                for i, edges in enumerate(wait_for)
+            ]
+        
+        components = self.strongly_connected_components(wait_for)
+        return [sorted(component) for component in components if len(component) > 1]
+    
+    def find_deadlock_cycle(self, request, allocation, holder=None):
+        """
+        Find the cycle in deadlock if exists for SINGLE INSTANCE resources
+        Returns list of processes in the cycle
+        """
+        wait_for = self.build_wait_for_graph(request, allocation, holder)
+        
+        for component in self.strongly_connected_components(wait_for):
+            if len(component) < 2:
+                continue
+            
+            # Every process of the component waits for another one inside it,
+            # so walking inside the component must come back to a visited process
+            members = set(component)
+            path = []
+            position = {}
+            v = component[0]
+            while v not in position:
+                position[v] = len(path)
+                path.append(v)
+                v = next(j for j in wait_for[v] if j in members)
+            return path[position[v]:]
+        
+        return []
+    
+    def recover_by_process_termination(self, deadlocked, allocation, request=None, available=None):
+        """
+        Recover from deadlock by terminating processes for SINGLE INSTANCE resources
+        A MappedSystemState or SparseSystemState passed as allocation is modified in place
+        Returns modified matrices
+        """
+        if not deadlocked:
+            return allocation, request, available, []
+        
+        if isinstance(allocation, SparseSystemState):
+            counts = np.diff(allocation.request_indptr)[np.asarray(deadlocked)]
+            terminated = int(deadlocked[int(counts.argmax())])
+            allocation.release_process(terminated)
+            return allocation, request, available, [terminated]
+        
+        if isinstance(allocation, MappedSystemState):
+            # Requested resources of the deadlocked processes, counted block by block
+            state = allocation
+            counts = {}
+            for pids, block in state.read_blocks(sorted(deadlocked), matrices=("request",)):
+                counts.update(zip(pids.tolist(), POPCOUNT[block].sum(axis=1, dtype=np.int64).tolist()))
+            terminated = deadlocked[0]
+            for pid in deadlocked:
+                if counts[pid] > counts[terminated]:
+                    terminated = pid
+            state.release_process(terminated)
+            return allocation, request, available, [terminated]
+        
+        # Select process with maximum wait dependencies
+        terminated = deadlocked[0]
+        max_dependencies = 0
+        
+        for pid in deadlocked:
+            # Count how many resources this process is requesting
+            dependencies = sum(request[pid])
+            if dependencies > max_dependencies:
+                max_dependencies = dependencies
+                terminated = pid
+        
+        # Release SINGLE INSTANCE resources of terminated process
+        new_allocation = [row[:] for row in allocation]
+        new_request = [row[:] for row in request]
+        new_available = available[:]
+        
+        for j in range(self.num_resources):
+            if new_allocation[terminated][j] == 1:
+                new_available[j] = 1  # Resource becomes available
+                new_allocation[terminated][j] = 0
+            new_request[terminated][j] = 0  # Clear all requests
+        
+        return new_allocation, new_request, new_available, [terminated]
+    
+    def plan_process_termination(self, deadlocked, allocation, request, weights=None, holder=None,
+                                 exact_limit=16, time_limit=0.05):
+        """
+        Plan a minimum-cost set of processes to terminate (weighted feedback vertex set
+        of the deadlocked wait-for components, cost 1 per process unless weights are given)
+        Returns list of processes to terminate
+        """
+        keep = set(deadlocked)
+        wait_for = [
+            [j for j in edges if j in keep] if i in keep else []
+            for i, edges in enumerate(self.build_wait_for_graph(request, allocation, holder))
+        ]
+        components = [c for c in self.strongly_connected_components(wait_for) if len(c) > 1]
+        return minimum_feedback_vertex_set(wait_for, components, weights, exact_limit, time_limit)
+    
+    def recover_by_minimum_termination(self, deadlocked, allocation, request, available, weights=None):
+        """
+        Recover from deadlock in one planned step by terminating a minimum-cost set of processes
+        Returns modified matrices and the list of terminated processes
+        """
+        if not deadlocked:
+            return allocation, request, available, []
+        
+        new_allocation = [row[:] for row in allocation]
+        new_request = [row[:] for row in request]
+        new_available = available[:]
+        terminated = []
+        
+        while deadlocked:
+            victims = self.plan_process_termination(deadlocked, new_allocation, new_request, weights)
+            if not victims:
+                # Blocked without a cycle (e.g. on a resource nobody releases) - use the default choice
+                victims = self.recover_by_process_termination(deadlocked, new_allocation, new_request, new_available)[3]
+            
+            # Release SINGLE INSTANCE resources of every terminated process
+            for pid in victims:
+                for j in range(len(new_available)):
+                    if new_allocation[pid][j] == 1:
+                        new_available[j] = 1
+                        new_allocation[pid][j] = 0
+                    new_request[pid][j] = 0
+            terminated.extend(victims)
+            
+            deadlocked = self.detect_deadlock(new_allocation, new_request, new_available)
+        
+        return new_allocation, new_request, new_available, terminated
+    
+    def recover_to_fixpoint(self, allocation, request, available, strategy="termination", max_actions=None):
+        """
+        Recover from deadlock by applying one recovery strategy until the system is deadlock-free
+        Detection runs once, after every action only the affected processes are re-evaluated
+        Returns modified matrices and the action log
+        """
+        incremental = IncrementalDeadlockDetector(allocation, request, available)
+        log = incremental.recover_until_deadlock_free(strategy, max_actions)
+        
+        new_allocation = [row[:] for row in allocation]
+        new_request = [row[:] for row in request]
+        new_available = available[:]
+        
+        for entry in log:
+            pid, resource = entry["process"], entry["resource"]
+            if entry["action"] == "terminate":
+                for j in range(len(new_available)):
+                    if new_allocation[pid][j] == 1:
+                        new_available[j] = 1
+                        new_allocation[pid][j] = 0
+                    new_request[pid][j] = 0
+            else:
+                new_allocation[pid][resource] = 0
+                new_request[pid][resource] = 1
+                new_available[resource] = 1
+        
+        return new_allocation, new_request, new_available, log
+    
+    def recover_by_resource_preemption(self, deadlocked, allocation, request=None, available=None, holder=None):
+        """
+        Recover from deadlock by resource preemption for SINGLE INSTANCE resources
+        A MappedSystemState or SparseSystemState passed as allocation is modified in place
+        Returns modified matrices
+        """
+        if not deadlocked:
+            return allocation, request, available, []
+        
+        if isinstance(allocation, MappedSystemState):
+            return allocation, request, available, self._preempt_mapped(deadlocked, allocation, holder)
+        if isinstance(allocation, SparseSystemState):
+            return allocation, request, available, self._preempt_sparse(deadlocked, allocation, holder)
+        
+        # Find resource that is most requested among deadlocked processes
+        preempted_resource = -1
+        max_requests = -1
+        
+        for j in range(self.num_resources):
+            request_count = sum(request[pid][j] for pid in deadlocked)
+            if request_count > max_requests:
+                max_requests = request_count
+                preempted_resource = j
+        
+        if preempted_resource == -1:
+            return allocation, request, available, []
+        
+        # Find process holding this resource (O(1) with a maintained holder index)
+        preempted_process = -1
+        if holder is not None:
+            preempted_process = holder[preempted_resource]
+        else:
+            for pid in range(self.num_processes):
+                if allocation[pid][preempted_resource] == 1:
+                    preempted_process = pid
+                    break
+        
+        if preempted_process == -1:
+            return allocation, request, available, []
+        
+        # Preempt the SINGLE INSTANCE resource
+        new_allocation = [row[:] for row in allocation]
+        new_request = [row[:] for row in request]
+        new_available = available[:]
+        
+        # Release resource from current holder
+        new_allocation[preempted_process][preempted_resource] = 0
+        new_request[preempted_process][preempted_resource] = 1  # Process will request it back
+        
+        # Make resource available
+        new_available[preempted_resource] = 1
+        
+        return new_allocation, new_request, new_available, [(preempted_process, preempted_resource)]
+    
+    def _preempt_mapped(self, deadlocked, state, holder=None):
+        """
+        Resource preemption on a MappedSystemState (same choice as the list-based version)
+        Returns [(process, resource)] or [] if the resource has no holder
+        """
+        m = state.num_resources
+        if not m:
+            return []
+        requests = np.zeros(m, dtype=np.int64)
+        for _, request in state.read_blocks(sorted(deadlocked), matrices=("request",)):
+            requests += np.unpackbits(request, axis=1, count=m, bitorder="little").sum(axis=0, dtype=np.int64)
+        preempted_resource = int(requests.argmax())
+        
+        # First holder of the resource
+        preempted_process = -1
+        if holder is not None:
+            preempted_process = holder[preempted_resource]
+        else:
+            byte, bit = preempted_resource >> 3, preempted_resource & 7
+            for pids, allocation in state.read_blocks(matrices=("allocation",)):
+                held = np.flatnonzero((allocation[:, byte] >> bit) & 1)
+                if held.size:
+                    preempted_process = int(pids[held[0]])
+                    break
+        
+        if preempted_process == -1:
+            return []
+        
+        state.set_allocation(preempted_process, preempted_resource, 0)
+        state.set_request(preempted_process, preempted_resource, 1)
+        state.set_available(preempted_resource, 1)
+        return [(preempted_process, preempted_resource)]
+    
+    def _preempt_sparse(self, deadlocked, state, holder=None):
+        """
+        Resource preemption on a SparseSystemState (same choice as the list-based version)
+        Returns [(process, resource)] or [] if the resource has no holder
+        """
+        if not state.num_resources:
+            return []
+        _, requested = gather(state.request_indptr, state.request_indices, deadlocked)
+        preempted_resource = int(np.bincount(requested, minlength=state.num_resources).argmax())
+        
+        if holder is not None:
+            preempted_process = holder[preempted_resource]
+        else:
+            indptr, holders = state.holders()
+            start, stop = indptr[preempted_resource], indptr[preempted_resource + 1]
+            preempted_process = int(holders[start]) if stop > start else -1
+        
+        if preempted_process == -1:
+            return []
+        
+        state.preempt(preempted_process, preempted_resource)
+        return [(preempted_process, preempted_resource)]
@@ -0,0 +1,303 @@
+"""
+Fully dynamic cycle detection in a wait-for graph (Pearce-Kelly topological order)
+"""
+
+import itertools
+
+
+class DynamicWaitForGraph:
+    """
+    Wait-for graph that keeps its strongly connected components in topological order
+    under edge changes
+    Every component has an order label and edges between components always point to a
+    larger label. An insertion u -> v that points backward only searches the components
+    between v and u in the order (the affected region): the components on a path v ~> u
+    merge with u's into one (the edge closed a cycle), or just that region is reordered.
+
+    Deletions never break the order. Only deleting an edge inside a component can split
+    it: if the tail no longer reaches the head inside the component, that component alone
+    is decomposed again; its parts get labels right after the old one (labels are tuples,
+    the parts of (5,) are (5, 0), (5, 1), ...). An edge added inside a component that
+    already has a cycle is only counted. Edges are counted, so one process can wait for
+    another through several resources.
+
+    Work still grows with the components involved: reordering walks every member of the
+    components in the affected region, a merge finds a path through the merged component,
+    and a split or a node losing its edges decomposes the whole component. With a
+    standing deadlock of k processes those operations cost O(k) plus the edges of its
+    members, the reachability check of a deletion inside it at most the same.
+    """
+    # Longest label before all labels are renumbered
+    MAX_LABEL_DEPTH = 8
+
+    def __init__(self, num_nodes=0):
+        self.successors = []
+        self.predecessors = []
+        # Component of every node, members and order label of every component
+        self.component = []
+        self.members = {}
+        self.label = {}
+        # Components with a cycle (several members or a self loop)
+        self.cyclic = set()
+        self._ids = itertools.count()
+        self._labels = itertools.count()
+        for _ in range(num_nodes):
+            self.add_node()
+
+    def add_node(self):
+        """Add a node as its own component at the end of the order. Returns its index"""
+        node = len(self.component)
+        self.successors.append({})
+        self.predecessors.append({})
+        c = next(self._ids)
+        self.component.append(c)
+        self.members[c] = [node]
+        self.label[c] = (next(self._labels),)
+        return node
+
+    def __len__(self):
+        return len(self.component)
+
+    def has_edge(self, u, v):
+        return v in self.successors[u]
+
+    def has_cycle(self):
+        return bool(self.cyclic)
+
+    def topological_order(self):
+        """Nodes by component order (edges between different components point forward)"""
+        return [x for c in sorted(self.members, key=self.label.__getitem__) for x in self.members[c]]
+
+    # Insertion
+    def insert_edge(self, u, v):
+        """
+        Add the edge u -> v (u waits for v)
+        Returns the cycle the edge closes as a node list (each waits for the next, the last
+        for the first, starting with u) or None
+        """
+        if v in self.successors[u]:
+            self.successors[u][v] += 1
+            self.predecessors[v][u] += 1
+            return None
+        self.successors[u][v] = 1
+        self.predecessors[v][u] = 1
+
+        cu, cv = self.component[u], self.component[v]
+        if cu == cv:
+            # Inside a cyclic component the edge only adds another way around a standing
+            # cycle; any other component is a single node, so this is a self loop
+            if cu in self.cyclic:
+                return None
+            self.cyclic.add(cu)
+            return [u]
+        if self.label[cu] < self.label[cv]:
+            return None
+
+        merged = self._reorder(cu, cv)
+        if merged is None:
+            return None
+        return [u] + self._path(v, u, merged)[:-1]
+
+    def _search(self, start, edges, lower, upper):
+        """Components reachable over edges from component start with labels in [lower, upper]"""
+        members, component, label = self.members, self.component, self.label
+        found = {start}
+        stack = [start]
+        while stack:
+            c = stack.pop()
+            for x in members[c]:
+                for w in edges[x]:
+                    d = component[w]
+                    if d not in found and lower <= label[d] <= upper:
+                        found.add(d)
+                        stack.append(d)
+        return found
+
+    def _reorder(self, cu, cv):
+        """
+        Restore the order after a backward edge from component cu to cv
+        Returns the merged component if the edge closed a cycle, else None
+        """
+        label = self.label
+        lower, upper = label[cv], label[cu]
+        forward = self._search(cv, self.successors, lower, upper)
+        backward = self._search(cu, self.predecessors, lower, upper)
+
+        # What reaches u, then the components on a path v ~> u, then what v reaches, on the
+        # same labels. A component between them that neither search found has no edge to or
+        # from the cycle, so the merged component can keep the label of any of its parts
+        cycle = forward & backward
+        key = label.__getitem__
+        sequence = sorted(backward - cycle, key=key) + sorted(cycle, key=key) + sorted(forward - cycle, key=key)
+        slots = sorted(label[c] for c in sequence)
+        for c, slot in zip(sequence, slots):
+            label[c] = slot
+        if not cycle:
+            return None
+
+        merged = min(cycle, key=key)
+        for c in cycle:
+            if c != merged:
+                for x in self.members[c]:
+                    self.component[x] = merged
+                self.members[merged] += self.members.pop(c)
+                del label[c]
+        self.cyclic -= cycle
+        self.cyclic.add(merged)
+        return merged
+
+    def _path(self, source, target, c):
+        """Path source -> target inside component c (node list)"""
+        component = self.component
+        parent = {source: None}
+        stack = [source]
+        while stack:
+            x = stack.pop()
+            if x == target:
+                path = [x]
+                while parent[path[-1]] is not None:
+                    path.append(parent[path[-1]])
+                return path[::-1]
+            for w in self.successors[x]:
+                if component[w] == c and w not in parent:
+                    parent[w] = x
+                    stack.append(w)
+        return None
+
+    # Deletion
+    def delete_edge(self, u, v):
+        """Remove one u -> v edge (no-op if there is none)"""
+        count = self.successors[u].get(v)
+        if count is None:
+            return
+        if count > 1:
+            self.successors[u][v] = count - 1
+            self.predecessors[v][u] = count - 1
+            return
+        del self.successors[u][v]
+        del self.predecessors[v][u]
+        c = self.component[u]
+        if c != self.component[v]:
+            return
+        if u == v:
+            # Only a single node needs its self loop to be cyclic
+            if len(self.members[c]) == 1:
+                self.cyclic.discard(c)
+        elif not self._connected(u, v, c):
+            self._split(c)
+
+    def _connected(self, source, target, c):
+        """
+        True if source still reaches target inside component c
+        Then the component stays strongly connected without the edge source -> target.
+        Searches from both ends, a level of the smaller side at a time
+        """
+        component = self.component
+        sides = [({source}, [source], self.successors), ({target}, [target], self.predecessors)]
+        while sides[0][1] and sides[1][1]:
+            if len(sides[0][1]) > len(sides[1][1]):
+                sides.reverse()
+            (seen, frontier, edges), (other, _, _) = sides
+            level = []
+            for x in frontier:
+                for w in edges[x]:
+                    if w in other:
+                        return True
+                    if w not in seen and component[w] == c:
+                        seen.add(w)
+                        level.append(w)
+            sides[0] = (seen, level, edges)
+        return False
+
+    def delete_node_edges(self, node):
+        """Remove every edge into and out of a node (e.g. a terminated process)"""
+        for w in self.successors[node]:
+            del self.predecessors[w][node]
+        for w in self.predecessors[node]:
+            del self.successors[w][node]
+        self.successors[node].clear()
+        self.predecessors[node].clear()
+        self._split(self.component[node])
+
+    def _split(self, c):
+        """Decompose component c again after it lost an edge (iterative Tarjan on its members)"""
+        nodes = self.members[c]
+        if len(nodes) == 1:
+            if nodes[0] not in self.successors[nodes[0]]:
+                self.cyclic.discard(c)
+            return
+
+        inside = set(nodes)
+        index = {}
+        low = {}
+        stack = []
+        on_stack = set()
+        sccs = []
+        for root in nodes:
+            if root in index:
+                continue
+            index[root] = low[root] = len(index)
+            stack.append(root)
+            on_stack.add(root)
+            work = [(root, iter(self.successors[root]))]
+            while work:
+                x, edges = work[-1]
+                for w in edges:
+                    if w not in inside:
+                        continue
+                    if w not in index:
+                        index[w] = low[w] = len(index)
+                        stack.append(w)
+                        on_stack.add(w)
+                        work.append((w, iter(self.successors[w])))
+                        break
+                    if w in on_stack:
+                        low[x] = min(low[x], index[w])
+                else:
+                    work.pop()
+                    if work:
+                        parent = work[-1][0]
+                        low[parent] = min(low[parent], low[x])
+                    if low[x] == index[x]:
+                        scc = []
+                        while True:
+                            w = stack.pop()
+                            on_stack.discard(w)
+                            scc.append(w)
+                            if w == x:
+                                break
+                        sccs.append(scc)
+        if len(sccs) == 1:
+            return
+
+        if len(self.label[c]) >= self.MAX_LABEL_DEPTH:
+            self._relabel()
+
+        # Tarjan emits sinks first; the parts go right after the old label in topological order
+        prefix = self.label.pop(c)
+        del self.members[c]
+        self.cyclic.discard(c)
+        for i, scc in enumerate(reversed(sccs)):
+            d = next(self._ids)
+            self.members[d] = scc
+            self.label[d] = prefix + (i,)
+            for x in scc:
+                self.component[x] = d
+            if len(scc) > 1 or scc[0] in self.successors[scc[0]]:
+                self.cyclic.add(d)
+
+    def _relabel(self):
+        """Renumber all component labels to (0,), (1,), ... in order"""
+        for i, c in enumerate(sorted(self.label, key=self.label.__getitem__)):
+            self.label[c] = (i,)
+        self._labels = itertools.count(len(self.label))
+
+    # Queries
+    def cycles(self):
+        """Returns one cycle per cyclic component (node lists as returned by insert_edge)"""
+        found = []
+        for c in self.cyclic:
+            x = self.members[c][0]
+            w = next(w for w in self.successors[x] if self.component[w] == c)
+            found.append([x] + self._path(w, x, c)[:-1] if w != x else [x])
+        return found
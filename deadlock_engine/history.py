@@ -0,0 +1,205 @@
+"""
+Append-only event log with periodic snapshots for undo/redo of SINGLE INSTANCE system states
+"""
+
+from .packed import PackedSystemState
+
+
+class EventLog:
+    """
+    Every state mutation is recorded as one event: (label, changes), where a change is
+    (field, index, old, new) with field one of
+        "allocation" / "request"  index = (process, resource), values 0/1
+        "available"               index = resource, values 0/1
+        "status"                  index = process, values are status strings
+        "request_matrix"          index = None, values are tuples of packed request rows
+
+    The log mirrors the current state in packed form and keeps a full snapshot every
+    snapshot_interval events. Snapshots copy the row lists only, so unchanged rows are
+    shared between snapshots. Beyond max_events the oldest events are dropped, always
+    up to a snapshot, so memory stays bounded for long sessions.
+    """
+    def __init__(self, allocation, request, available, status=None,
+                 snapshot_interval=256, max_events=8192):
+        self.snapshot_interval = snapshot_interval
+        self.max_events = max_events
+        self.reset(allocation, request, available, status)
+
+    def reset(self, allocation, request, available, status=None):
+        """Start a new history at the given state (e.g. after initialization)"""
+        self.state = PackedSystemState.from_matrices(allocation, request, available)
+        self.status = list(status) if status is not None else [None] * self.state.num_processes
+
+        # events[k] leads from step base + k to step base + k + 1
+        self.base = 0
+        self.events = []
+        self.position = 0
+        self.snapshots = {0: self._snapshot()}
+
+    # Steps
+    @property
+    def first_step(self):
+        return self.base
+
+    @property
+    def last_step(self):
+        return self.base + len(self.events)
+
+    def can_undo(self):
+        return self.position > self.base
+
+    def can_redo(self):
+        return self.position < self.last_step
+
+    def labels(self, start=None, stop=None):
+        """Returns [(step, label)] of the recorded events, step = state after the event"""
+        start = self.base if start is None else max(start, self.base)
+        stop = self.last_step if stop is None else min(stop, self.last_step)
+        return [(step + 1, self.events[step - self.base][0]) for step in range(start, stop)]
+
+    # Mirror of the current state
+    def _snapshot(self):
+        return (
+            tuple(self.state.allocation_rows),
+            tuple(self.state.request_rows),
+            self.state.available,
+            tuple(self.status),
+        )
+
+    def _restore(self, snapshot):
+        allocation_rows, request_rows, available, status = snapshot
+        self.state.allocation_rows = list(allocation_rows)
+        self.state.request_rows = list(request_rows)
+        self.state.available = available
+        self.status = list(status)
+
+    def _set(self, field, index, value):
+        if field == "allocation":
+            self.state.set_allocation(index[0], index[1], value)
+        elif field == "request":
+            self.state.set_request(index[0], index[1], value)
+        elif field == "available":
+            self.state.set_available(index, value)
+        elif field == "status":
+            self.status[index] = value
+        elif field == "request_matrix":
+            self.state.request_rows = list(value)
+        else:
+            raise ValueError(f"unknown field {field!r}")
+
+    # Recording
+    def record(self, label, changes):
+        """
+        Append an event at the current position (a redo tail is discarded)
+        Returns the new step number
+        """
+        changes = tuple(changes)
+        if not changes:
+            return self.position
+
+        if self.position < self.last_step:
+            del self.events[self.position - self.base:]
+            for step in [s for s in self.snapshots if s > self.position]:
+                del self.snapshots[step]
+
+        for field, index, _, new in changes:
+            self._set(field, index, new)
+        self.events.append((label, changes))
+        self.position += 1
+
+        if self.position % self.snapshot_interval == 0:
+            self.snapshots[self.position] = self._snapshot()
+        self._trim()
+        return self.position
+
+    def _trim(self):
+        """Drop the oldest events once there are more than max_events, up to the next snapshot"""
+        if len(self.events) <= self.max_events:
+            return
+        later = [step for step in self.snapshots if self.base < step <= self.position]
+        if not later:
+            return
+        new_base = min(later)
+        del self.events[:new_base - self.base]
+        for step in [s for s in self.snapshots if s < new_base]:
+            del self.snapshots[step]
+        self.base = new_base
+
+    # Navigation
+    def undo(self):
+        """
+        Step back one event
+        Returns list of (field, index, value) to apply, in order
+        """
+        if not self.can_undo():
+            return []
+        self.position -= 1
+        _, changes = self.events[self.position - self.base]
+        undo = [(field, index, old) for field, index, old, _ in reversed(changes)]
+        for field, index, value in undo:
+            self._set(field, index, value)
+        return undo
+
+    def redo(self):
+        """
+        Step forward one event
+        Returns list of (field, index, value) to apply, in order
+        """
+        if not self.can_redo():
+            return []
+        _, changes = self.events[self.position - self.base]
+        self.position += 1
+        redo = [(field, index, new) for field, index, _, new in changes]
+        for field, index, value in redo:
+            self._set(field, index, value)
+        return redo
+
+    def _cost(self, start, stop):
+        """Number of changes between two steps"""
+        low, high = min(start, stop), max(start, stop)
+        return sum(len(self.events[step - self.base][1]) for step in range(low, high))
+
+    def jump(self, step):
+        """
+        Move to any recorded step, either by undo/redo from the current position or from
+        the closest snapshot, whichever touches fewer cells
+        Returns (snapshot, changes) - snapshot is None or (allocation, request, available, status)
+        to load first, changes is a list of (field, index, value) to apply afterwards
+        """
+        step = min(max(step, self.base), self.last_step)
+        snapshot_step = max(s for s in self.snapshots if s <= step)
+
+        restore_cost = self.state.num_processes + self._cost(snapshot_step, step)
+        if restore_cost < self._cost(self.position, step):
+            self._restore(self.snapshots[snapshot_step])
+            self.position = snapshot_step
+            loaded = self.current_state()
+        else:
+            loaded = None
+
+        changes = []
+        while self.position < step:
+            changes.extend(self.redo())
+        while self.position > step:
+            changes.extend(self.undo())
+        return loaded, changes
+
+    def current_state(self):
+        """Returns (allocation, request, available, status) of the current step as lists"""
+        allocation, request, available = self.state.to_matrices()
+        return allocation, request, available, list(self.status)
+
+    def nbytes(self):
+        """Rough memory use of events and snapshots (shared rows counted once)"""
+        seen = set()
+        total = 0
+        for snapshot in self.snapshots.values():
+            for rows in snapshot[:2]:
+                total += 8 * len(rows)
+                for row in rows:
+                    if id(row) not in seen:
+                        seen.add(id(row))
+                        total += row.bit_length() // 8 + 28
+        for _, changes in self.events:
+            total += 64 * len(changes)
+        return total
@@ -0,0 +1,281 @@
+"""
+Incremental deadlock detection for SINGLE INSTANCE resources
+"""
+
+import heapq
+
+import numpy as np
+
+
+class IncrementalDeadlockDetector:
+    """
+    Incremental deadlock detection for SINGLE INSTANCE resources
+    Keeps the process/resource wait-for graph and the finish state between calls,
+    so a change to a few cells only re-evaluates the processes it affects
+    """
+    def __init__(self, allocation, request, available):
+        self.load(allocation, request, available)
+    
+    def load(self, allocation, request, available):
+        """Rebuild the graph and finish state from full matrices"""
+        # Nested lists without processes or resources come in as 1-D arrays
+        n, m = len(allocation), len(available)
+        allocation = np.asarray(allocation, dtype=bool).reshape(n, m)
+        request = np.asarray(request, dtype=bool).reshape(n, m)
+        self.num_processes = n
+        self.num_resources = m
+        
+        # Wait-for graph as process -> resources and resource -> processes adjacency
+        self.held = [set(np.flatnonzero(row).tolist()) for row in allocation]
+        self.requested = [set(np.flatnonzero(row).tolist()) for row in request]
+        self.holders = [set(np.flatnonzero(col).tolist()) for col in allocation.T]
+        self.requesters = [set(np.flatnonzero(col).tolist()) for col in request.T]
+        self.available = np.asarray(available, dtype=bool).tolist()
+        
+        # finished_holders[j] = number of finished processes holding resource j
+        # missing[i] = number of requested resources that are not satisfied yet
+        self.finish = [False] * n
+        self.blocked = set(range(n))
+        self.finished_holders = [0] * m
+        self.missing = [sum(1 for j in self.requested[i] if not self.available[j]) for i in range(n)]
+        
+        # Processes whose finish state changed (only recorded while a list is set)
+        self.journal = None
+        
+        self._rederive(range(n))
+    
+    def is_satisfied(self, resource):
+        """A resource is in the work vector if it is available or held by a finished process"""
+        return self.available[resource] or self.finished_holders[resource] > 0
+    
+    def deadlocked(self):
+        """Returns list of deadlocked processes for the current state"""
+        return sorted(self.blocked)
+    
+    # Finish propagation
+    def _finish(self, pid, worklist):
+        self.finish[pid] = True
+        self.blocked.discard(pid)
+        if self.journal is not None:
+            self.journal.append(pid)
+        for j in self.held[pid]:
+            self.finished_holders[j] += 1
+            if self.finished_holders[j] == 1 and not self.available[j]:
+                self._satisfy(j, worklist)
+    
+    def _satisfy(self, resource, worklist):
+        for pid in self.requesters[resource]:
+            self.missing[pid] -= 1
+            if self.missing[pid] == 0:
+                worklist.append(pid)
+    
+    def _withdraw_support(self, resource, queue):
+        """Called after a resource lost one of its supports (availability or a finished holder)"""
+        if not self.is_satisfied(resource):
+            for pid in self.requesters[resource]:
+                self.missing[pid] += 1
+        
+        # Finished requesters may have been derived through the lost support
+        queue.extend(pid for pid in self.requesters[resource] if self.finish[pid] and self.held[pid])
+    
+    def _rederive(self, candidates):
+        worklist = list(candidates)
+        while worklist:
+            pid = worklist.pop()
+            if self.finish[pid] or (self.held[pid] and self.missing[pid]):
+                continue
+            self._finish(pid, worklist)
+    
+    def _retract(self, seeds):
+        """
+        Un-finish the seed processes and every finished process that depended on them
+        Returns the retracted processes so they can be re-derived after the change
+        """
+        queue = list(seeds)
+        retracted = []
+        while queue:
+            pid = queue.pop()
+            if not self.finish[pid]:
+                continue
+            self.finish[pid] = False
+            self.blocked.add(pid)
+            retracted.append(pid)
+            if self.journal is not None:
+                self.journal.append(pid)
+            for j in self.held[pid]:
+                self.finished_holders[j] -= 1
+                self._withdraw_support(j, queue)
+        return retracted
+    
+    # Cell updates
+    def set_request_row(self, pid, row):
+        """Replace the request row of a process given as a list of 0/1 values"""
+        wanted = {j for j, value in enumerate(row) if value}
+        self._update_requests(pid, wanted - self.requested[pid], self.requested[pid] - wanted)
+    
+    def set_request(self, pid, resource, value):
+        if value:
+            self._update_requests(pid, {resource} - self.requested[pid], set())
+        else:
+            self._update_requests(pid, set(), {resource} & self.requested[pid])
+    
+    def _update_requests(self, pid, added, removed):
+        if not added and not removed:
+            return
+        
+        # New requests can invalidate the finish state of the process and its dependents
+        retracted = self._retract([pid]) if added else []
+        
+        for j in added:
+            self.requested[pid].add(j)
+            self.requesters[j].add(pid)
+            if not self.is_satisfied(j):
+                self.missing[pid] += 1
+        for j in removed:
+            self.requested[pid].discard(j)
+            self.requesters[j].discard(pid)
+            if not self.is_satisfied(j):
+                self.missing[pid] -= 1
+        
+        self._rederive(retracted + [pid])
+    
+    def set_allocation(self, pid, resource, value):
+        if bool(value) == (resource in self.held[pid]):
+            return
+        
+        if value:
+            # The process now has to wait for its own requests before releasing anything
+            retracted = self._retract([pid])
+            self.held[pid].add(resource)
+            self.holders[resource].add(pid)
+        else:
+            retracted = []
+            self.held[pid].discard(resource)
+            self.holders[resource].discard(pid)
+            if self.finish[pid]:
+                self.finished_holders[resource] -= 1
+                queue = []
+                self._withdraw_support(resource, queue)
+                retracted = self._retract(queue)
+        
+        self._rederive(retracted + [pid])
+    
+    def set_available(self, resource, value):
+        if bool(value) == self.available[resource]:
+            return
+        
+        before = self.is_satisfied(resource)
+        self.available[resource] = bool(value)
+        
+        if not value:
+            queue = []
+            self._withdraw_support(resource, queue)
+            self._rederive(self._retract(queue))
+        elif not before:
+            worklist = []
+            self._satisfy(resource, worklist)
+            self._rederive(worklist)
+    
+    # Recovery actions (same effect as DeadlockDetectorSingleInstance recoveries)
+    def terminate(self, pid):
+        """Release all resources of a process and clear its requests"""
+        self._update_requests(pid, set(), set(self.requested[pid]))
+        for j in list(self.held[pid]):
+            self.set_available(j, 1)
+            self.set_allocation(pid, j, 0)
+    
+    def preempt(self, pid, resource):
+        """Take a resource from its holder, make it available and let the holder request it back"""
+        self.set_available(resource, 1)
+        self.set_allocation(pid, resource, 0)
+        self.set_request(pid, resource, 1)
+    
+    def recover_until_deadlock_free(self, strategy="termination", max_actions=None):
+        """
+        Apply a recovery strategy until no process is deadlocked (or no action helps anymore)
+        Victims are chosen like DeadlockDetectorSingleInstance.recover_by_* does:
+        termination - deadlocked process with the most requests (first on ties)
+        preemption  - resource most requested by deadlocked processes (first on ties), taken from its holder
+        The deadlocked set and the victim counters are updated from the changed processes only
+        Returns action log - list of dicts with action, process, resource and deadlocked (count after the action)
+        """
+        if strategy not in ("termination", "preemption"):
+            raise ValueError(f"unknown recovery strategy {strategy!r}")
+        
+        # Deadlocked processes whose requests are counted in the victim counters
+        counted = set()
+        demand = [0] * self.num_resources  # demand[j] = deadlocked processes requesting resource j
+        heap = []
+        
+        def count(pid):
+            if pid in counted or self.finish[pid]:
+                return
+            counted.add(pid)
+            if strategy == "termination":
+                heapq.heappush(heap, (-len(self.requested[pid]), pid))
+                return
+            for j in self.requested[pid]:
+                demand[j] += 1
+                heapq.heappush(heap, (-demand[j], j))
+        
+        def uncount(pid):
+            if pid not in counted:
+                return
+            counted.discard(pid)
+            if strategy == "preemption":
+                for j in self.requested[pid]:
+                    demand[j] -= 1
+                    heapq.heappush(heap, (-demand[j], j))
+        
+        def sync():
+            changed, self.journal = self.journal, []
+            for pid in changed:
+                if self.finish[pid]:
+                    uncount(pid)
+                else:
+                    count(pid)
+        
+        def next_victim():
+            # Lazy heap: skip entries that are out of date
+            while heap:
+                key, item = heap[0]
+                if strategy == "termination":
+                    if item in counted and -key == len(self.requested[item]):
+                        return item
+                elif -key == demand[item] and demand[item] > 0:
+                    return item
+                heapq.heappop(heap)
+            return None
+        
+        for pid in self.blocked:
+            count(pid)
+        self.journal = []
+        log = []
+        try:
+            while self.blocked and (max_actions is None or len(log) < max_actions):
+                if strategy == "termination":
+                    pid = next_victim()
+                    if pid is None:
+                        break
+                    resource = None
+                    uncount(pid)
+                    self.terminate(pid)
+                else:
+                    resource = next_victim()
+                    if resource is None or not self.holders[resource]:
+                        # Nothing to preempt - this strategy can't resolve the deadlock
+                        break
+                    pid = min(self.holders[resource])
+                    uncount(pid)
+                    self.preempt(pid, resource)
+                    count(pid)
+                sync()
+                log.append({
+                    "action": "terminate" if strategy == "termination" else "preempt",
+                    "process": pid,
+                    "resource": resource,
+                    "deadlocked": len(self.blocked),
+                })
+        finally:
+            self.journal = None
+        return log
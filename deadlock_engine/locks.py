@@ -0,0 +1,409 @@
+"""
+Runtime deadlock detection for threading locks
+
+Drop-in replacements for threading.Lock, RLock and Condition that record who holds
+and who waits for every lock. Threads are the processes and locks the SINGLE
+INSTANCE resources of the detector's model.
+
+Nothing is locked or queued to record an edge: an acquire stores its thread in the
+lock (holder edge), a thread that has to block stores the lock in its own thread
+record (waiter edge) until it gets it. A LockWatcher thread samples the waiter edges
+every interval, builds the allocation/request state of the waiting threads and the
+holders of their locks and runs DeadlockDetectorSingleInstance on it.
+
+Usage:
+    from deadlock_engine import locks
+    watcher = locks.install(interval=1.0, on_deadlock=print)   # patches threading
+    ...
+    locks.uninstall()
+
+or without patching, with locks.Lock() etc. created explicitly and a
+LockWatcher(...).start() running.
+"""
+
+import itertools
+import os
+import sys
+import threading
+import time
+import weakref
+from _thread import allocate_lock, get_ident
+
+from .detector import DeadlockDetectorSingleInstance
+from .sparse import SparseSystemState
+
+# Originals, restored by uninstall()
+_ORIGINALS = {"Lock": threading.Lock, "RLock": threading.RLock, "Condition": threading.Condition}
+
+_lock_ids = itertools.count()
+_thread_ids = itertools.count()
+
+# Thread records by number, a record leaves with its thread
+_local = threading.local()
+_records = {}
+
+
+class _Alive:
+    """Only referenced from the thread's local storage, so it dies with the thread"""
+    __slots__ = ("__weakref__",)
+
+
+class _ThreadRecord:
+    """
+    A thread as seen by the watcher
+    waiting is None or (lock, monotonic start) while the thread blocks in an acquire.
+    The label is filled in by the watcher: a thread can take its first locks while
+    threading is still starting it, before current_thread() knows it
+    """
+    __slots__ = ("ident", "number", "label", "waiting", "alive", "__weakref__")
+
+    def __init__(self):
+        self.ident = get_ident()
+        self.number = next(_thread_ids)
+        self.label = None
+        self.waiting = None
+
+
+def _register():
+    record = _local.record = _ThreadRecord()
+    alive = _local.alive = _Alive()
+    number = record.number
+    record.alive = weakref.ref(alive, lambda _: _records.pop(number, None))
+    _records[number] = record
+    return record
+
+
+def _label(kind, name):
+    """Lock label: the given name or the creation site, plus a unique number"""
+    if name is None:
+        frame = sys._getframe(2)
+        name = f"{kind} {os.path.basename(frame.f_code.co_filename)}:{frame.f_lineno}"
+    return f"{name} #{next(_lock_ids)}"
+
+
+class Lock:
+    """
+    threading.Lock that records its holder
+    The uncontended acquire is a non-blocking acquire plus one attribute store; only an
+    acquire that has to block marks its thread as waiting
+    """
+    __slots__ = ("_lock", "_owner", "label", "__weakref__")
+
+    def __init__(self, name=None):
+        self._lock = allocate_lock()
+        self._owner = None
+        self.label = _label("Lock", name)
+
+    def acquire(self, blocking=True, timeout=-1):
+        if self._lock.acquire(False):
+            try:
+                self._owner = _local.record
+            except AttributeError:
+                self._owner = _register()
+            return True
+        if not blocking:
+            return False
+
+        try:
+            record = _local.record
+        except AttributeError:
+            record = _register()
+        record.waiting = (self, time.monotonic())
+        try:
+            acquired = self._lock.acquire(True, timeout)
+        finally:
+            record.waiting = None
+        if acquired:
+            self._owner = record
+        return acquired
+
+    def release(self):
+        # A Lock may be released by any thread
+        self._owner = None
+        self._lock.release()
+
+    def locked(self):
+        return self._lock.locked()
+
+    def _is_owned(self):
+        # Same answer as threading.Condition's fallback, without acquiring the lock
+        return self._lock.locked()
+
+    def _at_fork_reinit(self):
+        self._lock = allocate_lock()
+        self._owner = None
+
+    __enter__ = acquire
+
+    def __exit__(self, exc_type, exc, tb):
+        self._owner = None
+        self._lock.release()
+
+    def __repr__(self):
+        return f"<{'locked' if self.locked() else 'unlocked'} instrumented Lock {self.label}>"
+
+
+class RLock:
+    """
+    threading.RLock that records its holder (the recursion level is kept here)
+    Like Lock, an acquire or release that doesn't block is a few attribute operations
+    and one thread-local lookup
+    """
+    __slots__ = ("_lock", "_owner", "_count", "label", "__weakref__")
+
+    def __init__(self, name=None):
+        self._lock = allocate_lock()
+        self._owner = None
+        self._count = 0
+        self.label = _label("RLock", name)
+
+    def acquire(self, blocking=True, timeout=-1):
+        try:
+            record = _local.record
+        except AttributeError:
+            record = _register()
+        if self._owner is record:
+            self._count += 1
+            return True
+        if self._lock.acquire(False):
+            self._owner = record
+            self._count = 1
+            return True
+        if not blocking:
+            return False
+
+        record.waiting = (self, time.monotonic())
+        try:
+            acquired = self._lock.acquire(True, timeout)
+        finally:
+            record.waiting = None
+        if acquired:
+            self._owner = record
+            self._count = 1
+        return acquired
+
+    def release(self):
+        try:
+            record = _local.record
+        except AttributeError:
+            record = None
+        if record is None or self._owner is not record:
+            raise RuntimeError("cannot release un-acquired lock")
+        self._count -= 1
+        if not self._count:
+            self._owner = None
+            self._lock.release()
+
+    # Condition support (wait() releases every level at once)
+    def _is_owned(self):
+        return self._owner is not None and self._owner is getattr(_local, "record", None)
+
+    def _release_save(self):
+        if not self._is_owned():
+            raise RuntimeError("cannot release un-acquired lock")
+        count = self._count
+        self._count = 0
+        self._owner = None
+        self._lock.release()
+        return count
+
+    def _acquire_restore(self, count):
+        self.acquire()
+        self._count = count
+
+    def _at_fork_reinit(self):
+        self._lock = allocate_lock()
+        self._owner = None
+        self._count = 0
+
+    __enter__ = acquire
+
+    def __exit__(self, exc_type, exc, tb):
+        # Same as release, without another call
+        try:
+            record = _local.record
+        except AttributeError:
+            record = None
+        if record is None or self._owner is not record:
+            raise RuntimeError("cannot release un-acquired lock")
+        self._count -= 1
+        if not self._count:
+            self._owner = None
+            self._lock.release()
+
+    def __repr__(self):
+        return f"<instrumented RLock {self.label} count={self._count}>"
+
+
+class Condition(_ORIGINALS["Condition"]):
+    """
+    threading.Condition over an instrumented RLock by default
+    A thread inside wait() doesn't wait for any holder; the re-acquire afterwards is
+    recorded like any other acquire
+    """
+    def __init__(self, lock=None):
+        super().__init__(RLock() if lock is None else lock)
+
+
+class LockWatcher:
+    """
+    Background thread running single-instance detection on the live lock state
+    The edges are read while the other threads run, so a sample can mix moments. Only
+    waits that were already going on at the previous poll count: a thread blocked since
+    then can't have released anything, so a cycle of such threads is a real deadlock
+    (reported one interval after it forms, never a false one)
+    Every new deadlock is passed to on_deadlock(report) from the watcher thread
+    """
+    def __init__(self, interval=1.0, on_deadlock=None):
+        self.interval = interval
+        self.on_deadlock = on_deadlock
+        self.deadlocks = []
+        self._waits = {}
+        self._reported = frozenset()
+        self._stop = None
+        self._thread = None
+
+    def start(self):
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._run, name="deadlock-watcher", daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self):
+        if self._thread is None:
+            return
+        self._stop.set()
+        self._thread.join()
+        self._thread = None
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, *args):
+        self.stop()
+
+    def _run(self):
+        while not self._stop.wait(self.interval):
+            self.poll()
+
+    def poll(self):
+        """
+        Sample the wait edges and run detection on the waits seen at the previous poll too
+        Returns the new deadlock report or None
+        """
+        previous = self._waits
+        current = {}
+        for record in list(_records.values()):
+            waiting = record.waiting
+            if waiting is not None:
+                current[record] = waiting
+        self._waits = current
+
+        # The same (lock, start) tuple object = the same wait
+        waits = {record: waiting[0] for record, waiting in current.items() if previous.get(record) is waiting}
+        deadlocked = self._detect(waits)
+        if not deadlocked:
+            self._reported = frozenset()
+            return None
+        if deadlocked == self._reported:
+            return None
+        self._reported = deadlocked
+
+        report = self._report(waits, deadlocked, current)
+        self.deadlocks.append(report)
+        if self.on_deadlock is not None:
+            self.on_deadlock(report)
+        return report
+
+    def _detect(self, waits):
+        """Returns frozenset of deadlocked thread records among the waiting ones"""
+        if not waits:
+            return frozenset()
+
+        threads = {}
+        locks = {}
+        requested = ([], [])
+        allocated = ([], [])
+        for record, lock in waits.items():
+            pid = threads.setdefault(record, len(threads))
+            if lock not in locks:
+                rid = locks[lock] = len(locks)
+                owner = lock._owner
+                if owner is not None:
+                    allocated[0].append(threads.setdefault(owner, len(threads)))
+                    allocated[1].append(rid)
+            requested[0].append(pid)
+            requested[1].append(locks[lock])
+
+        state = SparseSystemState.from_pairs(len(threads), len(locks), allocated, requested)
+        detector = DeadlockDetectorSingleInstance(len(threads), len(locks))
+        found = set(detector.detect_deadlock(state))
+        return frozenset(record for record, pid in threads.items() if pid in found)
+
+    def _report(self, waits, deadlocked, current):
+        """Deadlock report: one cycle (thread -> lock it waits for -> holder ...) and every deadlocked thread"""
+        label = self._labeler()
+
+        # Follow the wait edges from any deadlocked thread until one repeats
+        path = []
+        seen = {}
+        record = next(iter(deadlocked))
+        while record not in seen:
+            seen[record] = len(path)
+            path.append(record)
+            record = waits[record]._owner
+        cycle = path[seen[record]:]
+
+        now = time.monotonic()
+        return {
+            "cycle": [label(r) for r in cycle],
+            "locks": [waits[r].label for r in cycle],
+            "deadlocked": sorted(label(r) for r in deadlocked),
+            "waiting_for": max(now - current[r][1] for r in cycle),
+        }
+
+    @staticmethod
+    def _labeler():
+        """Returns label(record), naming the records that don't have a label yet"""
+        names = None
+
+        def label(record):
+            nonlocal names
+            if record.label is None:
+                if names is None:
+                    names = {thread.ident: thread.name for thread in threading.enumerate()}
+                name = names.get(record.ident)
+                if name is None:
+                    return f"thread {record.ident} #{record.number}"
+                record.label = f"{name} #{record.number}"
+            return record.label
+        return label
+
+
+_watcher = None
+
+
+def install(interval=1.0, on_deadlock=None):
+    """
+    Replace threading.Lock/RLock/Condition by the instrumented classes and start a watcher
+    Only locks created afterwards are instrumented
+    Returns the LockWatcher
+    """
+    global _watcher
+    if _watcher is not None:
+        raise RuntimeError("lock instrumentation is already installed")
+    threading.Lock = Lock
+    threading.RLock = RLock
+    threading.Condition = Condition
+    _watcher = LockWatcher(interval, on_deadlock).start()
+    return _watcher
+
+
+def uninstall():
+    """Restore the threading classes and stop the watcher (instrumented locks keep working)"""
+    global _watcher
+    for name, value in _ORIGINALS.items():
+        setattr(threading, name, value)
+    if _watcher is not None:
+        _watcher.stop()
+        _watcher = None
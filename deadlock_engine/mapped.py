@@ -0,0 +1,198 @@
+"""
+Out-of-core SINGLE INSTANCE system state: bit-packed matrices in memory-mapped files
+
+A state directory holds
+    header.json     format name, version, number of processes and resources
+    allocation.npy  n x ceil(m/8) uint8, rows bit-packed little-endian (bit j = resource j)
+    request.npy     n x ceil(m/8) uint8, same packing
+    available.npy   ceil(m/8) uint8
+
+Nothing is read as a whole: the detector streams over the rows in blocks of block_rows,
+so resident memory is a few blocks plus O(n) per-process flags, never O(n*m).
+"""
+
+import json
+import os
+
+import numpy as np
+
+FORMAT_NAME = "deadlock-mapped-state"
+FORMAT_VERSION = 1
+
+# Default block size of the row streams (bytes per matrix)
+BLOCK_BYTES = 16 << 20
+
+# Number of set bits of every byte value
+POPCOUNT = np.array([bin(b).count("1") for b in range(256)], dtype=np.uint8)
+
+
+class MappedSystemState:
+    """
+    Disk-backed counterpart of PackedSystemState
+    allocation/request/available are numpy memmaps of the packed bytes; single cells are
+    read and written in place, whole rows and columns only through the block streams
+    """
+    def __init__(self, directory, mode="r+", block_rows=None):
+        with open(os.path.join(directory, "header.json")) as f:
+            header = json.load(f)
+        if header.get("format") != FORMAT_NAME:
+            raise ValueError(f"{directory} is not a mapped state directory")
+        if header.get("version", 0) > FORMAT_VERSION:
+            raise ValueError(f"mapped state version {header['version']} is newer than supported ({FORMAT_VERSION})")
+
+        self.directory = directory
+        self.num_processes = header["num_processes"]
+        self.num_resources = header["num_resources"]
+        self.row_bytes = (self.num_resources + 7) // 8
+        self.block_rows = block_rows or max(1, BLOCK_BYTES // max(1, self.row_bytes))
+
+        self.allocation = self._open("allocation.npy", mode)
+        self.request = self._open("request.npy", mode)
+        self.available = self._open("available.npy", mode)
+
+    def _open(self, name, mode):
+        return np.lib.format.open_memmap(os.path.join(self.directory, name), mode=mode)
+
+    @classmethod
+    def create(cls, directory, num_processes, num_resources, block_rows=None):
+        """Create an empty state directory (files are sized up front, not written)"""
+        os.makedirs(directory, exist_ok=True)
+        row_bytes = (num_resources + 7) // 8
+        for name, shape in (("allocation.npy", (num_processes, row_bytes)),
+                            ("request.npy", (num_processes, row_bytes)),
+                            ("available.npy", (row_bytes,))):
+            array = np.lib.format.open_memmap(os.path.join(directory, name), mode="w+", dtype=np.uint8, shape=shape)
+            del array
+
+        header = {
+            "format": FORMAT_NAME,
+            "version": FORMAT_VERSION,
+            "num_processes": num_processes,
+            "num_resources": num_resources,
+            "bitorder": "little",
+        }
+        with open(os.path.join(directory, "header.json"), "w") as f:
+            json.dump(header, f)
+        return cls(directory, "r+", block_rows)
+
+    @classmethod
+    def from_matrices(cls, directory, allocation, request, available, block_rows=None):
+        """Write 0/1 matrices (nested lists or arrays) to a new state directory"""
+        n, m = len(allocation), len(available)
+        allocation = np.asarray(allocation, dtype=bool).reshape(n, m)
+        request = np.asarray(request, dtype=bool).reshape(n, m)
+        state = cls.create(directory, n, m, block_rows)
+        for start, stop in state.blocks():
+            state._write_window("allocation", start, np.packbits(allocation[start:stop], axis=1, bitorder="little"))
+            state._write_window("request", start, np.packbits(request[start:stop], axis=1, bitorder="little"))
+        state.available[:] = np.packbits(np.asarray(available, dtype=bool), bitorder="little")
+        state.flush()
+        return state
+
+    @classmethod
+    def from_saved_state(cls, directory, saved, block_rows=None):
+        """Copy a SavedState (see storage.load_state) into a new state directory block by block"""
+        state = cls.create(directory, saved.num_processes, saved.num_resources, block_rows)
+        for start, stop in state.blocks():
+            state._write_window("allocation", start, saved.allocation_bits[start:stop])
+            state._write_window("request", start, saved.request_bits[start:stop])
+        state.available[:] = saved.available_bits
+        state.flush()
+        return state
+
+    def flush(self):
+        for array in (self.allocation, self.request, self.available):
+            array.flush()
+
+    # Row blocks
+    def blocks(self):
+        """Yields (start, stop) row ranges of at most block_rows rows"""
+        for start in range(0, self.num_processes, self.block_rows):
+            yield start, min(start + self.block_rows, self.num_processes)
+
+    def read_blocks(self, rows=None, matrices=("allocation", "request")):
+        """
+        Stream the rows of the given matrices block by block
+        Every block is copied out of a temporary mapping that is closed right away, so the
+        pages read don't stay resident; with rows (sorted process indices) only those rows
+        are copied and blocks without any of them are skipped
+        Yields (pids, block of the first matrix, block of the second matrix, ...)
+        """
+        if rows is not None:
+            rows = np.asarray(rows, dtype=np.int64)
+        for start, stop in self.blocks():
+            if rows is None:
+                pids = np.arange(start, stop)
+            else:
+                pids = rows[np.searchsorted(rows, start):np.searchsorted(rows, stop)]
+                if not len(pids):
+                    continue
+            yield (pids, *(self._read_window(name, start, stop, pids - start) for name in matrices))
+
+    def _read_window(self, name, start, stop, index):
+        array = getattr(self, name)
+        window = np.memmap(array.filename, dtype=np.uint8, mode="r",
+                           offset=array.offset + start * self.row_bytes, shape=(stop - start, self.row_bytes))
+        block = window[index]
+        del window
+        return block
+
+    def _write_window(self, name, start, block):
+        array = getattr(self, name)
+        window = np.memmap(array.filename, dtype=np.uint8, mode="r+",
+                           offset=array.offset + start * self.row_bytes, shape=block.shape)
+        window[:] = block
+        window.flush()
+        del window
+
+    # Cells
+    def is_allocated(self, pid, resource):
+        return (int(self.allocation[pid, resource >> 3]) >> (resource & 7)) & 1
+
+    def is_requested(self, pid, resource):
+        return (int(self.request[pid, resource >> 3]) >> (resource & 7)) & 1
+
+    def is_available(self, resource):
+        return (int(self.available[resource >> 3]) >> (resource & 7)) & 1
+
+    @staticmethod
+    def _set_bit(array, index, bit, value):
+        if value:
+            array[index] |= np.uint8(1 << bit)
+        else:
+            array[index] &= np.uint8(~(1 << bit) & 0xFF)
+
+    def set_allocation(self, pid, resource, value):
+        self._set_bit(self.allocation, (pid, resource >> 3), resource & 7, value)
+
+    def set_request(self, pid, resource, value):
+        self._set_bit(self.request, (pid, resource >> 3), resource & 7, value)
+
+    def set_available(self, resource, value):
+        self._set_bit(self.available, resource >> 3, resource & 7, value)
+
+    # Rows
+    def allocated_count(self, pid):
+        return int(POPCOUNT[self.allocation[pid]].sum())
+
+    def requested_count(self, pid):
+        return int(POPCOUNT[self.request[pid]].sum())
+
+    def release_process(self, pid):
+        """Terminate a process: its resources become available and its requests are dropped"""
+        self.available |= self.allocation[pid]
+        self.allocation[pid] = 0
+        self.request[pid] = 0
+
+    def to_matrices(self):
+        """Returns (allocation, request, available) as nested 0/1 lists (small states only)"""
+        m = self.num_resources
+        return (
+            np.unpackbits(self.allocation, axis=1, count=m, bitorder="little").tolist(),
+            np.unpackbits(self.request, axis=1, count=m, bitorder="little").tolist(),
+            np.unpackbits(self.available, count=m, bitorder="little").tolist(),
+        )
+
+    def nbytes(self):
+        """Size of the packed bits on disk"""
+        return self.row_bytes * (2 * self.num_processes + 1)
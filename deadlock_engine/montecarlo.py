@@ -0,0 +1,250 @@
+"""
+Parallel Monte Carlo deadlock-probability sweep for SINGLE INSTANCE resources
+
+Usage:
+    python -m deadlock_engine.montecarlo --processes 5,10,20 --resources 3,8 \
+        --density 0.1,0.3,0.5 --trials 1000000 --output sweep.csv
+"""
+
+import argparse
+import csv
+import os
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+
+RECOVERY_STRATEGIES = ("termination", "preemption")
+
+RESULT_FIELDS = [
+    "processes",
+    "resources",
+    "density",
+    "trials",
+    "deadlocks",
+    "deadlock_rate",
+    "mean_deadlocked",
+    "termination_mean_steps",
+    "preemption_mean_steps",
+    "preemption_failure_rate",
+]
+
+
+def generate_batch(rng, batch, num_processes, num_resources, density):
+    """
+    Generate a batch of random SINGLE INSTANCE configurations
+    Each resource is held by one random process with probability density,
+    each process requests each resource it does not hold with probability density
+    Returns boolean allocation (B x n x m), request (B x n x m) and available (B x m)
+    """
+    n, m = num_processes, num_resources
+    held = rng.random((batch, m)) < density
+    holder = rng.integers(0, n, (batch, m))
+
+    allocation = np.zeros((batch, n, m), dtype=bool)
+    b, j = np.nonzero(held)
+    allocation[b, holder[b, j], j] = True
+
+    request = (rng.random((batch, n, m)) < density) & ~allocation
+    available = ~held
+    return allocation, request, available
+
+
+def detect_deadlock_batch(allocation, request, available):
+    """
+    Single instance deadlock detection over a batch of configurations
+    Returns boolean (B x n) array, True where the process is deadlocked
+    """
+    work = available.copy()
+    finish = ~allocation.any(axis=2)
+
+    while True:
+        can_finish = ~finish & ~(request & ~work[:, None, :]).any(axis=2)
+        if not can_finish.any():
+            break
+        finish |= can_finish
+        work |= (allocation & can_finish[:, :, None]).any(axis=1)
+
+    return ~finish
+
+
+def recover_batch(strategy, allocation, request, available, deadlocked):
+    """
+    Apply a recovery strategy until every configuration of the batch is deadlock-free
+    Victims are chosen like DeadlockDetectorSingleInstance.recover_by_* does
+    Returns (steps, failed) per configuration
+    """
+    allocation = allocation.copy()
+    request = request.copy()
+    available = available.copy()
+    batch = allocation.shape[0]
+
+    steps = np.zeros(batch, dtype=np.int64)
+    failed = np.zeros(batch, dtype=bool)
+
+    active = deadlocked.any(axis=1)
+    while active.any():
+        idx = np.flatnonzero(active)
+        dead = deadlocked[idx]
+
+        if strategy == "termination":
+            # Victim = deadlocked process with the most requests (first on ties)
+            counts = np.where(dead, request[idx].sum(axis=2), -1)
+            victim = counts.argmax(axis=1)
+            available[idx] |= allocation[idx, victim]
+            allocation[idx, victim] = False
+            request[idx, victim] = False
+        else:
+            # Resource most requested by deadlocked processes, taken from its holder
+            counts = (request[idx] & dead[:, :, None]).sum(axis=1)
+            resource = counts.argmax(axis=1)
+            column = allocation[idx, :, resource]
+            has_holder = column.any(axis=1)
+
+            # Without a holder the preemption can't do anything - recovery fails
+            failed[idx[~has_holder]] = True
+            idx = idx[has_holder]
+            resource = resource[has_holder]
+            holder = column[has_holder].argmax(axis=1)
+            allocation[idx, holder, resource] = False
+            request[idx, holder, resource] = True
+            available[idx, resource] = True
+
+        steps[idx] += 1
+        deadlocked[idx] = detect_deadlock_batch(allocation[idx], request[idx], available[idx])
+        active = deadlocked.any(axis=1) & ~failed
+
+    return steps, failed
+
+
+def run_task(task):
+    """
+    Worker entry point: simulate one chunk of trials for one grid point
+    Every task gets its own SeedSequence child, so results don't depend on the worker count
+    Returns (grid point, partial sums)
+    """
+    point, trials, batch, seed = task
+    num_processes, num_resources, density = point
+    rng = np.random.default_rng(seed)
+
+    totals = dict.fromkeys(
+        ["trials", "deadlocks", "deadlocked", "termination_steps",
+         "preemption_steps", "preemption_recovered", "preemption_failures"],
+        0,
+    )
+
+    remaining = trials
+    while remaining > 0:
+        size = min(batch, remaining)
+        remaining -= size
+        allocation, request, available = generate_batch(rng, size, num_processes, num_resources, density)
+        deadlocked = detect_deadlock_batch(allocation, request, available)
+
+        has_deadlock = deadlocked.any(axis=1)
+        totals["trials"] += size
+        totals["deadlocks"] += int(has_deadlock.sum())
+        totals["deadlocked"] += int(deadlocked.sum())
+        if not has_deadlock.any():
+            continue
+
+        # Recovery outcomes are only measured on the deadlocked configurations
+        subset = (allocation[has_deadlock], request[has_deadlock], available[has_deadlock])
+        steps, _ = recover_batch("termination", *subset, deadlocked[has_deadlock])
+        totals["termination_steps"] += int(steps.sum())
+
+        steps, failed = recover_batch("preemption", *subset, deadlocked[has_deadlock])
+        totals["preemption_steps"] += int(steps[~failed].sum())
+        totals["preemption_recovered"] += int((~failed).sum())
+        totals["preemption_failures"] += int(failed.sum())
+
+    return point, totals
+
+
+def summarize(point, totals):
+    """Turn the summed counters of one grid point into a result row"""
+    num_processes, num_resources, density = point
+    trials = totals["trials"]
+    deadlocks = totals["deadlocks"]
+    recovered = totals["preemption_recovered"]
+    return {
+        "processes": num_processes,
+        "resources": num_resources,
+        "density": density,
+        "trials": trials,
+        "deadlocks": deadlocks,
+        "deadlock_rate": deadlocks / trials if trials else 0.0,
+        "mean_deadlocked": totals["deadlocked"] / deadlocks if deadlocks else 0.0,
+        "termination_mean_steps": totals["termination_steps"] / deadlocks if deadlocks else 0.0,
+        "preemption_mean_steps": totals["preemption_steps"] / recovered if recovered else 0.0,
+        "preemption_failure_rate": totals["preemption_failures"] / deadlocks if deadlocks else 0.0,
+    }
+
+
+def run_sweep(processes, resources, densities, trials, workers=None, seed=0,
+              chunk_trials=50000, max_batch_cells=4_000_000):
+    """
+    Run the Monte Carlo sweep over the (n, m, density) grid on a process pool
+    Returns list of result rows (one per grid point)
+    """
+    grid = [(n, m, d) for n in processes for m in resources for d in densities]
+
+    tasks = []
+    for point in grid:
+        n, m, _ = point
+        batch = max(1, min(chunk_trials, max_batch_cells // (n * m)))
+        for start in range(0, trials, chunk_trials):
+            tasks.append([point, min(chunk_trials, trials - start), batch])
+
+    # Independent RNG streams for every task
+    for task, child in zip(tasks, np.random.SeedSequence(seed).spawn(len(tasks))):
+        task.append(child)
+
+    sums = {point: None for point in grid}
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        for point, totals in pool.map(run_task, tasks):
+            if sums[point] is None:
+                sums[point] = totals
+            else:
+                for key, value in totals.items():
+                    sums[point][key] += value
+
+    return [summarize(point, sums[point]) for point in grid]
+
+
+def write_results(rows, path):
+    """Write result rows as CSV"""
+    with open(path, "w", newline="") as f:
+        writer = csv.DictWriter(f, fieldnames=RESULT_FIELDS)
+        writer.writeheader()
+        writer.writerows(rows)
+
+
+def _int_list(value):
+    return [int(v) for v in value.split(",")]
+
+
+def _float_list(value):
+    return [float(v) for v in value.split(",")]
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Monte Carlo deadlock-probability sweep (single instance resources)")
+    parser.add_argument("--processes", type=_int_list, default=[5, 10], help="comma separated process counts")
+    parser.add_argument("--resources", type=_int_list, default=[3, 8], help="comma separated resource counts")
+    parser.add_argument("--density", type=_float_list, default=[0.1, 0.3, 0.5], help="comma separated densities")
+    parser.add_argument("--trials", type=int, default=100000, help="random configurations per grid point")
+    parser.add_argument("--workers", type=int, default=os.cpu_count(), help="worker processes")
+    parser.add_argument("--seed", type=int, default=0, help="root seed of the RNG streams")
+    parser.add_argument("--output", default="deadlock_sweep.csv", help="CSV file for the aggregated results")
+    args = parser.parse_args(argv)
+
+    rows = run_sweep(args.processes, args.resources, args.density, args.trials, args.workers, args.seed)
+    write_results(rows, args.output)
+
+    for row in rows:
+        print(f"n={row['processes']:<5} m={row['resources']:<5} density={row['density']:<5} "
+              f"deadlock rate={row['deadlock_rate']:.4f}")
+    print(f"Results written to {args.output}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,104 @@
+"""
+Deadlock detection & recovery algorithms for MULTI INSTANCE resources
+"""
+
+import numpy as np
+
+
+class DeadlockDetectorMultiInstance:
+    """
+    Deadlock detection for resources with several instances (connection slots, worker threads, ...)
+    allocation/request are integer (n x m) matrices, available is an integer vector of length m
+    """
+    def __init__(self, num_processes, num_resources):
+        self.num_processes = num_processes
+        self.num_resources = num_resources
+
+    def finish_order(self, allocation, request, available):
+        """
+        Run the general detection algorithm (Work/Finish with vector comparisons)
+        Returns (order, finish) - order lists processes in the order they can complete,
+        finish is a boolean array
+        """
+        allocation = np.asarray(allocation, dtype=np.int64)
+        request = np.asarray(request, dtype=np.int64)
+        work = np.array(available, dtype=np.int64)
+
+        # Finish[i] = true if process has no allocated resources
+        finish = ~allocation.any(axis=1)
+        order = np.flatnonzero(finish).tolist()
+
+        # short[i] = number of resource types where Request_i > Work
+        short = (request > work).sum(axis=1)
+
+        ready = ~finish & (short == 0)
+        while ready.any():
+            finish |= ready
+            order.extend(np.flatnonzero(ready).tolist())
+
+            # Work = Work + Allocation_i for every process that completes in this round,
+            # only the columns that grew can change the shortage counters
+            released = allocation[ready].sum(axis=0)
+            grown = np.flatnonzero(released)
+            if grown.size:
+                old_work = work[grown]
+                work[grown] += released[grown]
+                columns = request[:, grown]
+                short -= ((columns > old_work) & (columns <= work[grown])).sum(axis=1)
+            ready = ~finish & (short == 0)
+
+        return order, finish
+
+    def detect_deadlock(self, allocation, request, available):
+        """
+        Detect deadlock for MULTI INSTANCE resources
+        Returns list of deadlocked processes
+        """
+        _, finish = self.finish_order(allocation, request, available)
+        return np.flatnonzero(~finish).tolist()
+
+    def recover_by_process_termination(self, deadlocked, allocation, request, available):
+        """
+        Recover from deadlock by terminating the deadlocked process with the largest request
+        Returns modified matrices and the terminated process
+        """
+        allocation = np.array(allocation, dtype=np.int64)
+        request = np.array(request, dtype=np.int64)
+        available = np.array(available, dtype=np.int64)
+        if not deadlocked:
+            return allocation, request, available, []
+
+        # First process with the maximum number of requested instances
+        deadlocked = np.asarray(deadlocked)
+        terminated = int(deadlocked[request[deadlocked].sum(axis=1).argmax()])
+
+        # Release all instances of the terminated process
+        available += allocation[terminated]
+        allocation[terminated] = 0
+        request[terminated] = 0
+
+        return allocation, request, available, [terminated]
+
+    def recover_by_resource_preemption(self, deadlocked, allocation, request, available):
+        """
+        Recover from deadlock by preempting the resource type most requested by deadlocked processes
+        All instances are taken from the process holding most of them, which requests them back
+        Returns modified matrices and [(process, resource, instances)]
+        """
+        allocation = np.array(allocation, dtype=np.int64)
+        request = np.array(request, dtype=np.int64)
+        available = np.array(available, dtype=np.int64)
+        if not deadlocked:
+            return allocation, request, available, []
+
+        preempted_resource = int(request[deadlocked].sum(axis=0).argmax())
+        preempted_process = int(allocation[:, preempted_resource].argmax())
+        instances = int(allocation[preempted_process, preempted_resource])
+        if instances == 0:
+            return allocation, request, available, []
+
+        allocation[preempted_process, preempted_resource] = 0
+        request[preempted_process, preempted_resource] += instances
+        available[preempted_resource] += instances
+
+        return allocation, request, available, [(preempted_process, preempted_resource, instances)]
@@ -0,0 +1,94 @@
+"""
+Bit-packed system state for SINGLE INSTANCE resources
+"""
+
+import numpy as np
+
+
+class PackedSystemState:
+    """
+    Compact SINGLE INSTANCE system state
+    Each process row of allocation/request is a Python int bitmask (bit j = resource j),
+    available is a single bitmask over all resources
+    """
+    def __init__(self, num_processes, num_resources, allocation_rows=None, request_rows=None, available=0):
+        self.num_processes = num_processes
+        self.num_resources = num_resources
+        self.allocation_rows = list(allocation_rows) if allocation_rows is not None else [0] * num_processes
+        self.request_rows = list(request_rows) if request_rows is not None else [0] * num_processes
+        self.available = available
+    
+    @staticmethod
+    def pack_rows(matrix):
+        """Pack a 0/1 matrix (nested lists or array) into one int bitmask per row"""
+        matrix = np.atleast_2d(np.asarray(matrix, dtype=bool))
+        packed = np.packbits(matrix, axis=1, bitorder='little')
+        return [int.from_bytes(row.tobytes(), 'little') for row in packed]
+    
+    @staticmethod
+    def unpack_row(bits, num_resources):
+        """Unpack an int bitmask into a list of 0/1 values"""
+        return [(bits >> j) & 1 for j in range(num_resources)]
+    
+    @classmethod
+    def from_matrices(cls, allocation, request, available):
+        """Build a packed state from 0/1 allocation/request matrices and available vector"""
+        n, m = len(allocation), len(available)
+        allocation = np.asarray(allocation, dtype=bool).reshape(n, m)
+        request = np.asarray(request, dtype=bool).reshape(n, m)
+        return cls(
+            n, m,
+            cls.pack_rows(allocation),
+            cls.pack_rows(request),
+            cls.pack_rows(np.asarray(available, dtype=bool).reshape(1, m))[0]
+        )
+    
+    def to_matrices(self):
+        """Returns (allocation, request, available) as nested 0/1 lists"""
+        m = self.num_resources
+        allocation = [self.unpack_row(row, m) for row in self.allocation_rows]
+        request = [self.unpack_row(row, m) for row in self.request_rows]
+        available = self.unpack_row(self.available, m)
+        return allocation, request, available
+    
+    def is_allocated(self, pid, resource):
+        return (self.allocation_rows[pid] >> resource) & 1
+    
+    def is_requested(self, pid, resource):
+        return (self.request_rows[pid] >> resource) & 1
+    
+    def is_available(self, resource):
+        return (self.available >> resource) & 1
+    
+    def set_allocation(self, pid, resource, value):
+        if value:
+            self.allocation_rows[pid] |= 1 << resource
+        else:
+            self.allocation_rows[pid] &= ~(1 << resource)
+    
+    def set_request(self, pid, resource, value):
+        if value:
+            self.request_rows[pid] |= 1 << resource
+        else:
+            self.request_rows[pid] &= ~(1 << resource)
+    
+    def set_request_row(self, pid, row):
+        """Replace a whole request row given as a list of 0/1 values"""
+        self.request_rows[pid] = self.pack_rows([row])[0]
+    
+    def set_available(self, resource, value):
+        if value:
+            self.available |= 1 << resource
+        else:
+            self.available &= ~(1 << resource)
+    
+    def allocated_count(self, pid):
+        return self.allocation_rows[pid].bit_count()
+    
+    def requested_count(self, pid):
+        return self.request_rows[pid].bit_count()
+    
+    def nbytes(self):
+        """Approximate payload size of the packed bits (excluding list/int object headers)"""
+        row_bytes = (self.num_resources + 7) // 8
+        return row_bytes * (2 * self.num_processes + 1)
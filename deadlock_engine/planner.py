@@ -0,0 +1,163 @@
+"""
+Minimum-cost recovery planning: weighted feedback vertex sets of the wait-for graph
+"""
+
+import time
+from collections import deque
+
+
+def _restrict(wait_for, nodes):
+    """Adjacency of the subgraph induced by nodes (dict node -> set of successors)"""
+    return {v: {w for w in wait_for[v] if w in nodes and w != v} for v in nodes}
+
+
+def _reduce(graph, forced=()):
+    """
+    Drop nodes that can't be on a cycle (no successor or no predecessor) until none are left
+    Works in place, returns the graph
+    """
+    predecessors = {v: set() for v in graph}
+    for v, successors in graph.items():
+        for w in successors:
+            predecessors[w].add(v)
+
+    queue = deque(v for v in graph if not graph[v] or not predecessors[v])
+    while queue:
+        v = queue.popleft()
+        if v not in graph:
+            continue
+        for w in graph.pop(v):
+            predecessors[w].discard(v)
+            if w in graph and not predecessors[w]:
+                queue.append(w)
+        for u in predecessors.pop(v):
+            if u in graph:
+                graph[u].discard(v)
+                if not graph[u]:
+                    queue.append(u)
+    return graph
+
+
+def _without(graph, removed):
+    return {v: successors - removed for v, successors in graph.items() if v not in removed}
+
+
+def _shortest_cycle(graph):
+    """Shortest cycle of the graph by BFS from every node (used on small components only)"""
+    best = None
+    for root in graph:
+        parent = {root: None}
+        queue = deque([root])
+        while queue:
+            v = queue.popleft()
+            if best is not None and len(best) <= 2:
+                return best
+            for w in graph[v]:
+                if w == root:
+                    cycle = [v]
+                    while parent[cycle[-1]] is not None:
+                        cycle.append(parent[cycle[-1]])
+                    if best is None or len(cycle) < len(best):
+                        best = cycle[::-1]
+                    queue.clear()
+                    break
+                if w not in parent:
+                    parent[w] = v
+                    queue.append(w)
+    return best
+
+
+def exact_feedback_vertex_set(graph, weights, deadline=None):
+    """
+    Branch and bound over the nodes of a shortest cycle
+    In branch i the i-th cycle node is removed and the earlier ones are kept for good,
+    so every subset is visited at most once
+    Returns (set, cost) or None if the deadline was hit
+    """
+    best = [None, float("inf")]
+
+    def search(current, removed, cost, kept):
+        if deadline is not None and time.perf_counter() > deadline:
+            raise TimeoutError
+        current = _reduce(current)
+        if not current:
+            if cost < best[1]:
+                best[0], best[1] = set(removed), cost
+            return
+
+        cycle = _shortest_cycle(current)
+        candidates = [v for v in cycle if v not in kept]
+        if not candidates:
+            return
+
+        # Lower bound: at least the cheapest deletable node of this cycle
+        if cost + min(weights(v) for v in candidates) >= best[1]:
+            return
+
+        newly_kept = set()
+        for v in sorted(candidates, key=weights):
+            if cost + weights(v) < best[1]:
+                search(_without(current, {v}), removed | {v}, cost + weights(v), kept | newly_kept)
+            newly_kept.add(v)
+
+    try:
+        search(graph, set(), 0, set())
+    except TimeoutError:
+        return None
+    return best[0], best[1]
+
+
+def greedy_feedback_vertex_set(graph, weights):
+    """
+    Greedy heuristic: repeatedly delete the node with the best (in-degree * out-degree) / weight ratio,
+    then put back every deleted node that doesn't close a cycle again
+    Returns (set, cost)
+    """
+    current = _reduce({v: set(s) for v, s in graph.items()})
+    removed = []
+    while current:
+        in_degree = dict.fromkeys(current, 0)
+        for successors in current.values():
+            for w in successors:
+                in_degree[w] += 1
+        victim = max(current, key=lambda v: (in_degree[v] * len(current[v]) / weights(v), -v))
+        removed.append(victim)
+        current = _reduce(_without(current, {victim}))
+
+    # Redundancy elimination, most expensive nodes first
+    chosen = set(removed)
+    for v in sorted(removed, key=weights, reverse=True):
+        trial = chosen - {v}
+        if not _reduce(_without(graph, trial)):
+            chosen = trial
+    return chosen, sum(weights(v) for v in chosen)
+
+
+def minimum_feedback_vertex_set(wait_for, components, weights=None, exact_limit=16, time_limit=0.05):
+    """
+    Weighted feedback vertex set over the deadlocked strongly connected components
+    Components with at most exact_limit processes (after reduction) are solved exactly by
+    branch and bound within time_limit seconds each, larger ones (or timeouts) use the greedy heuristic
+    Returns sorted list of processes to terminate
+    """
+    if weights is None:
+        def weights(pid):
+            return 1
+    elif not callable(weights):
+        table = weights
+
+        def weights(pid):
+            return table[pid]
+
+    victims = set()
+    for component in components:
+        graph = _reduce(_restrict(wait_for, set(component)))
+        if not graph:
+            continue
+        result = None
+        if len(graph) <= exact_limit:
+            result = exact_feedback_vertex_set(graph, weights, time.perf_counter() + time_limit)
+        if result is None:
+            result = greedy_feedback_vertex_set(graph, weights)
+        victims |= result[0]
+    return sorted(victims)
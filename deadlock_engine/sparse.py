@@ -0,0 +1,215 @@
+"""
+Sparse SINGLE INSTANCE system state: allocation/request as CSR index arrays
+
+For systems where every process holds and requests a handful of resources out of
+thousands, only the nonzeros are stored. Everything here is vectorized over the
+nonzeros, nothing touches the n x m zeros.
+"""
+
+import numpy as np
+
+
+def gather(indptr, indices, rows):
+    """
+    Concatenated index lists of the given rows of a CSR structure
+    Returns (owner, values) - owner[k] is the position in rows that values[k] came from
+    """
+    rows = np.asarray(rows, dtype=np.int64)
+    starts = indptr[rows]
+    lengths = indptr[rows + 1] - starts
+    total = int(lengths.sum())
+    if not total:
+        return np.zeros(0, dtype=np.int64), np.zeros(0, dtype=np.int64)
+
+    owner = np.repeat(np.arange(len(rows)), lengths)
+    offsets = np.arange(total) - np.repeat(np.cumsum(lengths) - lengths, lengths)
+    return owner, indices[np.repeat(starts, lengths) + offsets]
+
+
+def stable_order(keys, limit):
+    """
+    Stable argsort of non-negative integer keys below limit
+    LSD radix sort over 16-bit digits (numpy sorts uint16 with a linear-time radix sort)
+    """
+    order = np.arange(len(keys))
+    shift = 0
+    while shift == 0 or limit >> shift:
+        digits = ((keys[order] >> shift) & 0xFFFF).astype(np.uint16)
+        order = order[np.argsort(digits, kind="stable")]
+        shift += 16
+    return order
+
+
+def transpose(indptr, indices, num_columns):
+    """
+    CSR of the transposed matrix by a radix sort over the nonzeros
+    Row indices inside every column stay sorted
+    Returns (indptr, indices)
+    """
+    rows = np.repeat(np.arange(len(indptr) - 1), np.diff(indptr))
+    order = stable_order(indices, num_columns)
+    counts = np.bincount(indices, minlength=num_columns)
+    t_indptr = np.zeros(num_columns + 1, dtype=np.int64)
+    np.cumsum(counts, out=t_indptr[1:])
+    return t_indptr, rows[order]
+
+
+def _csr_from_pairs(num_rows, rows, columns):
+    """CSR (indptr, indices) from coordinate pairs, duplicates dropped, columns sorted per row"""
+    rows = np.asarray(rows, dtype=np.int64)
+    columns = np.asarray(columns, dtype=np.int64)
+    if len(rows):
+        order = stable_order(columns, int(columns.max()) + 1)
+        order = order[stable_order(rows[order], num_rows)]
+        rows, columns = rows[order], columns[order]
+        keep = np.ones(len(rows), dtype=bool)
+        keep[1:] = (rows[1:] != rows[:-1]) | (columns[1:] != columns[:-1])
+        rows, columns = rows[keep], columns[keep]
+    indptr = np.zeros(num_rows + 1, dtype=np.int64)
+    np.cumsum(np.bincount(rows, minlength=num_rows), out=indptr[1:])
+    return indptr, columns
+
+
+class SparseSystemState:
+    """
+    Compact SINGLE INSTANCE system state for sparse systems
+    allocation/request are CSR structures (indptr of length n + 1, resource indices),
+    available is a boolean array of length m
+    The column views (resource -> holders / requesters) are built on first use and
+    dropped whenever a matrix changes
+    """
+    def __init__(self, num_processes, num_resources, allocation_indptr, allocation_indices,
+                 request_indptr, request_indices, available):
+        self.num_processes = num_processes
+        self.num_resources = num_resources
+        self.allocation_indptr = np.asarray(allocation_indptr, dtype=np.int64)
+        self.allocation_indices = np.asarray(allocation_indices, dtype=np.int64)
+        self.request_indptr = np.asarray(request_indptr, dtype=np.int64)
+        self.request_indices = np.asarray(request_indices, dtype=np.int64)
+        self.available = np.asarray(available, dtype=bool).copy()
+        self._holders = None
+        self._requesters = None
+
+    @classmethod
+    def from_pairs(cls, num_processes, num_resources, allocated, requested, available=None):
+        """
+        Build a state from nonzero positions
+        allocated/requested are (processes, resources) index arrays of equal length;
+        available defaults to every resource without a holder
+        """
+        allocation = _csr_from_pairs(num_processes, *allocated)
+        request = _csr_from_pairs(num_processes, *requested)
+        if available is None:
+            available = np.ones(num_resources, dtype=bool)
+            available[allocation[1]] = False
+        return cls(num_processes, num_resources, *allocation, *request, available)
+
+    @classmethod
+    def from_matrices(cls, allocation, request, available):
+        """Build a sparse state from 0/1 allocation/request matrices and available vector"""
+        n, m = len(allocation), len(available)
+        allocation = np.asarray(allocation, dtype=bool).reshape(n, m)
+        request = np.asarray(request, dtype=bool).reshape(n, m)
+        return cls(
+            n, m,
+            *_csr_from_pairs(n, *np.nonzero(allocation)),
+            *_csr_from_pairs(n, *np.nonzero(request)),
+            available
+        )
+
+    def to_matrices(self):
+        """Returns (allocation, request, available) as nested 0/1 lists (small states only)"""
+        allocation = np.zeros((self.num_processes, self.num_resources), dtype=int)
+        request = np.zeros((self.num_processes, self.num_resources), dtype=int)
+        allocation[self.allocation_rows(), self.allocation_indices] = 1
+        request[self.request_rows(), self.request_indices] = 1
+        return allocation.tolist(), request.tolist(), self.available.astype(int).tolist()
+
+    # Structure
+    def allocation_rows(self):
+        """Process index of every allocation nonzero"""
+        return np.repeat(np.arange(self.num_processes), np.diff(self.allocation_indptr))
+
+    def request_rows(self):
+        """Process index of every request nonzero"""
+        return np.repeat(np.arange(self.num_processes), np.diff(self.request_indptr))
+
+    def holders(self):
+        """Returns (indptr, processes) CSR of resource -> holding processes"""
+        if self._holders is None:
+            self._holders = transpose(self.allocation_indptr, self.allocation_indices, self.num_resources)
+        return self._holders
+
+    def requesters(self):
+        """Returns (indptr, processes) CSR of resource -> requesting processes"""
+        if self._requesters is None:
+            self._requesters = transpose(self.request_indptr, self.request_indices, self.num_resources)
+        return self._requesters
+
+    def allocated_count(self, pid):
+        return int(self.allocation_indptr[pid + 1] - self.allocation_indptr[pid])
+
+    def requested_count(self, pid):
+        return int(self.request_indptr[pid + 1] - self.request_indptr[pid])
+
+    def nnz(self):
+        return len(self.allocation_indices) + len(self.request_indices)
+
+    def nbytes(self):
+        arrays = (self.allocation_indptr, self.allocation_indices,
+                  self.request_indptr, self.request_indices, self.available)
+        return sum(array.nbytes for array in arrays)
+
+    # Wait-for graph
+    def wait_for_graph(self):
+        """
+        Wait-for graph as the boolean sparse product request * allocation^T
+        Every request nonzero (i, j) is joined with the holders of j, self loops and
+        duplicate edges are dropped
+        Returns (indptr, processes) CSR of process -> processes it waits for
+        """
+        holder_indptr, holder_rows = self.holders()
+        owner, holding = gather(holder_indptr, holder_rows, self.request_indices)
+        waiting = self.request_rows()[owner]
+
+        keep = waiting != holding
+        return _csr_from_pairs(self.num_processes, waiting[keep], holding[keep])
+
+    # Changes (O(nnz) array rebuilds)
+    def _drop(self, name, keep):
+        indptr = getattr(self, f"{name}_indptr")
+        rows = np.repeat(np.arange(self.num_processes), np.diff(indptr))
+        setattr(self, f"{name}_indices", getattr(self, f"{name}_indices")[keep])
+        new_indptr = np.zeros_like(indptr)
+        np.cumsum(np.bincount(rows[keep], minlength=self.num_processes), out=new_indptr[1:])
+        setattr(self, f"{name}_indptr", new_indptr)
+
+    def release_process(self, pid):
+        """Terminate a process: its resources become available and its requests are dropped"""
+        start, stop = self.allocation_indptr[pid], self.allocation_indptr[pid + 1]
+        self.available[self.allocation_indices[start:stop]] = True
+
+        for name in ("allocation", "request"):
+            indptr = getattr(self, f"{name}_indptr")
+            keep = np.ones(len(getattr(self, f"{name}_indices")), dtype=bool)
+            keep[indptr[pid]:indptr[pid + 1]] = False
+            self._drop(name, keep)
+        self._holders = self._requesters = None
+
+    def preempt(self, pid, resource):
+        """Take resource from pid, which requests it back; the resource becomes available"""
+        start, stop = self.allocation_indptr[pid], self.allocation_indptr[pid + 1]
+        keep = np.ones(len(self.allocation_indices), dtype=bool)
+        keep[start:stop] = self.allocation_indices[start:stop] != resource
+        self._drop("allocation", keep)
+
+        # Insert the request at its sorted position in the process' row
+        start, stop = self.request_indptr[pid], self.request_indptr[pid + 1]
+        position = start + np.searchsorted(self.request_indices[start:stop], resource)
+        if position == stop or self.request_indices[position] != resource:
+            self.request_indices = np.insert(self.request_indices, position, resource)
+            self.request_indptr = self.request_indptr.copy()
+            self.request_indptr[pid + 1:] += 1
+
+        self.available[resource] = True
+        self._holders = self._requesters = None
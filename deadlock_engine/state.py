@@ -0,0 +1,75 @@
+"""
+System state generation for SINGLE INSTANCE resources
+"""
+
+import random
+
+import numpy as np
+
+
+def generate_system(num_processes, num_resources, seed=42):
+    """
+    Generate a random system with SINGLE INSTANCE resource values (0 or 1 only)
+    Returns (allocation, request, available) as nested lists
+    """
+    np.random.seed(seed)
+    
+    n = num_processes
+    m = num_resources
+    
+    # Generate SINGLE INSTANCE allocation matrix (only 0 or 1)
+    # A single instance resource can only have one holder - keep the first one per column
+    allocation = np.random.randint(0, 2, (n, m))
+    allocation[allocation.cumsum(axis=0) > 1] = 0
+    allocation = allocation.tolist()
+    
+    # Generate SINGLE INSTANCE request matrix (only 0 or 1)
+    request = generate_requests(n, m)
+    
+    # Generate available SINGLE INSTANCE resources
+    # For single instance: each resource is either available (1) or not (0)
+    total_allocated = np.sum(allocation, axis=0)
+    available = []
+    for j in range(m):
+        # If no one has allocated this resource, it's available
+        if total_allocated[j] == 0:
+            available.append(1)
+        else:
+            # If someone has it, it's not available
+            available.append(0)
+    
+    # Ensure at least one resource is available
+    if sum(available) == 0:
+        available[random.randint(0, m-1)] = 1
+    
+    return allocation, request, available
+
+
+def generate_requests(num_processes, num_resources):
+    """Generate a random SINGLE INSTANCE request matrix (only 0 or 1)"""
+    return np.random.randint(0, 2, (num_processes, num_resources)).tolist()
+
+
+def generate_multi_instance_system(num_processes, num_resources, max_instances=5, seed=42):
+    """
+    Generate a random system with MULTI INSTANCE resources
+    Every resource type gets 1..max_instances instances, split randomly between the processes
+    and the free pool; requests never exceed the total number of instances
+    Returns (allocation, request, available) as integer arrays
+    """
+    rng = np.random.default_rng(seed)
+    n = num_processes
+    m = num_resources
+
+    total = rng.integers(1, max_instances + 1, m)
+
+    # Hand out each instance to a random process or leave it free (index n)
+    owners = rng.integers(0, n + 1, (m, max_instances))
+    allocation = np.zeros((n + 1, m), dtype=np.int64)
+    for j in range(m):
+        np.add.at(allocation[:, j], owners[j, :total[j]], 1)
+    available = allocation[n].copy()
+    allocation = allocation[:n]
+
+    request = rng.integers(0, total + 1, (n, m)) * (rng.random((n, m)) < 0.5)
+    return allocation, request, available
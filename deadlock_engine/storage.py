@@ -0,0 +1,194 @@
+"""
+Compact binary save/load of SINGLE INSTANCE system states
+
+A state file is an uncompressed .npz archive:
+    header      JSON string (format name, version, sizes, status names, deadlock history)
+    allocation  n x ceil(m/8) uint8, rows bit-packed little-endian (bit j = resource j)
+    request     n x ceil(m/8) uint8, same packing
+    available   ceil(m/8) uint8
+    status      n uint8/uint16 codes into the header's status names
+
+The members are stored without compression, so the packed matrices of a file on disk
+are memory-mapped in place instead of being read.
+"""
+
+import json
+import struct
+import zipfile
+
+import numpy as np
+
+from .packed import PackedSystemState
+
+FORMAT_NAME = "deadlock-state"
+FORMAT_VERSION = 1
+
+# Fixed part of a ZIP local file header (signature ... extra field length)
+_LOCAL_HEADER = struct.Struct("<4s5H3L2H")
+
+
+class SavedState:
+    """
+    A loaded state file
+    allocation_bits/request_bits/available_bits are the packed arrays (memory-mapped when
+    loaded from a path), the unpacking helpers only touch the data when called
+    """
+    def __init__(self, header, allocation_bits, request_bits, available_bits, status_codes):
+        self.header = header
+        self.version = header["version"]
+        self.num_processes = header["num_processes"]
+        self.num_resources = header["num_resources"]
+        self.history = header.get("history", [])
+        self.allocation_bits = allocation_bits
+        self.request_bits = request_bits
+        self.available_bits = available_bits
+        self.status_codes = status_codes
+
+    def allocation_matrix(self):
+        """Returns the allocation matrix as a boolean (n x m) array"""
+        return np.unpackbits(self.allocation_bits, axis=1, count=self.num_resources, bitorder="little").astype(bool)
+
+    def request_matrix(self):
+        """Returns the request matrix as a boolean (n x m) array"""
+        return np.unpackbits(self.request_bits, axis=1, count=self.num_resources, bitorder="little").astype(bool)
+
+    def available_vector(self):
+        """Returns the available vector as a boolean array of length m"""
+        return np.unpackbits(self.available_bits, count=self.num_resources, bitorder="little").astype(bool)
+
+    def status(self):
+        """Returns list of process status strings (None if the file has none)"""
+        names = self.header.get("status_names", [])
+        if not names:
+            return [None] * self.num_processes
+        return [names[code] for code in self.status_codes.tolist()]
+
+    def to_matrices(self):
+        """Returns (allocation, request, available) as nested 0/1 lists"""
+        return (
+            self.allocation_matrix().astype(int).tolist(),
+            self.request_matrix().astype(int).tolist(),
+            self.available_vector().astype(int).tolist(),
+        )
+
+    def to_packed_state(self):
+        """Returns a PackedSystemState straight from the packed rows (no unpacking)"""
+        def rows(bits):
+            return [int.from_bytes(row.tobytes(), "little") for row in bits]
+        return PackedSystemState(
+            self.num_processes,
+            self.num_resources,
+            rows(self.allocation_bits),
+            rows(self.request_bits),
+            int.from_bytes(np.asarray(self.available_bits).tobytes(), "little"),
+        )
+
+
+def save_state(file, allocation, request, available, status=None, history=None):
+    """
+    Save a state as a bit-packed .npz archive
+    file is a path (used as is, whatever its suffix) or a writable binary file object
+    history is any JSON-serializable list (e.g. the deadlock history)
+    """
+    allocation = np.asarray(allocation, dtype=bool)
+    request = np.asarray(request, dtype=bool)
+    available = np.asarray(available, dtype=bool)
+    n, m = len(allocation), len(available)
+    if n * m == 0:
+        # Empty matrices given as [] have no second axis
+        allocation = allocation.reshape(n, m)
+        request = request.reshape(n, m)
+    if allocation.shape != (n, m) or request.shape != (n, m) or available.shape != (m,):
+        raise ValueError(f"inconsistent shapes {allocation.shape}, {request.shape}, {available.shape}")
+
+    status = list(status) if status is not None else []
+    if status and len(status) != n:
+        raise ValueError(f"expected {n} process states, got {len(status)}")
+    names = sorted(set(status))
+    code = {name: i for i, name in enumerate(names)}
+    codes = np.array([code[s] for s in status], dtype=np.uint8 if len(names) <= 256 else np.uint16)
+
+    header = {
+        "format": FORMAT_NAME,
+        "version": FORMAT_VERSION,
+        "num_processes": n,
+        "num_resources": m,
+        "bitorder": "little",
+        "status_names": names,
+        "history": history or [],
+    }
+    members = {
+        "header": np.array(json.dumps(header)),
+        "allocation": np.packbits(allocation, axis=1, bitorder="little"),
+        "request": np.packbits(request, axis=1, bitorder="little"),
+        "available": np.packbits(available, bitorder="little"),
+        "status": codes,
+    }
+    # np.savez appends .npz to a path without it, so paths are opened here and kept as given
+    if isinstance(file, str) or hasattr(file, "__fspath__"):
+        with open(file, "wb") as f:
+            np.savez(f, **members)
+    else:
+        np.savez(file, **members)
+
+
+def _memmap_member(path, archive, name):
+    """
+    Memory-map an uncompressed .npy member of a zip archive in place
+    Returns the array or None if the member can't be mapped (compressed, object dtype)
+    """
+    info = archive.getinfo(name)
+    if info.compress_type != zipfile.ZIP_STORED:
+        return None
+
+    with open(path, "rb") as f:
+        f.seek(info.header_offset)
+        fields = _LOCAL_HEADER.unpack(f.read(_LOCAL_HEADER.size))
+        name_length, extra_length = fields[-2], fields[-1]
+        f.seek(info.header_offset + _LOCAL_HEADER.size + name_length + extra_length)
+
+        version = np.lib.format.read_magic(f)
+        if version == (1, 0):
+            shape, fortran_order, dtype = np.lib.format.read_array_header_1_0(f)
+        else:
+            shape, fortran_order, dtype = np.lib.format.read_array_header_2_0(f)
+        offset = f.tell()
+
+    if dtype.hasobject:
+        return None
+    if 0 in shape:
+        return np.zeros(shape, dtype=dtype)
+    return np.memmap(path, dtype=dtype, mode="r", shape=shape, offset=offset,
+                     order="F" if fortran_order else "C")
+
+
+def load_state(file, mmap=True):
+    """
+    Load a state saved with save_state
+    file is a path or a readable binary file object; with a path and mmap=True the packed
+    matrices are memory-mapped, so opening doesn't depend on the matrix size
+    Returns SavedState
+    Raises ValueError for anything that isn't a readable state file (not a zip archive,
+    truncated or damaged, members missing)
+    """
+    try:
+        with zipfile.ZipFile(file) as archive:
+            header = json.loads(str(np.load(archive.open("header.npy"))))
+            if header.get("format") != FORMAT_NAME:
+                raise ValueError("not a deadlock state file")
+            if header.get("version", 0) > FORMAT_VERSION:
+                raise ValueError(f"state file version {header['version']} is newer than supported ({FORMAT_VERSION})")
+
+            # Only files on disk can be mapped, file objects (uploads) are read
+            mappable = mmap and (isinstance(file, str) or hasattr(file, "__fspath__"))
+
+            arrays = {}
+            for name in ("allocation", "request", "available", "status"):
+                array = _memmap_member(file, archive, f"{name}.npy") if mappable else None
+                if array is None:
+                    array = np.load(archive.open(f"{name}.npy"))
+                arrays[name] = array
+    except (zipfile.BadZipFile, KeyError, EOFError, NotImplementedError) as error:
+        raise ValueError(f"not a deadlock state file ({error})") from error
+
+    return SavedState(header, arrays["allocation"], arrays["request"], arrays["available"], arrays["status"])
@@ -0,0 +1,387 @@
+"""
+Streaming deadlock monitor for SINGLE INSTANCE resources
+
+Reads a feed of lock events, one JSON object per line:
+    {"event": "request", "process": "worker-3", "resource": "db.lock"}
+event is one of acquire / release / request / exit, process and resource are any
+JSON scalars (names or numbers). The state is updated in place and a deadlock is
+reported as soon as the wait-for edge that closes a cycle arrives; more waits inside a
+standing deadlock are not reported again.
+
+Usage:
+    python -m deadlock_engine.stream trace.jsonl
+    python -m deadlock_engine.stream trace.jsonl --follow
+    some_service | python -m deadlock_engine.stream -
+    python -m deadlock_engine.stream unix:/tmp/deadlock.sock
+"""
+
+import argparse
+import json
+import os
+import selectors
+import socket
+import sys
+import time
+
+from .detector import DeadlockDetectorSingleInstance
+from .dynamic import DynamicWaitForGraph
+from .sparse import SparseSystemState
+
+EVENTS = ("acquire", "release", "request", "exit")
+
+
+class DeadlockMonitor:
+    """
+    Online wait-for graph of a running system
+    Process i waits for process j while i requests a resource that j holds. The graph is
+    never rebuilt: every event adds or removes a few edges of a DynamicWaitForGraph, and
+    an edge that closes a new cycle is reported on arrival
+    Every non-empty line or event counts as an event, a malformed one also as an error
+    """
+    def __init__(self, on_deadlock=None):
+        self.on_deadlock = on_deadlock
+
+        # External ids -> indices
+        self.process_index = {}
+        self.process_names = []
+        self.resource_index = {}
+        self.resource_names = []
+
+        # holder[r] = process holding resource r (-1 = available)
+        self.holder = []
+        self.held = []
+        self.requested = []
+        self.requesters = []
+
+        # Process wait-for graph with a maintained topological order
+        self.graph = DynamicWaitForGraph()
+
+        self.events = 0
+        self.errors = 0
+        self.deadlocks = []
+
+    # Ids
+    def process(self, name):
+        pid = self.process_index.get(name)
+        if pid is None:
+            pid = self.process_index[name] = len(self.process_names)
+            self.process_names.append(name)
+            self.held.append(set())
+            self.requested.append(set())
+            self.graph.add_node()
+        return pid
+
+    def resource(self, name):
+        rid = self.resource_index.get(name)
+        if rid is None:
+            rid = self.resource_index[name] = len(self.resource_names)
+            self.resource_names.append(name)
+            self.holder.append(-1)
+            self.requesters.append(set())
+        return rid
+
+    # Events
+    def handle_batch(self, lines):
+        """
+        Apply a batch of JSONL lines (bytes or str, no line breaks, empty lines allowed)
+        The batch is decoded with a single json.loads call, a batch with a bad line is
+        decoded line by line instead
+        Returns list of deadlock reports
+        """
+        lines = [line for line in lines if line]
+        if not lines:
+            return []
+        try:
+            if isinstance(lines[0], bytes):
+                events = json.loads(b"[" + b",".join(lines) + b"]")
+            else:
+                events = json.loads("[" + ",".join(lines) + "]")
+        except ValueError:
+            reports = []
+            for line in lines:
+                report = self.handle_line(line)
+                if report is not None:
+                    reports.append(report)
+            return reports
+        return self.handle_events(events)
+
+    def handle_events(self, events):
+        """
+        Apply decoded events (dicts with event/process/resource)
+        Returns list of deadlock reports
+        """
+        reports = []
+        handlers = {"request": self.request, "acquire": self.acquire, "release": self.release}
+        process_index = self.process_index
+        resource_index = self.resource_index
+        for event in events:
+            self.events += 1
+            # Validate before registering ids: unknown kinds, missing or unhashable ids
+            try:
+                kind = event["event"]
+                process = event["process"]
+                pid = process_index.get(process)
+                if kind == "exit":
+                    handler = resource = rid = None
+                else:
+                    handler = handlers[kind]
+                    resource = event["resource"]
+                    rid = resource_index.get(resource)
+            except (KeyError, TypeError):
+                self.errors += 1
+                continue
+            if handler is not None and resource is None:
+                self.errors += 1
+                continue
+
+            if pid is None:
+                pid = self.process(process)
+            if handler is None:
+                self.exit(pid)
+                continue
+            if rid is None:
+                rid = self.resource(resource)
+            report = handler(pid, rid)
+            if report is not None:
+                reports.append(report)
+        return reports
+
+    def handle_line(self, line):
+        """Apply one JSONL event line (blank lines are skipped). Returns a deadlock report or None"""
+        if not line.strip():
+            return None
+        try:
+            event = json.loads(line)
+        except ValueError:
+            self.events += 1
+            self.errors += 1
+            return None
+        reports = self.handle_events([event])
+        return reports[0] if reports else None
+
+    def handle(self, kind, process, resource=None):
+        """Apply one event. Returns a deadlock report or None"""
+        reports = self.handle_events([{"event": kind, "process": process, "resource": resource}])
+        return reports[0] if reports else None
+
+    def request(self, pid, rid):
+        """Process pid starts waiting for resource rid"""
+        if rid in self.requested[pid] or self.holder[rid] == pid:
+            return None
+        self.requested[pid].add(rid)
+        self.requesters[rid].add(pid)
+
+        # New edge pid -> holder
+        holder = self.holder[rid]
+        if holder == -1:
+            return None
+        return self._report(self.graph.insert_edge(pid, holder))
+
+    def acquire(self, pid, rid):
+        """Process pid got resource rid (a pending request for it is fulfilled)"""
+        holder = self.holder[rid]
+        if holder == pid:
+            return None
+        if holder != -1:
+            # The trace missed a release - hand the resource over
+            self.errors += 1
+            self.release(holder, rid)
+
+        self.requested[pid].discard(rid)
+        self.requesters[rid].discard(pid)
+        self.holder[rid] = pid
+        self.held[pid].add(rid)
+
+        # New edges waiter -> pid for everybody still waiting for the resource
+        report = None
+        for waiter in self.requesters[rid]:
+            cycle = self.graph.insert_edge(waiter, pid)
+            if report is None and cycle is not None:
+                report = self._report(cycle)
+        return report
+
+    def release(self, pid, rid):
+        """Process pid gave back resource rid (removes edges only, can't close a cycle)"""
+        if self.holder[rid] != pid:
+            self.errors += 1
+            return
+        self.holder[rid] = -1
+        self.held[pid].discard(rid)
+        for waiter in self.requesters[rid]:
+            self.graph.delete_edge(waiter, pid)
+
+    def exit(self, pid):
+        """Process pid ended: everything it holds is released and its requests are dropped"""
+        for rid in self.held[pid]:
+            self.holder[rid] = -1
+        self.held[pid].clear()
+        for rid in self.requested[pid]:
+            self.requesters[rid].discard(pid)
+        self.requested[pid].clear()
+        self.graph.delete_node_edges(pid)
+
+    def _report(self, cycle):
+        """Turn a process cycle of the wait-for graph into a deadlock report (None passes through)"""
+        if cycle is None:
+            return None
+
+        # Resource every process waits for at the next one
+        resources = []
+        for k, pid in enumerate(cycle):
+            following = cycle[(k + 1) % len(cycle)]
+            resources.append(next(rid for rid in self.requested[pid] if self.holder[rid] == following))
+
+        report = {
+            "event": self.events,
+            "cycle": [self.process_names[p] for p in cycle],
+            "resources": [self.resource_names[r] for r in resources],
+        }
+        self.deadlocks.append(report)
+        if self.on_deadlock is not None:
+            self.on_deadlock(report)
+        return report
+
+    # Snapshots of the live state
+    def to_sparse_state(self):
+        """Returns the current state as a SparseSystemState (for DeadlockDetectorSingleInstance)"""
+        allocated = ([], [])
+        requested = ([], [])
+        for pairs, rows in ((allocated, self.held), (requested, self.requested)):
+            for pid, resources in enumerate(rows):
+                pairs[0].extend([pid] * len(resources))
+                pairs[1].extend(resources)
+        n, m = len(self.process_names), len(self.resource_names)
+        return SparseSystemState.from_pairs(n, m, allocated, requested)
+
+    def to_matrices(self):
+        """Returns (allocation, request, available) as nested 0/1 lists (small systems only)"""
+        return self.to_sparse_state().to_matrices()
+
+    def deadlocked(self):
+        """
+        Full detection on the current state (cycles and every process blocked behind one)
+        Returns list of process names
+        """
+        state = self.to_sparse_state()
+        detector = DeadlockDetectorSingleInstance(state.num_processes, state.num_resources)
+        return [self.process_names[pid] for pid in detector.detect_deadlock(state)]
+
+    def run(self, batches):
+        """
+        Apply every batch of lines of an iterable (read_batches(...))
+        Returns list of deadlock reports found on the way
+        """
+        found = []
+        for batch in batches:
+            found.extend(self.handle_batch(batch))
+        return found
+
+
+# Sources
+def _split_batches(read, chunk_size, wait=None):
+    """
+    Turn raw reads into batches of complete lines
+    read(chunk_size) returns b"" at the end of the input; with wait the end is only a pause
+    (wait() is called before reading again, e.g. to follow a growing file)
+    """
+    partial = b""
+    while True:
+        data = read(chunk_size)
+        if not data:
+            if wait is None:
+                break
+            wait()
+            continue
+        lines = (partial + data).split(b"\n")
+        partial = lines.pop()
+        yield lines
+    if partial.strip():
+        yield [partial]
+
+
+def _socket_batches(path, chunk_size):
+    """
+    Listen on a Unix socket and yield batches of lines of every connected client
+    Lines of different clients interleave in arrival order, each client's own order is kept
+    """
+    if os.path.exists(path):
+        os.unlink(path)
+    server = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+    server.bind(path)
+    server.listen()
+    server.setblocking(False)
+
+    selector = selectors.DefaultSelector()
+    selector.register(server, selectors.EVENT_READ)
+    buffers = {}
+    try:
+        while True:
+            for key, _ in selector.select():
+                if key.fileobj is server:
+                    client, _ = server.accept()
+                    client.setblocking(False)
+                    selector.register(client, selectors.EVENT_READ)
+                    buffers[client] = b""
+                    continue
+
+                client = key.fileobj
+                data = client.recv(chunk_size)
+                if not data:
+                    selector.unregister(client)
+                    client.close()
+                    rest = buffers.pop(client)
+                    if rest.strip():
+                        yield [rest]
+                    continue
+                lines = (buffers[client] + data).split(b"\n")
+                buffers[client] = lines.pop()
+                yield lines
+    finally:
+        selector.close()
+        server.close()
+        os.unlink(path)
+
+
+def read_batches(source, follow=False, poll_interval=0.05, chunk_size=1 << 16):
+    """
+    Batches of event lines from a source: a JSONL file path, "-" for stdin or
+    "unix:<path>" to listen on a Unix socket; follow keeps reading a file as it grows
+    A batch is whatever arrived in one read, so live feeds aren't held back
+    """
+    if source == "-":
+        fd = sys.stdin.fileno()
+        yield from _split_batches(lambda size: os.read(fd, size), chunk_size)
+    elif source.startswith("unix:"):
+        yield from _socket_batches(source[len("unix:"):], chunk_size)
+    else:
+        with open(source, "rb") as f:
+            wait = (lambda: time.sleep(poll_interval)) if follow else None
+            yield from _split_batches(f.read, chunk_size, wait)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Online deadlock monitor for lock event streams")
+    parser.add_argument("source", help='JSONL file, "-" for stdin or unix:<path> to listen on a socket')
+    parser.add_argument("--follow", action="store_true", help="keep reading the file as it grows")
+    parser.add_argument("--quiet", action="store_true", help="only print the summary")
+    args = parser.parse_args(argv)
+
+    def print_report(report):
+        if not args.quiet:
+            print(json.dumps(report), flush=True)
+
+    monitor = DeadlockMonitor(on_deadlock=print_report)
+    start = time.perf_counter()
+    try:
+        monitor.run(read_batches(args.source, args.follow))
+    except KeyboardInterrupt:
+        pass
+    elapsed = time.perf_counter() - start
+
+    print(f"{monitor.events} events, {len(monitor.deadlocks)} deadlock(s), {monitor.errors} error(s) "
+          f"in {elapsed:.2f} s ({monitor.events / elapsed if elapsed else 0:,.0f} events/s)", file=sys.stderr)
+    return 1 if monitor.deadlocks else 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
@@ -0,0 +1,83 @@
+"""
+Shared fixtures: the original list-based detection algorithm as the reference, and
+random SINGLE INSTANCE systems
+"""
+
+import numpy as np
+import pytest
+
+
+def detect_deadlock_reference(allocation, request, available):
+    """
+    The list-based Work/Finish algorithm every engine has to agree with
+    Returns list of deadlocked processes
+    """
+    n, m = len(allocation), len(available)
+    work = list(available)
+    finish = [sum(allocation[i]) == 0 for i in range(n)]
+    while True:
+        found = False
+        for i in range(n):
+            if not finish[i] and all(not request[i][j] or work[j] for j in range(m)):
+                for j in range(m):
+                    if allocation[i][j]:
+                        work[j] = 1
+                finish[i] = True
+                found = True
+        if not found:
+            break
+    return [i for i in range(n) if not finish[i]]
+
+
+def make_system(seed, n, m, density=0.3):
+    """
+    Random SINGLE INSTANCE system: every resource is held by at most one process, a process
+    never requests what it holds and every resource nobody holds is available
+    Returns (allocation, request, available) as nested 0/1 lists
+    """
+    rng = np.random.default_rng(seed)
+    held = rng.random(m) < density
+    allocation = np.zeros((n, m), dtype=bool)
+    if n:
+        allocation[rng.integers(0, n, m)[held], np.flatnonzero(held)] = True
+    request = (rng.random((n, m)) < density) & ~allocation
+    return allocation.astype(int).tolist(), request.astype(int).tolist(), (~held).astype(int).tolist()
+
+
+def ring_system(n):
+    """Process i holds resource i and requests resource i + 1 (one deadlock over all processes)"""
+    allocation = np.eye(n, dtype=int)
+    request = np.roll(allocation, 1, axis=1)
+    return allocation.tolist(), request.tolist(), [0] * n
+
+
+@pytest.fixture
+def reference():
+    return detect_deadlock_reference
+
+
+@pytest.fixture
+def random_system():
+    return make_system
+
+
+@pytest.fixture
+def ring():
+    return ring_system
+
+
+# Sizes and densities of the random equivalence tests: empty, tiny, wide, tall, dense and sparse
+SYSTEMS = [
+    (seed, n, m, density)
+    for seed, (n, m) in enumerate([(0, 0), (1, 1), (3, 2), (5, 3), (10, 8), (2, 40), (40, 2), (30, 30)])
+    for density in (0.1, 0.4, 0.8)
+]
+
+
+def pytest_generate_tests(metafunc):
+    if "system" in metafunc.fixturenames:
+        metafunc.parametrize(
+            "system",
+            [make_system(*case) for case in SYSTEMS],
+            ids=[f"seed{seed}-{n}x{m}-{density}" for seed, n, m, density in SYSTEMS],
+        )
@@ -0,0 +1,236 @@
+import asyncio
+
+import pytest
+
+from deadlock_engine import TaskWatcher, aio
+
+
+def run(coro):
+    return asyncio.run(asyncio.wait_for(coro, 10))
+
+
+async def settle(rounds=10):
+    """Let every task run until it blocks"""
+    for _ in range(rounds):
+        await asyncio.sleep(0)
+
+
+async def cancel(*tasks):
+    for task in tasks:
+        task.cancel()
+    await asyncio.gather(*tasks, return_exceptions=True)
+
+
+async def hold_and_wait(held, wanted):
+    async with held:
+        await asyncio.sleep(0)
+        async with wanted:
+            pass
+
+
+def test_lock_cycle():
+    async def main():
+        watcher = TaskWatcher().start()
+        first, second = aio.Lock("first"), aio.Lock("second")
+        a = asyncio.create_task(hold_and_wait(first, second), name="a")
+        b = asyncio.create_task(hold_and_wait(second, first), name="b")
+        await settle()
+
+        report = watcher.poll()
+        assert sorted(report["primitives"]) == [first.label, second.label]
+        assert [label.split(" ")[0] for label in report["deadlocked"]] == ["a", "b"]
+        assert sorted(report["cycle"]) == report["deadlocked"]
+        assert watcher.poll() is None and watcher.deadlocks == [report]
+
+        await cancel(a, b)
+        assert aio._waiting == {}
+        assert watcher.poll() is None
+        watcher.stop()
+    run(main())
+
+
+def test_watcher_callback():
+    async def main():
+        found = asyncio.get_running_loop().create_future()
+        watcher = TaskWatcher(interval=0.01, on_deadlock=found.set_result).start()
+        lock, semaphore = aio.Lock(), aio.Semaphore(1, name="pool")
+        tasks = [asyncio.create_task(hold_and_wait(lock, semaphore)),
+                 asyncio.create_task(hold_and_wait(semaphore, lock))]
+        report = await asyncio.wait_for(found, 5)
+        assert "pool" in " ".join(report["primitives"])
+        watcher.stop()
+        await cancel(*tasks)
+    run(main())
+    assert aio._armed == 0
+
+
+def test_waiting_without_a_cycle():
+    async def main():
+        watcher = TaskWatcher().start()
+        lock, event = aio.Lock(), aio.Event()
+
+        async def holder():
+            async with lock:
+                await event.wait()
+
+        tasks = [asyncio.create_task(holder()), asyncio.create_task(hold_and_wait(aio.Lock(), lock))]
+        await settle()
+        # Nobody claimed the event, so the holder waits for no task
+        assert watcher.poll() is None
+        event.set()
+        await asyncio.gather(*tasks)
+        assert watcher.deadlocks == []
+        watcher.stop()
+    run(main())
+
+
+def test_claimed_event_cycle():
+    async def main():
+        watcher = TaskWatcher().start()
+        lock, event = aio.Lock(), aio.Event("ready")
+
+        async def setter():
+            event.claim()
+            await asyncio.sleep(0)
+            async with lock:
+                event.set()
+
+        async def waiter():
+            async with lock:
+                await asyncio.sleep(0)
+                await event.wait()
+
+        tasks = [asyncio.create_task(setter()), asyncio.create_task(waiter())]
+        await settle()
+        report = watcher.poll()
+        assert sorted(report["primitives"]) == sorted([lock.label, event.label])
+        watcher.stop()
+        await cancel(*tasks)
+    run(main())
+
+
+def test_awaiting_a_task():
+    async def main():
+        watcher = TaskWatcher().start()
+        lock = aio.Lock()
+
+        async def child():
+            async with lock:
+                pass
+
+        async def parent():
+            async with lock:
+                await asyncio.create_task(child(), name="child")
+
+        task = asyncio.create_task(parent(), name="parent")
+        await settle()
+        report = watcher.poll()
+        assert [label.split(" ")[0] for label in report["deadlocked"]] == ["child", "parent"]
+        assert any(primitive.startswith("task child") for primitive in report["primitives"])
+        watcher.stop()
+        await cancel(task)
+    run(main())
+
+
+def test_semaphore_holders_are_recorded_only_while_armed():
+    async def main():
+        lock, semaphore = aio.Lock(), aio.Semaphore(2)
+        async with lock:
+            assert lock._owner is asyncio.current_task()
+        assert lock._owner is None and aio._waiting == {}
+        async with semaphore:
+            assert semaphore._holders() == ()
+
+        watcher = TaskWatcher().start()
+        async with semaphore:
+            async with semaphore:
+                assert semaphore._holders() == (asyncio.current_task(),)
+                assert semaphore._holding[asyncio.current_task()] == 2
+        assert semaphore._holders() == ()
+        watcher.stop()
+    run(main())
+
+
+def test_free_lock_with_a_woken_waiter():
+    async def main():
+        lock = aio.Lock()
+        await lock.acquire()
+        first = asyncio.create_task(hold_and_wait(lock, aio.Lock()))
+        await settle()
+
+        async def observe(task):
+            return lock.locked(), aio._waiting[task][0]
+
+        observer = asyncio.create_task(observe(asyncio.current_task()))
+        lock.release()
+        # The lock is free, but the woken task is ahead of this one
+        await lock.acquire()
+        assert observer.result() == (False, lock)
+        assert first.done() and aio._waiting == {}
+    run(main())
+
+
+def test_finished_tasks_hold_nothing():
+    async def main():
+        watcher = TaskWatcher().start()
+        semaphore = aio.Semaphore(3)
+
+        async def leak():
+            await semaphore.acquire()
+
+        task = asyncio.create_task(leak())
+        await task
+        assert semaphore._holders() == ()
+
+        # A release the semaphore can't match to a holder disables holder tracking
+        await semaphore.acquire()
+
+        async def release():
+            semaphore.release()
+
+        await asyncio.create_task(release())
+        assert semaphore._holding is None and semaphore._holders() == ()
+        watcher.stop()
+    run(main())
+
+
+def test_release_without_a_loop():
+    semaphore = aio.Semaphore(0)
+    assert semaphore.locked()
+    semaphore.release()
+    assert not semaphore.locked()
+
+    async def main():
+        await semaphore.acquire()
+    run(main())
+    assert semaphore.locked()
+
+
+def test_install_and_uninstall():
+    original = asyncio.Lock, asyncio.Semaphore, asyncio.Event
+
+    async def main():
+        watcher = aio.install(interval=0.05)
+        try:
+            assert isinstance(asyncio.Lock(), aio.Lock)
+            assert asyncio.locks.Semaphore is aio.Semaphore
+            with pytest.raises(RuntimeError):
+                aio.install()
+        finally:
+            aio.uninstall()
+        return watcher
+
+    watcher = run(main())
+    assert (asyncio.Lock, asyncio.Semaphore, asyncio.Event) == original
+    assert watcher._handle is None and aio._armed == 0
+
+
+def test_install_needs_awaited_futures(monkeypatch):
+    monkeypatch.setattr(aio, "_TASK_AWAITS", False)
+
+    async def main():
+        with pytest.raises(RuntimeError, match="_fut_waiter"):
+            aio.install()
+    run(main())
+    assert asyncio.Lock is aio._ORIGINALS["Lock"]
+    assert aio._watcher is None and aio._armed == 0
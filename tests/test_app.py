@@ -0,0 +1,278 @@
+"""
+Streamlit app driven headless through AppTest
+"""
+
+import io
+from pathlib import Path
+
+import numpy as np
+import pytest
+
+pytest.importorskip("streamlit")
+from streamlit.testing.v1 import AppTest
+
+from deadlock_engine import DeadlockDetectorSingleInstance, save_state
+
+APP = str(Path(__file__).resolve().parents[1] / "app.py")
+
+
+@pytest.fixture
+def app():
+    """App with an initialized system (default seed, which is deadlocked)"""
+    at = AppTest.from_file(APP, default_timeout=60)
+    at.run()
+    at.button(key="init_btn").click().run()
+    assert not at.exception
+    return at
+
+
+def click(at, key):
+    at.button(key=key).click().run()
+    assert not at.exception, at.exception
+    return at
+
+
+def holder_of(allocation):
+    return DeadlockDetectorSingleInstance(len(allocation), len(allocation[0])).build_holder_index(allocation)
+
+
+# Holder index
+@pytest.mark.parametrize("action", ["terminate_btn", "preempt_btn", "min_terminate_btn", "fixpoint_btn"])
+def test_holder_index_follows_recovery(app, action):
+    state = app.session_state
+    assert state.holder == holder_of(state.allocation)
+
+    click(app, "detect_btn")
+    click(app, action)
+    assert state.holder is None or state.holder == holder_of(state.allocation)
+
+
+# Avoidance mode
+def submit_row(at, pid, row):
+    """Select a process, toggle its pending request to row and press Update Request"""
+    selectbox = at.selectbox(key="selected_process")
+    selectbox.set_value(selectbox.options[pid]).run()
+    for j, value in enumerate(row):
+        if at.session_state[f"toggle_state_{pid}"][j] != value:
+            click(at, f"toggle_{pid}_{j}")
+    return click(at, "update_request")
+
+
+@pytest.mark.parametrize("policy, pending", [("Queue", True), ("Refuse", False)])
+def test_avoidance_mode_keeps_unsafe_requests_out(app, reference, policy, pending):
+    state = app.session_state
+    m = state.num_resources
+    app.checkbox(key="avoidance_mode").check().run()
+    app.radio(key="unsafe_policy").set_value(policy).run()
+
+    # Two processes holding an unavailable resource each; withdraw every request first
+    held = [(pid, j) for pid, row in enumerate(state.allocation) for j in range(m)
+            if row[j] and not state.available[j]]
+    (p, a), (q, b) = held[0], next(item for item in held if item[0] != held[0][0])
+    for pid in range(state.num_processes):
+        submit_row(app, pid, [0] * m)
+    assert not any(map(any, state.request))
+
+    # p waiting for q is safe, q waiting for p in addition closes a cycle
+    submit_row(app, p, [int(j == b) for j in range(m)])
+    assert state.request[p][b] == 1
+    submit_row(app, q, [int(j == a) for j in range(m)])
+    assert state.request[q][a] == 0
+    assert (q in state.admission_controller.pending) == pending
+    assert state.admission_controller.unsafe == set(reference(state.allocation, state.request, state.available))
+
+    # Without avoidance the same update goes through
+    app.checkbox(key="avoidance_mode").uncheck().run()
+    click(app, "update_request")
+    assert state.request[q][a] == 1
+    assert {p, q} <= set(reference(state.allocation, state.request, state.available))
+
+
+# Performance panel
+def test_reruns_are_timed_by_phase(app):
+    history = app.session_state.perf_history
+    assert history.maxlen == 50
+    click(app, "detect_btn")
+
+    record = history[-1]
+    assert "Detection" in record and "Other Rendering" in record
+    phases = sum(value for name, value in record.items() if name != "Total")
+    assert record["Total"] == pytest.approx(phases)
+    assert app.session_state.perf_phases == {} and app.session_state.perf_started is None
+
+    assert "Performance Panel" in [expander.label for expander in app.expander]
+    assert [metric.label for metric in app.metric][-3:] == ["Last Rerun", "Median", "95th Percentile"]
+
+
+# Matrix tabs
+def table_html(container):
+    """The HTML matrix table rendered in a container"""
+    return next(element.value for element in container.markdown if "matrix-table" in element.value)
+
+
+def test_matrix_tabs_show_the_matrices(app):
+    state = app.session_state
+    assert [tab.label for tab in app.tabs][:3] == ["Allocation", "Request", "Available"]
+
+    def check():
+        allocation_html, request_html, available_html = (table_html(tab) for tab in app.tabs[:3])
+        assert allocation_html.count('"cell-allocated"') == sum(map(sum, state.allocation))
+        assert allocation_html.count("<td") == state.num_processes * state.num_resources
+        assert request_html.count('"cell-requested"') == sum(map(sum, state.request))
+        # Label, status and value cell of every available resource
+        assert available_html.count('"cell-allocated"') == 3 * sum(state.available)
+        assert available_html.count("<tr>") == state.num_resources + 1
+
+    check()
+    click(app, "detect_btn")
+    click(app, "terminate_btn")
+    check()
+
+
+# Large-matrix viewer
+@pytest.fixture
+def large_app():
+    """App with a system too large for the full tables"""
+    at = AppTest.from_file(APP, default_timeout=60)
+    at.run()
+    at.number_input(key="input_processes").set_value(200)
+    at.number_input(key="input_resources").set_value(100)
+    at.button(key="init_btn").click().run()
+    assert not at.exception
+    return at
+
+
+def heatmap_data(chart):
+    pyarrow = pytest.importorskip("pyarrow")
+    return pyarrow.ipc.open_stream(chart.proto.datasets[0].data.data).read_all().to_pandas()
+
+
+def test_large_matrices_show_a_heatmap_and_one_page(large_app):
+    state = large_app.session_state
+    allocation = np.array(state.allocation)
+
+    heatmap = heatmap_data(large_app.get("vega_lite_chart")[0])
+    assert heatmap["block_row"].max() == heatmap["block_col"].max() == 63
+    row_sizes = np.diff(np.unique(np.linspace(0, 200, 65).astype(int)))
+    column_sizes = np.diff(np.unique(np.linspace(0, 100, 65).astype(int)))
+    ones = (heatmap["density"] * row_sizes[heatmap["block_row"]] * column_sizes[heatmap["block_col"]]).sum()
+    assert ones == pytest.approx(allocation.sum(), abs=0.01 * len(heatmap))
+
+    # First page of the first block: 25 processes x 16 resources
+    html = table_html(large_app.tabs[0])
+    assert html.count("<td") == 25 * 16
+    assert html.count('"cell-allocated"') == allocation[:25, :16].sum()
+    assert "#24</th>" in html and "#25</th>" not in html
+    assert table_html(large_app.tabs[2]).count("<tr>") == 25 + 1
+    assert large_app.number_input(key="viewer_page_allocation_0_0").value == 1
+
+
+# Request simulation fragment
+def test_toggles_only_change_the_pending_row(app):
+    state = app.session_state
+    request = [row[:] for row in state.request]
+    row = state["toggle_state_0"][:]
+
+    click(app, "toggle_0_1")
+    assert state["toggle_state_0"] == row[:1] + [1 - row[1]] + row[2:]
+    assert state.request == request
+    assert app.button(key="toggle_0_1").label == ("Requested" if row[1] == 0 else "Not Requested")
+    assert "Simulate Request" in state.perf_history[-1]
+
+    click(app, "toggle_0_1")
+    assert state["toggle_state_0"] == row
+
+    click(app, "toggle_0_2")
+    click(app, "update_request")
+    assert state.request[0] == row[:2] + [1 - row[2]] + row[3:]
+    assert state.request[1:] == request[1:]
+    assert state.incremental_detector.deadlocked() == DeadlockDetectorSingleInstance(
+        state.num_processes, state.num_resources).detect_deadlock(state.allocation, state.request, state.available)
+
+
+def test_toggles_of_large_systems_are_paged(large_app):
+    def toggle_keys():
+        return {button.key for button in large_app.button if button.key and button.key.startswith("toggle_0_")}
+
+    page_size = len(toggle_keys())
+    assert 0 < page_size < 100
+    assert toggle_keys() == {f"toggle_0_{j}" for j in range(page_size)}
+
+    pages = -(-100 // page_size)
+    large_app.number_input(key="toggle_resource_page").set_value(pages).run()
+    assert toggle_keys() == {f"toggle_0_{j}" for j in range((pages - 1) * page_size, 100)}
+
+
+# Static assets
+def test_theme_is_the_stylesheet_asset(app):
+    css = (Path(APP).parent / "assets" / "theme.css").read_text(encoding="utf-8")
+    assert app.markdown[0].value == f"<style>\n{css}</style>"
+
+
+def test_user_guide_is_one_element(app):
+    def guides():
+        return [element.value for element in app.markdown if 'class="guide-container"' in element.value]
+
+    assert guides() == []
+    click(app, "toggle_guide")
+    (guide,) = guides()
+    assert guide.count('class="guide-section"') == 9
+    assert "Getting Started" in guide and "Best Practices" in guide
+
+    click(app, "close_guide")
+    assert guides() == []
+
+
+# Undo/redo
+def session_matrices(state):
+    return ([row[:] for row in state.allocation], [row[:] for row in state.request],
+            state.available[:], list(state.process_status))
+
+
+def test_undo_redo_and_jump_restore_the_state(app):
+    state = app.session_state
+    steps = [session_matrices(state)]
+    for action in ["detect_btn", "preempt_btn", "reset_requests"]:
+        click(app, action)
+        assert state.event_log.position == len(steps)
+        steps.append(session_matrices(state))
+
+    for step in range(len(steps) - 2, -1, -1):
+        click(app, "undo_btn")
+        assert session_matrices(state) == steps[step]
+        assert state.incremental_detector.deadlocked() == DeadlockDetectorSingleInstance(
+            state.num_processes, state.num_resources).detect_deadlock(state.allocation, state.request, state.available)
+    assert app.button(key="undo_btn").disabled
+
+    click(app, "redo_btn")
+    assert session_matrices(state) == steps[1]
+
+    last = len(steps) - 1
+    app.number_input(key="jump_step_1").set_value(last).run()
+    click(app, "jump_btn")
+    assert state.event_log.position == last
+    assert session_matrices(state) == steps[last]
+    assert state.holder == holder_of(state.allocation)
+
+
+# Scenario files
+def load_scenario(at, content):
+    at.get("file_uploader")[0].set_value(("scenario.npz", content, "application/octet-stream")).run()
+    return click(at, "load_btn")
+
+
+@pytest.mark.parametrize("content", [b"not a zip", b"PK\x03\x04 truncated"])
+def test_garbage_scenario_files_are_reported(app, content):
+    before = session_matrices(app.session_state)
+    load_scenario(app, content)
+    assert app.session_state.message_init.startswith(" Could not load scenario")
+    assert session_matrices(app.session_state) == before
+
+
+def test_scenario_files_load(app, ring):
+    buffer = io.BytesIO()
+    save_state(buffer, *ring(4))
+    load_scenario(app, buffer.getvalue())
+    state = app.session_state
+    assert (state.allocation, state.request, state.available) == ring(4)
+    assert state.message_init == " Scenario loaded: 4 processes, 4 resources"
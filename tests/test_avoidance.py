@@ -0,0 +1,112 @@
+import numpy as np
+import pytest
+
+from deadlock_engine import BankersAdmissionController
+from deadlock_engine.avoidance import GRANTED, QUEUED, REFUSED
+
+
+def random_row(rng, allocation, pid, density):
+    """Request row that never asks for a resource the process already holds"""
+    return [int(rng.random() < density and not held) for held in allocation[pid]]
+
+
+def assert_valid_sequence(controller, allocation, request, available):
+    """The safe sequence lets every process in it complete, in order"""
+    sequence = controller.safe_sequence()
+    assert set(sequence) | controller.unsafe == set(range(len(allocation)))
+    assert not set(sequence) & controller.unsafe
+
+    work = list(available)
+    for pid in sequence:
+        if any(allocation[pid]):
+            assert all(not wanted or free for wanted, free in zip(request[pid], work)), pid
+        work = [free or held for free, held in zip(work, allocation[pid])]
+
+
+def test_load(system, reference):
+    allocation, request, available = system
+    controller = BankersAdmissionController(allocation, request, available)
+    assert controller.unsafe == set(reference(allocation, request, available))
+    assert controller.is_safe() == (not controller.unsafe)
+    assert_valid_sequence(controller, allocation, request, available)
+
+
+@pytest.mark.parametrize("seed", range(10))
+def test_submit_matches_safety_check(seed, random_system, reference):
+    allocation, request, available = random_system(seed, 12, 10, 0.5)
+    controller = BankersAdmissionController(allocation, request, available)
+    rng = np.random.default_rng(seed)
+
+    for _ in range(150):
+        pid = int(rng.integers(len(allocation)))
+        row = random_row(rng, allocation, pid, float(rng.choice([0.0, 0.1, 0.3])))
+        before = set(reference(allocation, request, available))
+        after = set(reference(allocation, request[:pid] + [row] + request[pid + 1:], available))
+
+        outcome = controller.submit(pid, row)
+        assert outcome == (GRANTED if after <= before else QUEUED)
+        if outcome == GRANTED:
+            request[pid] = row
+            assert pid not in controller.pending
+        else:
+            assert controller.pending[pid] == row
+
+        assert controller.unsafe == set(reference(allocation, request, available))
+        assert controller.state.to_matrices()[1] == request
+        assert_valid_sequence(controller, allocation, request, available)
+
+
+def test_refuse_and_retry(reference):
+    # P0 holds R0, P1 holds R1; P0 already waits for R1
+    allocation = [[1, 0], [0, 1]]
+    request = [[0, 1], [0, 0]]
+    available = [0, 0]
+
+    refusing = BankersAdmissionController(allocation, request, available, queue_unsafe=False)
+    assert refusing.submit(1, [1, 0]) == REFUSED
+    assert refusing.pending == {}
+    assert refusing.state.to_matrices()[1] == request
+
+    controller = BankersAdmissionController(allocation, request, available)
+    assert controller.is_safe() and controller.safe_sequence() == [1, 0]
+    assert controller.submit(1, [1, 0]) == QUEUED
+    assert controller.retry_pending() == []
+
+    # P0 stops waiting: the queued request is safe now
+    assert controller.submit(0, [0, 0]) == GRANTED
+    assert controller.retry_pending() == [(1, [1, 0])]
+    assert controller.pending == {}
+    assert controller.safe_sequence() == [0, 1]
+
+    controller.submit(0, [0, 1])
+    assert controller.pending == {0: [0, 1]}
+    controller.cancel(0)
+    assert controller.pending == {}
+
+
+def test_load_keeps_pending_requests():
+    allocation = [[1, 0], [0, 1]]
+    controller = BankersAdmissionController(allocation, [[0, 1], [0, 0]], [0, 0])
+    assert controller.submit(1, [1, 0]) == QUEUED
+
+    # P0 was terminated and released R0
+    controller.load([[0, 0], [0, 1]], [[0, 0], [0, 0]], [1, 0])
+    assert controller.pending == {1: [1, 0]}
+    assert controller.retry_pending() == [(1, [1, 0])]
+    assert controller.is_safe()
+
+
+def test_relabel_keeps_the_order():
+    # Moving the same process behind its neighbour over and over runs out of label space
+    n = 3
+    allocation = np.eye(n, dtype=int).tolist()
+    request = [[0] * n for _ in range(n)]
+    controller = BankersAdmissionController(allocation, request, [0] * n)
+    for _ in range(80):
+        first = controller.head
+        second = controller.next[first]
+        assert controller.submit(first, [int(j == second) for j in range(n)]) == GRANTED
+        assert controller.submit(first, [0] * n) == GRANTED
+        labels = [controller.label[pid] for pid in controller.safe_sequence()]
+        assert labels == sorted(set(labels))
+    assert controller.is_safe()
@@ -0,0 +1,102 @@
+import json
+
+import numpy as np
+import pytest
+
+from benchmarks.bench_engine import (
+    SHAPES,
+    build_operations,
+    compare_results,
+    generate_case,
+    add_and_remove_edges,
+    load_monitor,
+    monitor_events,
+    run_suite,
+    save_results,
+    wait_pairs,
+)
+
+DETECTION_BACKENDS = ("dispatch_lists", "numpy", "packed", "sparse", "mapped")
+
+
+@pytest.mark.parametrize("shape", SHAPES)
+def test_cases_are_single_instance(shape):
+    allocation, request, available = generate_case(shape, 12, 9, 0.3)
+    assert (allocation.sum(axis=0) <= 1).all()
+    assert not (allocation & request).any()
+    assert (available == ~allocation.any(axis=0)).all()
+
+
+@pytest.mark.parametrize("shape, deadlocked", [
+    ("ring", list(range(9))),
+    ("chain", []),
+    ("star", list(range(9))),
+    ("standing", list(range(8))),
+])
+def test_shapes(shape, deadlocked, reference):
+    allocation, request, available = generate_case(shape, 12, 9, None)
+    assert reference(allocation.tolist(), request.tolist(), available.tolist()) == deadlocked
+
+
+@pytest.mark.parametrize("shape", SHAPES)
+def test_detection_backends_agree(shape, tmp_path, reference):
+    allocation, request, available = generate_case(shape, 20, 17, 0.2)
+    operations = build_operations(allocation, request, available, str(tmp_path))
+    expected = reference(allocation.tolist(), request.tolist(), available.tolist())
+    for backend in DETECTION_BACKENDS:
+        assert operations[("detect_deadlock", backend)]() == expected, backend
+    assert operations[("detect_deadlock", "incremental_load")]().deadlocked() == expected
+
+    for operation in operations.values():
+        operation()
+
+
+def test_monitor_events_leave_the_monitor_unchanged():
+    allocation, request, available = generate_case("standing", 40, 40, None)
+    assert ("detect_deadlock", "mapped") not in build_operations(allocation, request, available)
+
+    monitor = load_monitor(allocation, request)
+    assert len(monitor.graph.cycles()) == 20
+    before = (monitor.deadlocked(), monitor.to_matrices())
+    events = monitor_events(50)
+    assert monitor.handle_events(events) == []
+    assert monitor.handle_events(events) == []
+    assert monitor.errors == 0
+    assert len(monitor.graph.cycles()) == 20
+    assert monitor.deadlocked() == before[0]
+    assert [row[:40] for row in monitor.to_matrices()[0][:40]] == [row[:40] for row in before[1][0]]
+
+
+def test_extra_waits_leave_the_ring_deadlocked():
+    allocation, request, _ = generate_case("ring", 300, 300, None)
+    graph = load_monitor(allocation, request).graph
+    edges = [dict(successors) for successors in graph.successors]
+    add_and_remove_edges(graph, wait_pairs(len(graph), 100))
+    assert [dict(successors) for successors in graph.successors] == edges
+    assert [sorted(cycle) for cycle in graph.cycles()] == [list(range(300))]
+    assert wait_pairs(0, 100) == []
+
+
+def test_run_suite_filters_backends():
+    records = run_suite([8], [8], [0.2], ["random", "ring"], repeat=1, backends=["numpy", "mapped"])
+    assert {(r["backend"], r["shape"]) for r in records} == {
+        (backend, shape) for backend in ("numpy", "mapped") for shape in ("random", "ring")
+    }
+    for record in records:
+        assert record["median_s"] >= record["min_s"] >= 0
+
+    skipped = run_suite([8], [8], [0.2], ["ring"], repeat=1, max_cells=10, backends=["list", "dispatch_lists"])
+    assert skipped == []
+
+
+def test_compare_results(tmp_path):
+    records = run_suite([8], [8], [0.2], ["ring"], repeat=1, backends=["numpy", "packed"])
+    path = tmp_path / "baseline.json"
+    save_results(records, path)
+    assert json.loads(path.read_text())["records"] == records
+
+    slower = [dict(record, median_s=record["median_s"] * 3) for record in records]
+    regressions = compare_results(path, slower, threshold=1.2)
+    assert len(regressions) == len(records)
+    assert compare_results(path, records, threshold=1.2) == []
+    assert np.isclose(regressions[0][2] / regressions[0][1], 3)
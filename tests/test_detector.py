@@ -0,0 +1,169 @@
+import numpy as np
+import pytest
+
+from deadlock_engine import DeadlockDetectorSingleInstance
+
+
+def detector_for(allocation, available):
+    return DeadlockDetectorSingleInstance(len(allocation), len(available))
+
+
+# Detection
+def test_vectorized_matches_reference(system, reference):
+    allocation, request, available = system
+    detector = detector_for(allocation, available)
+    assert detector.detect_deadlock_vectorized(allocation, request, available) == reference(allocation, request, available)
+
+
+def test_detect_deadlock_takes_lists_and_arrays(system, reference):
+    allocation, request, available = system
+    detector = detector_for(allocation, available)
+    expected = reference(allocation, request, available)
+    assert detector.detect_deadlock(allocation, request, available) == expected
+    assert detector.detect_deadlock(np.array(allocation, dtype=bool).reshape(len(allocation), len(available)),
+                                    np.array(request, dtype=bool).reshape(len(allocation), len(available)),
+                                    np.array(available, dtype=bool)) == expected
+
+
+def test_detect_deadlock_does_not_modify_inputs(system):
+    allocation, request, available = system
+    copies = ([row[:] for row in allocation], [row[:] for row in request], available[:])
+    detector_for(allocation, available).detect_deadlock(allocation, request, available)
+    assert (allocation, request, available) == copies
+
+
+def test_ring_is_deadlocked(ring):
+    allocation, request, available = ring(6)
+    assert DeadlockDetectorSingleInstance(6, 6).detect_deadlock(allocation, request, available) == list(range(6))
+
+
+def test_chain_resolves_in_many_rounds(ring):
+    # The last process requests nothing, every other one waits for the next
+    allocation, request, available = ring(50)
+    request[-1] = [0] * 50
+    assert DeadlockDetectorSingleInstance(50, 50).detect_deadlock(allocation, request, available) == []
+
+
+def test_process_without_allocation_is_never_deadlocked():
+    allocation = [[1, 0], [0, 1], [0, 0]]
+    request = [[0, 1], [1, 0], [1, 1]]
+    assert DeadlockDetectorSingleInstance(3, 2).detect_deadlock(allocation, request, [0, 0]) == [0, 1]
+
+
+@pytest.mark.parametrize("n, m", [(0, 0), (0, 3), (2, 0)])
+def test_empty_systems(n, m):
+    allocation = [[0] * m for _ in range(n)]
+    assert DeadlockDetectorSingleInstance(n, m).detect_deadlock(allocation, allocation, [1] * m) == []
+
+
+# Wait-for graph and cycles
+def brute_wait_for(request, allocation):
+    n, m = len(request), len(request[0]) if request else 0
+    return [sorted({j for j in range(n) if j != i and any(request[i][k] and allocation[j][k] for k in range(m))})
+            for i in range(n)]
+
+
+def brute_components(wait_for):
+    """Strongly connected components from the reachability closure (sorted lists)"""
+    n = len(wait_for)
+    reach = [{i} for i in range(n)]
+    for i in range(n):
+        stack = [i]
+        while stack:
+            for j in wait_for[stack.pop()]:
+                if j not in reach[i]:
+                    reach[i].add(j)
+                    stack.append(j)
+    return {tuple(sorted(j for j in reach[i] if i in reach[j])) for i in range(n)}
+
+
+def test_wait_for_graph_matches_definition(system):
+    allocation, request, available = system
+    detector = detector_for(allocation, available)
+    graph = detector.build_wait_for_graph(request, allocation)
+    assert [sorted(edges) for edges in graph] == brute_wait_for(request, allocation)
+
+
+def test_strongly_connected_components(system):
+    allocation, request, _ = system
+    wait_for = brute_wait_for(request, allocation)
+    components = DeadlockDetectorSingleInstance.strongly_connected_components(wait_for)
+    assert sorted(len(c) for c in components) == sorted(len(c) for c in brute_components(wait_for))
+    assert {tuple(sorted(c)) for c in components} == brute_components(wait_for)
+
+
+def test_find_deadlock_cycle_returns_a_real_cycle(system):
+    allocation, request, available = system
+    detector = detector_for(allocation, available)
+    wait_for = brute_wait_for(request, allocation)
+    cycle = detector.find_deadlock_cycle(request, allocation)
+
+    has_cycle = any(len(c) > 1 for c in brute_components(wait_for))
+    assert bool(cycle) == has_cycle
+    assert len(set(cycle)) == len(cycle)
+    for i, pid in enumerate(cycle):
+        assert cycle[(i + 1) % len(cycle)] in wait_for[pid]
+
+
+def test_find_deadlock_components(system, reference):
+    allocation, request, available = system
+    detector = detector_for(allocation, available)
+    expected = sorted(list(c) for c in brute_components(brute_wait_for(request, allocation)) if len(c) > 1)
+    assert sorted(detector.find_deadlock_components(request, allocation)) == expected
+
+    # Restricted to the deadlocked processes every component is part of a deadlock
+    deadlocked = set(reference(allocation, request, available))
+    for component in detector.find_deadlock_components(request, allocation, deadlocked=deadlocked):
+        assert set(component) <= deadlocked
+
+
+def test_scc_without_recursion_limit():
+    n = 100_000
+    ring = [[(i + 1) % n] for i in range(n)]
+    assert len(DeadlockDetectorSingleInstance.strongly_connected_components(ring)) == 1
+    chain = [[i + 1] for i in range(n - 1)] + [[]]
+    assert len(DeadlockDetectorSingleInstance.strongly_connected_components(chain)) == n
+
+
+def test_ring_cycle_order(ring):
+    allocation, request, _ = ring(5)
+    cycle = DeadlockDetectorSingleInstance(5, 5).find_deadlock_cycle(request, allocation)
+    start = cycle.index(0)
+    assert cycle[start:] + cycle[:start] == [0, 1, 2, 3, 4]
+
+
+# Resource -> holder index
+def test_holder_index(system):
+    allocation, _, available = system
+    holder = detector_for(allocation, available).build_holder_index(allocation)
+    expected = [next((i for i, row in enumerate(allocation) if row[j]), -1) for j in range(len(available))]
+    assert holder == expected
+
+
+def test_check_holder_index_reports_stale_entries():
+    allocation = [[1, 0, 0], [0, 1, 0]]
+    detector = DeadlockDetectorSingleInstance(2, 3)
+    assert detector.check_holder_index([0, 1, -1], allocation) == []
+    assert detector.check_holder_index([1, 1, -1], allocation) == [0]
+    assert detector.check_holder_index([0, 1], allocation) == [0, 1, 2]
+
+    # A resource with two holders is never consistent with a single-holder index
+    assert detector.check_holder_index([0, 1, -1], [[1, 0, 0], [1, 1, 0]]) == [0]
+
+    # Systems without processes
+    empty = DeadlockDetectorSingleInstance(0, 3)
+    assert empty.check_holder_index([-1, -1, -1], np.zeros((0, 3), dtype=bool)) == []
+    assert empty.check_holder_index([-1, 0, -1], np.zeros((0, 3), dtype=bool)) == [1]
+    assert empty.check_holder_index([], []) == []
+
+
+def test_holder_index_gives_the_same_graph_and_recovery(system, reference):
+    allocation, request, available = system
+    detector = detector_for(allocation, available)
+    holder = detector.build_holder_index(allocation)
+    assert detector.build_wait_for_graph(request, None, holder) == detector.build_wait_for_graph(request, allocation)
+    assert detector.find_deadlock_cycle(request, None, holder) == detector.find_deadlock_cycle(request, allocation)
+
+    deadlocked = reference(allocation, request, available)
+    assert (detector.recover_by_resource_preemption(deadlocked, allocation, request, available, holder)
+            == detector.recover_by_resource_preemption(deadlocked, allocation, request, available))
@@ -0,0 +1,161 @@
+import random
+from collections import Counter
+
+import pytest
+
+from deadlock_engine import DynamicWaitForGraph
+
+
+def reachable(edges, n):
+    """reach[u] = nodes reachable from u over at least one edge"""
+    successors = [set() for _ in range(n)]
+    for u, v in edges:
+        successors[u].add(v)
+    reach = []
+    for u in range(n):
+        seen, stack = set(), list(successors[u])
+        while stack:
+            x = stack.pop()
+            if x not in seen:
+                seen.add(x)
+                stack.extend(successors[x])
+        reach.append(seen)
+    return reach
+
+
+def assert_valid_cycle(cycle, edges):
+    for k, x in enumerate(cycle):
+        assert edges[(x, cycle[(k + 1) % len(cycle)])]
+
+
+def check(graph, edges, n):
+    """Labels order the components, components are the SCCs, cycles are real"""
+    assert len(graph) == n
+    assert sorted(graph.topological_order()) == list(range(n))
+    component, label = graph.component, graph.label
+    assert len(set(label.values())) == len(label) == len(graph.members)
+    for u, v in edges:
+        if component[u] != component[v]:
+            assert label[component[u]] < label[component[v]]
+
+    reach = reachable(edges, n)
+    for u in range(n):
+        for v in range(n):
+            assert graph.has_edge(u, v) == (edges[(u, v)] > 0)
+            assert (component[u] == component[v]) == (u == v or (v in reach[u] and u in reach[v]))
+    assert graph.has_cycle() == any(u in reach[u] for u in range(n))
+
+    cycles = graph.cycles()
+    assert len(cycles) == len(graph.cyclic)
+    for cycle in cycles:
+        assert_valid_cycle(cycle, edges)
+
+
+def run_random_operations(graph, seed, steps=150):
+    rng = random.Random(seed)
+    n = len(graph)
+    edges = Counter()
+    for _ in range(steps):
+        op = rng.random()
+        if op < 0.5:
+            u, v = rng.randrange(n), rng.randrange(n)
+            reach = reachable(edges, n)
+            # Only a new cycle is returned, not another edge around a standing one
+            standing = u in reach[v] and v in reach[u]
+            closes = edges[(u, v)] == 0 and (u == v or u in reach[v]) and not standing
+            cycle = graph.insert_edge(u, v)
+            edges[(u, v)] += 1
+            assert (cycle is not None) == closes
+            if cycle is not None:
+                assert cycle[0] == u and cycle[1 % len(cycle)] == v
+                assert_valid_cycle(cycle, edges)
+        elif op < 0.85 and edges:
+            u, v = rng.choice(sorted(edges))
+            graph.delete_edge(u, v)
+            edges[(u, v)] -= 1
+            if not edges[(u, v)]:
+                del edges[(u, v)]
+        elif op < 0.9:
+            x = rng.randrange(n)
+            graph.delete_node_edges(x)
+            for edge in [edge for edge in edges if x in edge]:
+                del edges[edge]
+        else:
+            assert graph.add_node() == n
+            n += 1
+        check(graph, edges, n)
+
+
+@pytest.mark.parametrize("seed", range(30))
+def test_random_operations_match_brute_force(seed):
+    run_random_operations(DynamicWaitForGraph(random.Random(seed).randint(2, 9)), seed)
+
+
+@pytest.mark.parametrize("seed", range(10))
+def test_relabeling(seed):
+    graph = DynamicWaitForGraph(8)
+    graph.MAX_LABEL_DEPTH = 2
+    run_random_operations(graph, seed, steps=300)
+    assert max(len(label) for label in graph.label.values()) <= 2
+
+
+def test_counted_edges():
+    graph = DynamicWaitForGraph(2)
+    assert graph.insert_edge(0, 1) is None
+    assert graph.insert_edge(0, 1) is None
+    assert graph.insert_edge(1, 0) == [1, 0]
+    graph.delete_edge(0, 1)
+    assert graph.has_cycle() and graph.cycles() == [[0, 1]]
+    graph.delete_edge(0, 1)
+    assert not graph.has_cycle() and graph.topological_order() == [1, 0]
+
+
+def test_split_keeps_standing_cycles():
+    # Two 3-cycles joined into one component by a 2-cycle between them
+    graph = DynamicWaitForGraph(6)
+    for u, v in [(0, 1), (1, 2), (2, 0), (3, 4), (4, 5), (5, 3), (2, 3)]:
+        graph.insert_edge(u, v)
+    assert graph.insert_edge(3, 2) == [3, 2]
+    assert len(set(graph.component)) == 1
+
+    graph.delete_edge(3, 2)
+    assert len(graph.cycles()) == 2
+    assert graph.label[graph.component[0]] < graph.label[graph.component[3]]
+
+    graph.delete_node_edges(4)
+    assert [sorted(cycle) for cycle in graph.cycles()] == [[0, 1, 2]]
+    assert graph.insert_edge(4, 4) == [4]
+    assert sorted(map(sorted, graph.cycles())) == [[0, 1, 2], [4]]
+
+
+def test_large_standing_cycle(monkeypatch):
+    n = 2000
+    graph = DynamicWaitForGraph(n)
+    for u in range(n - 1):
+        assert graph.insert_edge(u, u + 1) is None
+    assert sorted(graph.insert_edge(n - 1, 0)) == list(range(n))
+
+    # Extra waits inside the deadlock neither search a path nor decompose the component
+    calls = Counter()
+
+    def counted(name):
+        method = getattr(graph, name)
+
+        def wrapper(*args):
+            calls[name] += 1
+            return method(*args)
+        return wrapper
+
+    for name in ("_path", "_split"):
+        monkeypatch.setattr(graph, name, counted(name))
+    rng = random.Random(0)
+    for _ in range(300):
+        u, v = rng.randrange(n), rng.randrange(n)
+        assert graph.insert_edge(u, v) is None
+        graph.delete_edge(u, v)
+    assert calls == {}
+    assert len(graph.cyclic) == 1 and len(graph.members[graph.component[0]]) == n
+
+    graph.delete_edge(n - 1, 0)
+    assert calls == {"_split": 1} and not graph.has_cycle()
+    assert graph.topological_order() == list(range(n))
@@ -0,0 +1,147 @@
+import random
+
+import pytest
+
+from deadlock_engine import EventLog, PackedSystemState
+
+
+def apply(state, changes):
+    """Apply (field, index, value) changes to an (allocation, request, available, status) list state"""
+    allocation, request, available, status = state
+    for field, index, value in changes:
+        if field == "allocation":
+            allocation[index[0]][index[1]] = value
+        elif field == "request":
+            request[index[0]][index[1]] = value
+        elif field == "available":
+            available[index] = value
+        elif field == "status":
+            status[index] = value
+        else:
+            request[:] = [PackedSystemState.unpack_row(row, len(available)) for row in value]
+
+
+def copy(state):
+    allocation, request, available, status = state
+    return [row[:] for row in allocation], [row[:] for row in request], available[:], status[:]
+
+
+def random_event(rng, state):
+    """A random event on the list state as (label, changes) with old and new values"""
+    allocation, request, available, status = state
+    n, m = len(allocation), len(available)
+    changes = []
+    for _ in range(rng.randint(1, 3)):
+        kind = rng.choice(["allocation", "request", "available", "status", "request_matrix"])
+        pid, j = rng.randrange(n), rng.randrange(m)
+        if kind == "allocation":
+            changes.append((kind, (pid, j), allocation[pid][j], 1 - allocation[pid][j]))
+        elif kind == "request":
+            changes.append((kind, (pid, j), request[pid][j], 1 - request[pid][j]))
+        elif kind == "available":
+            changes.append((kind, j, available[j], 1 - available[j]))
+        elif kind == "status":
+            changes.append((kind, pid, status[pid], rng.choice(["Running", "Waiting", "Terminated"])))
+        else:
+            new = [[int(rng.random() < 0.3) for _ in range(m)] for _ in range(n)]
+            changes.append((kind, None, tuple(PackedSystemState.pack_rows(request)),
+                            tuple(PackedSystemState.pack_rows(new))))
+        field, index, _, new = changes[-1]
+        apply(state, [(field, index, new)])
+    return f"event {rng.random():.6f}", changes
+
+
+@pytest.fixture
+def recorded(random_system):
+    """Event log after 120 random events, with the list state after every step"""
+    allocation, request, available = random_system(3, 6, 5, 0.4)
+    status = ["Running"] * 6
+    log = EventLog(allocation, request, available, status, snapshot_interval=7)
+    state = (allocation, request, available, status)
+    states = [copy(state)]
+    rng = random.Random(3)
+    for _ in range(120):
+        log.record(*random_event(rng, state))
+        states.append(copy(state))
+    return log, states
+
+
+def as_tuple(state):
+    return tuple(map(list, state))
+
+
+def test_record_mirrors_the_state(recorded):
+    log, states = recorded
+    assert log.position == log.last_step == 120
+    assert as_tuple(log.current_state()) == as_tuple(states[-1])
+    assert set(log.snapshots) == {0} | set(range(7, 121, 7))
+
+
+def test_undo_and_redo_restore_every_step(recorded):
+    log, states = recorded
+    state = copy(states[-1])
+    for step in range(119, -1, -1):
+        apply(state, log.undo())
+        assert log.position == step
+        assert as_tuple(state) == as_tuple(states[step]) == as_tuple(log.current_state())
+    assert not log.can_undo() and log.undo() == []
+
+    for step in range(1, 121):
+        apply(state, log.redo())
+        assert as_tuple(state) == as_tuple(states[step])
+    assert not log.can_redo() and log.redo() == []
+
+
+def test_jump(recorded):
+    log, states = recorded
+    state = copy(states[-1])
+    rng = random.Random(0)
+    for step in [0, 120, 7, 8, 63, 62, 1, 119] + [rng.randrange(121) for _ in range(30)]:
+        loaded, changes = log.jump(step)
+        if loaded is not None:
+            state = copy(loaded)
+        apply(state, changes)
+        assert log.position == step
+        assert as_tuple(state) == as_tuple(states[step]) == as_tuple(log.current_state())
+
+    assert log.jump(-5)[1] == [] and log.position == 0
+    log.jump(500)
+    assert log.position == 120
+
+
+def test_recording_discards_the_redo_tail(recorded):
+    log, states = recorded
+    log.jump(30)
+    assert log.record("new", [("available", 0, states[30][2][0], 1 - states[30][2][0])]) == 31
+    assert log.last_step == 31 and not log.can_redo()
+    assert max(log.snapshots) == 28
+    assert log.labels(29) == [(30, log.labels()[29][1]), (31, "new")]
+
+    log.undo()
+    assert as_tuple(log.current_state()) == as_tuple(states[30])
+    assert log.record("nothing", []) == 30 and log.can_redo()
+
+
+def test_trimming_keeps_the_recent_history(random_system):
+    allocation, request, available = random_system(1, 4, 4, 0.4)
+    log = EventLog(allocation, request, available, snapshot_interval=10, max_events=25)
+    state = (allocation, request, available, [None] * 4)
+    states = [copy(state)]
+    rng = random.Random(1)
+    for _ in range(100):
+        log.record(*random_event(rng, state))
+        states.append(copy(state))
+        assert len(log.events) <= 25 + 10
+
+    # Step 96 exceeded max_events, the events up to the snapshot at step 80 were dropped
+    assert log.first_step == 80 and min(log.snapshots) == 80
+    assert [step for step, _ in log.labels()] == list(range(81, 101))
+    log.jump(0)
+    assert log.position == 80
+    assert as_tuple(log.current_state()) == as_tuple(states[80])
+
+
+def test_unknown_field(ring):
+    log = EventLog(*ring(3))
+    with pytest.raises(ValueError):
+        log.record("bad", [("holder", 0, -1, 1)])
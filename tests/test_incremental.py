@@ -0,0 +1,163 @@
+import random
+
+import pytest
+
+from deadlock_engine import DeadlockDetectorSingleInstance, IncrementalDeadlockDetector
+
+
+class Mirror:
+    """The same updates on plain lists, checked with the reference algorithm"""
+    def __init__(self, allocation, request, available):
+        self.allocation = [row[:] for row in allocation]
+        self.request = [row[:] for row in request]
+        self.available = available[:]
+
+    def set_request(self, pid, resource, value):
+        self.request[pid][resource] = int(value)
+
+    def set_allocation(self, pid, resource, value):
+        self.allocation[pid][resource] = int(value)
+
+    def set_available(self, resource, value):
+        self.available[resource] = int(value)
+
+    def set_request_row(self, pid, row):
+        self.request[pid] = list(row)
+
+    def terminate(self, pid):
+        for j, held in enumerate(self.allocation[pid]):
+            if held:
+                self.available[j] = 1
+        self.allocation[pid] = [0] * len(self.available)
+        self.request[pid] = [0] * len(self.available)
+
+    def preempt(self, pid, resource):
+        self.available[resource] = 1
+        self.allocation[pid][resource] = 0
+        self.request[pid][resource] = 1
+
+
+def random_update(rng, n, m):
+    """Returns (method name, args) of a random cell, row or recovery update"""
+    kind = rng.choice(["set_request", "set_request", "set_allocation", "set_available",
+                       "set_request_row", "terminate", "preempt"])
+    pid, resource, value = rng.randrange(n), rng.randrange(m), rng.randrange(2)
+    if kind in ("set_request", "set_allocation"):
+        return kind, (pid, resource, value)
+    if kind == "set_available":
+        return kind, (resource, value)
+    if kind == "set_request_row":
+        return kind, (pid, [int(rng.random() < 0.3) for _ in range(m)])
+    if kind == "terminate":
+        return kind, (pid,)
+    return kind, (pid, resource)
+
+
+def test_load_matches_reference(system, reference):
+    allocation, request, available = system
+    assert IncrementalDeadlockDetector(allocation, request, available).deadlocked() == reference(*system)
+
+
+@pytest.mark.parametrize("seed", range(12))
+def test_updates_match_full_detection(seed, random_system, reference):
+    rng = random.Random(seed)
+    n, m = rng.randint(1, 12), rng.randint(1, 10)
+    allocation, request, available = random_system(seed, n, m, rng.choice([0.2, 0.5]))
+    incremental = IncrementalDeadlockDetector(allocation, request, available)
+    mirror = Mirror(allocation, request, available)
+
+    for step in range(200):
+        kind, args = random_update(rng, n, m)
+        getattr(incremental, kind)(*args)
+        getattr(mirror, kind)(*args)
+        assert incremental.deadlocked() == reference(mirror.allocation, mirror.request, mirror.available), (step, kind, args)
+
+
+def test_retract_follows_dependent_processes(ring, reference):
+    # Chain 0 -> 1 -> ... -> 4 resolves; closing the ring retracts every finished process
+    allocation, request, available = ring(5)
+    request[4] = [0] * 5
+    incremental = IncrementalDeadlockDetector(allocation, request, available)
+    assert incremental.deadlocked() == []
+
+    incremental.set_request(4, 0, 1)
+    assert incremental.deadlocked() == [0, 1, 2, 3, 4]
+
+    incremental.set_request(4, 0, 0)
+    assert incremental.deadlocked() == []
+
+
+def test_no_op_updates_keep_state(ring):
+    incremental = IncrementalDeadlockDetector(*ring(4))
+    before = (list(incremental.finish), list(incremental.missing), list(incremental.finished_holders))
+    incremental.set_request(0, 1, 1)
+    incremental.set_allocation(0, 0, 1)
+    incremental.set_available(2, 0)
+    incremental.set_request_row(3, [1, 0, 0, 0])
+    assert (list(incremental.finish), list(incremental.missing), list(incremental.finished_holders)) == before
+
+
+# Recovery to a fixpoint
+def list_recovery(strategy, allocation, request, available, max_actions=None):
+    """Repeated list-based recover_by_* calls; returns final matrices and (process, resource) actions"""
+    detector = DeadlockDetectorSingleInstance(len(allocation), len(available))
+    deadlocked = detector.detect_deadlock(allocation, request, available)
+    actions = []
+    while deadlocked and (max_actions is None or len(actions) < max_actions):
+        if strategy == "termination":
+            allocation, request, available, victims = detector.recover_by_process_termination(
+                deadlocked, allocation, request, available)
+            step = [(pid, None) for pid in victims]
+        else:
+            allocation, request, available, step = detector.recover_by_resource_preemption(
+                deadlocked, allocation, request, available)
+        if not step:
+            break
+        actions.extend(step)
+        deadlocked = detector.detect_deadlock(allocation, request, available)
+    return allocation, request, available, actions
+
+
+@pytest.mark.parametrize("strategy", ["termination", "preemption"])
+def test_fixpoint_matches_list_recovery(system, strategy, reference):
+    allocation, request, available = system
+    detector = DeadlockDetectorSingleInstance(len(allocation), len(available))
+    *matrices, log = detector.recover_to_fixpoint(allocation, request, available, strategy)
+    *expected, actions = list_recovery(strategy, allocation, request, available)
+
+    assert [(entry["process"], entry["resource"]) for entry in log] == actions
+    assert matrices == expected
+    assert [entry["deadlocked"] for entry in log] == [
+        len(reference(*list_recovery(strategy, allocation, request, available, k + 1)[:3]))
+        for k in range(len(log))
+    ]
+    if strategy == "termination":
+        assert reference(*matrices) == []
+
+
+def test_fixpoint_respects_max_actions(ring):
+    # Two separate 3-process rings need one termination each
+    allocation, _, available = ring(6)
+    request = [[int(j == (i // 3) * 3 + (i + 1) % 3) for j in range(6)] for i in range(6)]
+    detector = DeadlockDetectorSingleInstance(6, 6)
+    full = detector.recover_to_fixpoint(allocation, request, available)[3]
+    assert len(full) > 1
+
+    *matrices, log = detector.recover_to_fixpoint(allocation, request, available, max_actions=1)
+    assert log == full[:1]
+    assert matrices == list(list_recovery("termination", allocation, request, available, 1)[:3])
+    assert detector.detect_deadlock(*matrices) == [3, 4, 5]
+    assert allocation == ring(6)[0]
+
+
+def test_recover_until_deadlock_free_updates_the_detector(ring, reference):
+    incremental = IncrementalDeadlockDetector(*ring(5))
+    log = incremental.recover_until_deadlock_free("preemption")
+    assert log[-1]["deadlocked"] == 0 == len(incremental.deadlocked())
+    assert incremental.journal is None
+    assert incremental.recover_until_deadlock_free("termination") == []
+
+
+def test_unknown_strategy(ring):
+    with pytest.raises(ValueError):
+        IncrementalDeadlockDetector(*ring(3)).recover_until_deadlock_free("rollback")
@@ -0,0 +1,164 @@
+import threading
+import time
+import timeit
+
+import pytest
+
+from deadlock_engine import LockWatcher, locks
+
+
+def wait_until(condition, timeout=5.0):
+    deadline = time.monotonic() + timeout
+    while not condition():
+        assert time.monotonic() < deadline, "timed out"
+        time.sleep(0.005)
+
+
+def waiting_on(*targets):
+    """True once every target lock has a thread blocked on it"""
+    waited = {record.waiting[0] for record in list(locks._records.values()) if record.waiting is not None}
+    return all(target in waited for target in targets)
+
+
+def crossed_threads(first, second, timeout=1.0):
+    """Two threads taking the locks in opposite order; the timeouts end the deadlock"""
+    held = threading.Barrier(2)
+
+    def worker(mine, theirs):
+        with mine:
+            held.wait()
+            if theirs.acquire(timeout=timeout):
+                theirs.release()
+
+    threads = [
+        threading.Thread(target=worker, args=(first, second), name="alpha"),
+        threading.Thread(target=worker, args=(second, first), name="beta"),
+    ]
+    for thread in threads:
+        thread.start()
+    return threads
+
+
+def test_poll_reports_a_deadlock_once():
+    first, second = locks.Lock("first"), locks.Lock("second")
+    watcher = LockWatcher()
+    threads = crossed_threads(first, second)
+    wait_until(lambda: waiting_on(first, second))
+
+    # A wait only counts once it was seen by two polls
+    assert watcher.poll() is None
+    report = watcher.poll()
+    assert report is not None and watcher.deadlocks == [report]
+    assert sorted(report["locks"]) == sorted([first.label, second.label])
+    assert sorted(name.split(" #")[0] for name in report["deadlocked"]) == ["alpha", "beta"]
+    assert sorted(report["cycle"]) == report["deadlocked"]
+    assert report["waiting_for"] >= 0
+    assert watcher.poll() is None
+
+    for thread in threads:
+        thread.join()
+    assert watcher.poll() is None
+    assert not first.locked() and not second.locked()
+
+
+def test_watcher_thread_calls_back():
+    found = threading.Event()
+    first, second = locks.RLock("first"), locks.RLock("second")
+    with LockWatcher(interval=0.02, on_deadlock=lambda report: found.set()) as watcher:
+        threads = crossed_threads(first, second)
+        assert found.wait(5)
+        for thread in threads:
+            thread.join()
+    assert len(watcher.deadlocks) == 1
+    assert watcher._thread is None
+
+
+def test_plain_waits_are_not_deadlocks():
+    lock = locks.Lock("busy")
+    watcher = LockWatcher()
+    lock.acquire()
+    thread = threading.Thread(target=lambda: lock.acquire(timeout=2) and lock.release())
+    thread.start()
+    wait_until(lambda: waiting_on(lock))
+    assert watcher.poll() is None
+    assert watcher.poll() is None
+    lock.release()
+    thread.join()
+    assert watcher.deadlocks == []
+
+
+def test_lock():
+    lock = locks.Lock()
+    assert "test_locks.py" in lock.label
+    assert lock.acquire() and lock.locked()
+    assert lock._owner is locks._local.record
+    assert not lock.acquire(False)
+    assert not lock.acquire(timeout=0.01)
+    lock.release()
+    with lock:
+        assert lock.locked()
+    assert not lock.locked() and lock._owner is None
+
+
+def test_rlock_reentrancy():
+    lock = locks.RLock("reentrant")
+    with lock:
+        with lock:
+            assert lock._count == 2
+        assert lock._is_owned()
+    assert lock._owner is None
+    with pytest.raises(RuntimeError):
+        lock.release()
+
+    lock.acquire()
+    other = []
+    thread = threading.Thread(target=lambda: other.append(lock.acquire(False)))
+    thread.start()
+    thread.join()
+    assert other == [False]
+    lock.release()
+
+
+@pytest.mark.parametrize("lock", [None, "lock"])
+def test_condition(lock):
+    condition = locks.Condition(locks.Lock() if lock else None)
+    ready = []
+
+    def consumer():
+        with condition:
+            condition.wait_for(lambda: ready, timeout=5)
+
+    thread = threading.Thread(target=consumer)
+    thread.start()
+    with condition:
+        ready.append(True)
+        condition.notify_all()
+    thread.join(5)
+    assert not thread.is_alive()
+
+
+def with_block_cost(lock):
+    """Seconds per uncontended `with lock:` (best of several runs)"""
+    number = 20000
+    return min(timeit.repeat("with lock: pass", globals={"lock": lock}, number=number, repeat=9)) / number
+
+
+@pytest.mark.parametrize("kind", ["Lock", "RLock"])
+def test_uncontended_overhead_is_below_a_microsecond(kind):
+    overhead = with_block_cost(getattr(locks, kind)()) - with_block_cost(locks._ORIGINALS[kind]())
+    assert overhead < 1e-6
+
+
+def test_install_and_uninstall():
+    original = threading.Lock, threading.RLock, threading.Condition
+    watcher = locks.install(interval=0.05)
+    try:
+        assert (threading.Lock, threading.RLock, threading.Condition) == (locks.Lock, locks.RLock, locks.Condition)
+        assert isinstance(threading.Lock(), locks.Lock)
+        with pytest.raises(RuntimeError):
+            locks.install()
+    finally:
+        locks.uninstall()
+    assert (threading.Lock, threading.RLock, threading.Condition) == original
+    assert watcher._thread is None
+    locks.uninstall()
@@ -0,0 +1,106 @@
+import json
+
+import numpy as np
+import pytest
+
+from deadlock_engine import DeadlockDetectorSingleInstance, MappedSystemState, load_state, save_state
+
+
+def detector_for(allocation, available):
+    return DeadlockDetectorSingleInstance(len(allocation), len(available))
+
+
+@pytest.fixture
+def mapped(tmp_path):
+    """Factory for mapped states with 3-row blocks, so every stream crosses block borders"""
+    count = iter(range(1000))
+
+    def create(allocation, request, available, block_rows=3):
+        return MappedSystemState.from_matrices(tmp_path / f"state{next(count)}", allocation, request, available, block_rows)
+    return create
+
+
+def test_round_trip(system, mapped):
+    state = mapped(*system)
+    assert state.to_matrices() == tuple(system)
+    reopened = MappedSystemState(state.directory, mode="r")
+    assert reopened.to_matrices() == tuple(system)
+    assert reopened.nbytes() == state.row_bytes * (2 * len(system[0]) + 1)
+
+
+def test_detection_matches_reference(system, mapped, reference):
+    allocation, request, available = system
+    state = mapped(allocation, request, available)
+    expected = reference(allocation, request, available)
+    detector = detector_for(allocation, available)
+    assert detector.detect_deadlock_mapped(state) == expected
+    assert detector.detect_deadlock(state) == expected
+
+
+def test_read_blocks(random_system, mapped):
+    allocation, request, available = random_system(2, 20, 11, 0.4)
+    state = mapped(allocation, request, available, block_rows=4)
+    assert list(state.blocks()) == [(0, 4), (4, 8), (8, 12), (12, 16), (16, 20)]
+
+    rows = [1, 2, 9, 19]
+    blocks = list(state.read_blocks(rows, matrices=("request",)))
+    assert [pids.tolist() for pids, _ in blocks] == [[1, 2], [9], [19]]
+    packed = np.packbits(np.array(request, dtype=bool), axis=1, bitorder="little")
+    for pids, block in blocks:
+        assert (block == packed[pids]).all()
+
+
+def test_cells(ring, mapped):
+    state = mapped(*ring(10))
+    assert state.is_allocated(9, 9) and state.is_requested(9, 0) and not state.is_available(3)
+    state.set_allocation(9, 9, 0)
+    state.set_request(2, 8, 1)
+    state.set_available(9, 1)
+    assert (state.allocated_count(9), state.requested_count(2)) == (0, 2)
+    assert state.is_available(9) and not state.is_allocated(9, 9)
+    assert MappedSystemState(state.directory, mode="r").to_matrices() == state.to_matrices()
+
+
+def test_holder_index(system, mapped):
+    allocation, request, available = system
+    detector = detector_for(allocation, available)
+    assert detector.build_holder_index(mapped(allocation, request, available)) == detector.build_holder_index(allocation)
+
+
+@pytest.mark.parametrize("method", ["recover_by_process_termination", "recover_by_resource_preemption"])
+def test_recovery_matches_list_recovery(system, mapped, reference, method):
+    allocation, request, available = system
+    detector = detector_for(allocation, available)
+    state = mapped(allocation, request, available)
+    deadlocked = reference(allocation, request, available)
+
+    *expected, expected_action = getattr(detector, method)(deadlocked, allocation, request, available)
+    result = getattr(detector, method)(deadlocked, state)
+    assert result[:3] == (state, None, None)
+    assert result[3] == expected_action
+    assert state.to_matrices() == tuple(expected)
+
+
+def test_preemption_without_resources(mapped):
+    detector = DeadlockDetectorSingleInstance(2, 0)
+    state = mapped([[], []], [[], []], [])
+    assert detector.recover_by_resource_preemption([0, 1], [[], []], [[], []], [])[3] == []
+    assert detector.recover_by_resource_preemption([0, 1], state)[3] == []
+
+
+def test_from_saved_state(system, mapped, tmp_path):
+    save_state(tmp_path / "saved.npz", *system)
+    state = MappedSystemState.from_saved_state(tmp_path / "copy", load_state(tmp_path / "saved.npz"), block_rows=2)
+    assert state.to_matrices() == tuple(system)
+
+
+def test_unsupported_directories(ring, mapped):
+    state = mapped(*ring(3))
+    header_path = state.directory / "header.json"
+    header = json.loads(header_path.read_text())
+    header_path.write_text(json.dumps(dict(header, version=header["version"] + 1)))
+    with pytest.raises(ValueError):
+        MappedSystemState(state.directory)
+    header_path.write_text(json.dumps(dict(header, format="deadlock-state")))
+    with pytest.raises(ValueError):
+        MappedSystemState(state.directory)
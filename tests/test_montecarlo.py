@@ -0,0 +1,86 @@
+import csv
+
+import numpy as np
+import pytest
+
+from deadlock_engine import DeadlockDetectorSingleInstance, run_sweep
+from deadlock_engine.montecarlo import (
+    RESULT_FIELDS,
+    detect_deadlock_batch,
+    generate_batch,
+    recover_batch,
+    write_results,
+)
+
+
+@pytest.fixture
+def batch():
+    return generate_batch(np.random.default_rng(7), 300, 6, 5, 0.4)
+
+
+def as_lists(batch, b):
+    allocation, request, available = batch
+    return allocation[b].astype(int).tolist(), request[b].astype(int).tolist(), available[b].astype(int).tolist()
+
+
+def recovery_steps(strategy, allocation, request, available, limit=1000):
+    """Steps of the list-based recovery until deadlock-free, None if preemption gets stuck"""
+    detector = DeadlockDetectorSingleInstance(len(allocation), len(available))
+    recover = (detector.recover_by_process_termination if strategy == "termination"
+               else detector.recover_by_resource_preemption)
+    steps = 0
+    deadlocked = detector.detect_deadlock(allocation, request, available)
+    while deadlocked and steps < limit:
+        allocation, request, available, action = recover(deadlocked, allocation, request, available)
+        if not action:
+            return None
+        steps += 1
+        deadlocked = detector.detect_deadlock(allocation, request, available)
+    return steps
+
+
+def test_generated_systems_are_single_instance(batch):
+    allocation, request, available = batch
+    assert (allocation.sum(axis=1) <= 1).all()
+    assert not (allocation & request).any()
+    assert (available == ~allocation.any(axis=1)).all()
+
+
+def test_batch_detection_matches_reference(batch, reference):
+    deadlocked = detect_deadlock_batch(*batch)
+    for b in range(len(deadlocked)):
+        assert np.flatnonzero(deadlocked[b]).tolist() == reference(*as_lists(batch, b))
+
+
+@pytest.mark.parametrize("strategy", ["termination", "preemption"])
+def test_batch_recovery_matches_list_recovery(batch, strategy):
+    deadlocked = detect_deadlock_batch(*batch)
+    steps, failed = recover_batch(strategy, *batch, deadlocked.copy())
+    for b in range(len(steps)):
+        expected = recovery_steps(strategy, *as_lists(batch, b))
+        if expected is None:
+            assert failed[b]
+        else:
+            assert not failed[b] and steps[b] == expected
+
+
+def test_sweep_does_not_depend_on_the_worker_count():
+    args = ([4, 6], [3], [0.3, 0.6], 3000)
+    one = run_sweep(*args, workers=1, seed=5, chunk_trials=1000)
+    two = run_sweep(*args, workers=2, seed=5, chunk_trials=1000)
+    assert one == two
+    assert [(row["processes"], row["density"]) for row in one] == [(4, 0.3), (4, 0.6), (6, 0.3), (6, 0.6)]
+    for row in one:
+        assert row["trials"] == 3000
+        assert 0 <= row["deadlock_rate"] <= 1
+        assert row["deadlocks"] == 0 or row["mean_deadlocked"] >= 2
+
+
+def test_write_results(tmp_path):
+    rows = run_sweep([3], [3], [0.5], 200, workers=1)
+    path = tmp_path / "sweep.csv"
+    write_results(rows, path)
+    with open(path, newline="") as f:
+        read = list(csv.DictReader(f))
+    assert list(read[0]) == RESULT_FIELDS
+    assert int(read[0]["trials"]) == 200
@@ -0,0 +1,117 @@
+import numpy as np
+import pytest
+
+from deadlock_engine import (
+    DeadlockDetectorMultiInstance,
+    DeadlockDetectorSingleInstance,
+    generate_multi_instance_system,
+)
+
+
+def detect_reference(allocation, request, available):
+    """Textbook Work/Finish detection with vector comparisons"""
+    allocation, request = np.asarray(allocation).tolist(), np.asarray(request).tolist()
+    work = np.asarray(available).tolist()
+    n = len(allocation)
+    finish = [not any(row) for row in allocation]
+    changed = True
+    while changed:
+        changed = False
+        for i in range(n):
+            if not finish[i] and all(r <= w for r, w in zip(request[i], work)):
+                work = [w + a for w, a in zip(work, allocation[i])]
+                finish[i] = changed = True
+    return [i for i in range(n) if not finish[i]]
+
+
+SIZES = [(seed, n, m) for seed, (n, m) in enumerate([(1, 1), (4, 3), (8, 5), (20, 6), (3, 12)])]
+
+
+@pytest.fixture(params=SIZES, ids=[f"seed{s}-{n}x{m}" for s, n, m in SIZES])
+def multi_system(request):
+    seed, n, m = request.param
+    return generate_multi_instance_system(n, m, max_instances=4, seed=seed)
+
+
+def test_generated_systems(multi_system):
+    allocation, request, available = multi_system
+    total = allocation.sum(axis=0) + available
+    assert (allocation >= 0).all() and (available >= 0).all()
+    assert (1 <= total).all() and (total <= 4).all()
+    assert (request <= total).all()
+
+
+def test_detection_matches_reference(multi_system):
+    allocation, request, available = multi_system
+    detector = DeadlockDetectorMultiInstance(*allocation.shape)
+    assert detector.detect_deadlock(allocation, request, available) == detect_reference(allocation, request, available)
+
+
+@pytest.mark.parametrize("seed", range(30))
+def test_detection_on_contended_systems(seed):
+    # Requests drawn up to twice the instances make deadlocks common
+    rng = np.random.default_rng(seed)
+    allocation = rng.integers(0, 3, (6, 4))
+    available = rng.integers(0, 2, 4)
+    request = rng.integers(0, 4, (6, 4)) * (rng.random((6, 4)) < 0.4)
+    detector = DeadlockDetectorMultiInstance(6, 4)
+    assert detector.detect_deadlock(allocation, request, available) == detect_reference(allocation, request, available)
+
+
+def test_finish_order_is_a_completion_sequence(multi_system):
+    allocation, request, available = multi_system
+    order, finish = DeadlockDetectorMultiInstance(*allocation.shape).finish_order(allocation, request, available)
+    assert sorted(order) == np.flatnonzero(finish).tolist()
+
+    work = available.copy()
+    for pid in order:
+        if allocation[pid].any():
+            assert (request[pid] <= work).all()
+        work += allocation[pid]
+
+
+def test_single_instance_systems_agree(system):
+    allocation, request, available = system
+    n, m = len(allocation), len(available)
+    if not n or not m:
+        pytest.skip("empty system")
+    single = DeadlockDetectorSingleInstance(n, m).detect_deadlock(allocation, request, available)
+    assert DeadlockDetectorMultiInstance(n, m).detect_deadlock(allocation, request, available) == single
+
+
+def test_recovery_keeps_the_instances(multi_system):
+    allocation, request, available = multi_system
+    detector = DeadlockDetectorMultiInstance(*allocation.shape)
+    total = allocation.sum(axis=0) + available
+    deadlocked = detector.detect_deadlock(allocation, request, available)
+
+    new_allocation, new_request, new_available, terminated = detector.recover_by_process_termination(
+        deadlocked, allocation, request, available)
+    assert (new_allocation.sum(axis=0) + new_available == total).all()
+    if deadlocked:
+        victim = terminated[0]
+        assert victim in deadlocked
+        assert request[victim].sum() == max(request[pid].sum() for pid in deadlocked)
+        assert not new_allocation[victim].any() and not new_request[victim].any()
+    else:
+        assert terminated == []
+
+    new_allocation, new_request, new_available, preempted = detector.recover_by_resource_preemption(
+        deadlocked, allocation, request, available)
+    assert (new_allocation.sum(axis=0) + new_available == total).all()
+    for pid, resource, instances in preempted:
+        assert instances == allocation[pid, resource] > 0
+        assert new_request[pid, resource] == request[pid, resource] + instances
+
+
+def test_recovery_returns_copies():
+    allocation = np.array([[1, 0], [0, 1]])
+    request = np.array([[0, 1], [1, 0]])
+    available = np.array([0, 0])
+    detector = DeadlockDetectorMultiInstance(2, 2)
+    assert detector.detect_deadlock(allocation, request, available) == [0, 1]
+
+    result = detector.recover_by_process_termination([0, 1], allocation, request, available)
+    assert result[3] == [0] and result[2].tolist() == [1, 0]
+    assert allocation.tolist() == [[1, 0], [0, 1]] and available.tolist() == [0, 0]
+    assert detector.detect_deadlock(*result[:3]) == []
@@ -0,0 +1,40 @@
+import subprocess
+import sys
+from pathlib import Path
+
+import pytest
+
+import deadlock_engine
+
+ROOT = Path(__file__).resolve().parents[1]
+
+
+def loaded_modules(code):
+    """Names of the modules loaded after running code in a fresh interpreter"""
+    script = f"import sys\n{code}\nprint('\\n'.join(sys.modules))"
+    result = subprocess.run([sys.executable, "-c", script], cwd=ROOT, capture_output=True, text=True, check=True)
+    return set(result.stdout.split())
+
+
+def test_import_is_cheap():
+    modules = loaded_modules("import deadlock_engine")
+    assert "numpy" not in modules
+    assert not any(name.startswith("deadlock_engine.") for name in modules)
+
+
+def test_engine_does_not_need_the_ui():
+    modules = loaded_modules("import deadlock_engine\nfor name in deadlock_engine.__all__: getattr(deadlock_engine, name)")
+    assert "streamlit" not in modules
+    assert "pandas" not in modules
+
+
+@pytest.mark.parametrize("name", deadlock_engine.__all__)
+def test_exports_resolve(name):
+    value = getattr(deadlock_engine, name)
+    assert value.__name__ == name
+    assert name in dir(deadlock_engine)
+
+
+def test_unknown_attribute():
+    with pytest.raises(AttributeError):
+        deadlock_engine.NoSuchThing
@@ -0,0 +1,43 @@
+from deadlock_engine import DeadlockDetectorSingleInstance, PackedSystemState
+
+
+def test_round_trip(system):
+    assert PackedSystemState.from_matrices(*system).to_matrices() == system
+
+
+def test_packed_detection_matches_reference(system, reference):
+    allocation, request, available = system
+    state = PackedSystemState.from_matrices(allocation, request, available)
+    detector = DeadlockDetectorSingleInstance(len(allocation), len(available))
+    assert detector.detect_deadlock_packed(state) == reference(allocation, request, available)
+    assert detector.detect_deadlock(state) == reference(allocation, request, available)
+
+
+def test_bit_order_is_resource_index():
+    state = PackedSystemState.from_matrices([[1, 0, 0, 1]], [[0, 1, 0, 0]], [0, 0, 1, 0])
+    assert state.allocation_rows == [0b1001]
+    assert state.request_rows == [0b0010]
+    assert state.available == 0b0100
+
+
+def test_cell_updates():
+    state = PackedSystemState(2, 70)
+    state.set_allocation(1, 69, 1)
+    state.set_request(0, 3, 1)
+    state.set_available(64, 1)
+    assert state.is_allocated(1, 69) and state.is_requested(0, 3) and state.is_available(64)
+    assert state.allocated_count(1) == 1 and state.requested_count(0) == 1
+
+    state.set_allocation(1, 69, 0)
+    state.set_request_row(0, [0] * 70)
+    state.set_available(64, 0)
+    assert state.allocation_rows == [0, 0] and state.request_rows == [0, 0] and state.available == 0
+
+
+def test_wide_rows_keep_every_bit():
+    m = 1000
+    allocation = [[int(j % 7 == 0) for j in range(m)]]
+    state = PackedSystemState.from_matrices(allocation, [[0] * m], [0] * m)
+    assert state.allocated_count(0) == sum(allocation[0])
+    assert state.to_matrices()[0] == allocation
+    assert state.nbytes() == 125 * 3
@@ -0,0 +1,123 @@
+from itertools import combinations
+
+import numpy as np
+import pytest
+
+from deadlock_engine import DeadlockDetectorSingleInstance
+from deadlock_engine.planner import (
+    exact_feedback_vertex_set,
+    greedy_feedback_vertex_set,
+    minimum_feedback_vertex_set,
+)
+
+
+def random_graph(seed, n, density):
+    rng = np.random.default_rng(seed)
+    edges = (rng.random((n, n)) < density) & ~np.eye(n, dtype=bool)
+    weights = rng.integers(1, 5, n).tolist()
+    return {v: set(np.flatnonzero(edges[v]).tolist()) for v in range(n)}, weights
+
+
+def is_acyclic(graph, removed):
+    """Kahn's algorithm on the graph without the removed nodes"""
+    nodes = set(graph) - set(removed)
+    in_degree = dict.fromkeys(nodes, 0)
+    for v in nodes:
+        for w in graph[v] & nodes:
+            in_degree[w] += 1
+    ready = [v for v in nodes if not in_degree[v]]
+    seen = 0
+    while ready:
+        v = ready.pop()
+        seen += 1
+        for w in graph[v] & nodes:
+            in_degree[w] -= 1
+            if not in_degree[w]:
+                ready.append(w)
+    return seen == len(nodes)
+
+
+def brute_minimum(graph, weights):
+    return min(
+        sum(weights[v] for v in subset)
+        for size in range(len(graph) + 1)
+        for subset in combinations(graph, size)
+        if is_acyclic(graph, subset)
+    )
+
+
+GRAPHS = [(seed, n, density) for seed in range(8) for n, density in [(5, 0.4), (7, 0.3), (9, 0.25)]]
+
+
+@pytest.mark.parametrize("seed, n, density", GRAPHS)
+def test_exact_is_minimum(seed, n, density):
+    graph, weights = random_graph(seed, n, density)
+    removed, cost = exact_feedback_vertex_set({v: set(s) for v, s in graph.items()}, weights.__getitem__)
+    assert is_acyclic(graph, removed)
+    assert cost == sum(weights[v] for v in removed) == brute_minimum(graph, weights)
+
+
+@pytest.mark.parametrize("seed, n, density", GRAPHS)
+def test_greedy_is_a_feedback_vertex_set(seed, n, density):
+    graph, weights = random_graph(seed, n, density)
+    removed, cost = greedy_feedback_vertex_set(graph, weights.__getitem__)
+    assert is_acyclic(graph, removed)
+    assert cost == sum(weights[v] for v in removed) >= brute_minimum(graph, weights)
+
+    # Redundancy elimination: every chosen node is needed
+    for v in removed:
+        assert not is_acyclic(graph, removed - {v})
+
+
+def test_exact_gives_up_at_the_deadline():
+    graph, weights = random_graph(0, 9, 0.4)
+    assert exact_feedback_vertex_set(graph, weights.__getitem__, deadline=0) is None
+
+
+@pytest.mark.parametrize("weights", [None, [1, 1, 1, 5, 1, 1], {0: 1, 1: 1, 2: 1, 3: 5, 4: 1, 5: 1}, lambda pid: 1])
+def test_minimum_over_components(weights):
+    # Two cycles sharing node 3, plus a separate 2-cycle
+    wait_for = [[1], [2], [3], [0, 1], [5], [4]]
+    components = [[0, 1, 2, 3], [4, 5]]
+    victims = minimum_feedback_vertex_set(wait_for, components, weights)
+    assert victims == sorted(victims) and len(victims) == 2
+    assert victims[1] in (4, 5)
+    expected = {0, 1} if isinstance(weights, (list, dict)) else {1, 3}
+    assert victims[0] in expected
+
+    # The greedy fallback still breaks every cycle
+    greedy = minimum_feedback_vertex_set(wait_for, components, weights, exact_limit=0)
+    graph = {v: set(edges) for v, edges in enumerate(wait_for)}
+    assert is_acyclic(graph, greedy)
+
+
+def test_plan_on_a_ring(ring):
+    allocation, request, available = ring(6)
+    detector = DeadlockDetectorSingleInstance(6, 6)
+    deadlocked = detector.detect_deadlock(allocation, request, available)
+    assert len(detector.plan_process_termination(deadlocked, allocation, request)) == 1
+    assert detector.plan_process_termination(deadlocked, allocation, request, weights=[3, 3, 1, 3, 3, 3]) == [2]
+
+
+def test_minimum_termination_recovers(system, reference):
+    allocation, request, available = system
+    detector = DeadlockDetectorSingleInstance(len(allocation), len(available))
+    deadlocked = reference(allocation, request, available)
+    new_allocation, new_request, new_available, terminated = detector.recover_by_minimum_termination(
+        deadlocked, allocation, request, available)
+
+    assert reference(new_allocation, new_request, new_available) == []
+    assert set(terminated) <= set(deadlocked) and len(set(terminated)) == len(terminated)
+    for pid in terminated:
+        assert not any(new_allocation[pid]) and not any(new_request[pid])
+    for j in range(len(available)):
+        assert new_available[j] == (available[j] or any(allocation[pid][j] for pid in terminated))
+
+    # Never more victims than one-at-a-time termination needs
+    steps = 0
+    while deadlocked:
+        allocation, request, available, _ = detector.recover_by_process_termination(
+            deadlocked, allocation, request, available)
+        deadlocked = detector.detect_deadlock(allocation, request, available)
+        steps += 1
+    assert len(terminated) <= steps
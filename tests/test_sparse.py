@@ -0,0 +1,109 @@
+import numpy as np
+import pytest
+
+from deadlock_engine import DeadlockDetectorSingleInstance, SparseSystemState
+from deadlock_engine.sparse import gather, stable_order, transpose
+
+
+def random_csr(seed, rows, columns, density):
+    matrix = np.random.default_rng(seed).random((rows, columns)) < density
+    indptr = np.zeros(rows + 1, dtype=np.int64)
+    np.cumsum(matrix.sum(axis=1), out=indptr[1:])
+    return matrix, indptr, np.nonzero(matrix)[1]
+
+
+@pytest.mark.parametrize("seed", range(5))
+def test_gather(seed):
+    matrix, indptr, indices = random_csr(seed, 30, 20, 0.2)
+    rows = np.random.default_rng(seed).integers(0, 30, 12)
+    owner, values = gather(indptr, indices, rows)
+    expected = [(k, j) for k, row in enumerate(rows) for j in np.flatnonzero(matrix[row])]
+    assert list(zip(owner.tolist(), values.tolist())) == expected
+    assert [len(part) for part in gather(indptr, indices, [])] == [0, 0]
+
+
+@pytest.mark.parametrize("limit", [1, 7, 1 << 16, (1 << 16) + 3, 1 << 40])
+def test_stable_order(limit):
+    keys = np.random.default_rng(limit % 97).integers(0, limit, 500)
+    assert (stable_order(keys, limit) == np.argsort(keys, kind="stable")).all()
+
+
+@pytest.mark.parametrize("seed", range(5))
+def test_transpose(seed):
+    matrix, indptr, indices = random_csr(seed, 25, 40, 0.15)
+    t_indptr, t_indices = transpose(indptr, indices, 40)
+    assert (np.diff(t_indptr) == matrix.T.sum(axis=1)).all()
+    assert t_indices.tolist() == np.nonzero(matrix.T)[1].tolist()
+
+
+def test_from_pairs_drops_duplicates():
+    state = SparseSystemState.from_pairs(3, 4, ([2, 0, 2], [1, 3, 1]), ([1, 1, 0, 1], [3, 0, 2, 3]))
+    allocation, request, available = state.to_matrices()
+    assert allocation == [[0, 0, 0, 1], [0, 0, 0, 0], [0, 1, 0, 0]]
+    assert request == [[0, 0, 1, 0], [1, 0, 0, 1], [0, 0, 0, 0]]
+    assert available == [1, 0, 1, 0]
+    assert state.nnz() == 5
+    assert (state.allocated_count(2), state.requested_count(1)) == (1, 2)
+
+
+def test_round_trip(system):
+    assert SparseSystemState.from_matrices(*system).to_matrices() == tuple(system)
+
+
+def test_detection_matches_reference(system, reference):
+    allocation, request, available = system
+    state = SparseSystemState.from_matrices(allocation, request, available)
+    detector = DeadlockDetectorSingleInstance(len(allocation), len(available))
+    expected = reference(allocation, request, available)
+    assert detector.detect_deadlock_sparse(state) == expected
+    assert detector.detect_deadlock(state) == expected
+
+
+def test_wait_for_graph_matches_dense(system):
+    allocation, request, available = system
+    state = SparseSystemState.from_matrices(allocation, request, available)
+    detector = DeadlockDetectorSingleInstance(len(allocation), len(available))
+    indptr, processes = state.wait_for_graph()
+    dense = detector.build_wait_for_graph(request, allocation)
+    assert [sorted(processes[indptr[i]:indptr[i + 1]].tolist()) for i in range(len(allocation))] == [
+        sorted(set(edges) - {i}) for i, edges in enumerate(dense)]
+
+
+def test_holder_index(system):
+    allocation, request, available = system
+    detector = DeadlockDetectorSingleInstance(len(allocation), len(available))
+    state = SparseSystemState.from_matrices(allocation, request, available)
+    assert detector.build_holder_index(state) == detector.build_holder_index(allocation)
+
+
+@pytest.mark.parametrize("method", ["recover_by_process_termination", "recover_by_resource_preemption"])
+def test_recovery_matches_list_recovery(system, reference, method):
+    allocation, request, available = system
+    detector = DeadlockDetectorSingleInstance(len(allocation), len(available))
+    state = SparseSystemState.from_matrices(allocation, request, available)
+    deadlocked = reference(allocation, request, available)
+
+    *expected, expected_action = getattr(detector, method)(deadlocked, allocation, request, available)
+    result = getattr(detector, method)(deadlocked, state)
+    assert result[0] is state and result[3] == expected_action
+    assert state.to_matrices() == tuple(expected)
+    assert detector.detect_deadlock_sparse(state) == reference(*expected)
+
+
+def test_preemption_without_resources():
+    detector = DeadlockDetectorSingleInstance(2, 0)
+    state = SparseSystemState.from_matrices([[], []], [[], []], [])
+    assert detector.recover_by_resource_preemption([0, 1], state)[3] == []
+
+
+def test_column_views_follow_changes(ring):
+    state = SparseSystemState.from_matrices(*ring(4))
+    assert state.holders()[1].tolist() == [0, 1, 2, 3]
+    # Preempting twice doesn't add the request twice
+    state.preempt(2, 2)
+    state.preempt(2, 2)
+    assert state.holders()[1].tolist() == [0, 1, 3]
+    assert state.requesters()[1].tolist() == [3, 0, 1, 2, 2]
+    state.release_process(0)
+    assert state.holders()[1].tolist() == [1, 3]
+    assert state.available.tolist() == [True, False, True, False]
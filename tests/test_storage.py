@@ -0,0 +1,121 @@
+import io
+import json
+import zipfile
+
+import numpy as np
+import pytest
+
+from deadlock_engine import PackedSystemState, load_state, save_state
+from deadlock_engine.storage import FORMAT_VERSION
+
+STATUS = ["Running", "Waiting", "Terminated"]
+
+
+def statuses(n):
+    return [STATUS[i % len(STATUS)] for i in range(n)]
+
+
+def test_round_trip(system, tmp_path):
+    allocation, request, available = system
+    path = tmp_path / "state.bin"
+    history = [{"time": "12:00:00", "processes": [0, 1], "resolved": False}]
+    save_state(path, allocation, request, available, statuses(len(allocation)), history)
+    assert path.exists() and not (tmp_path / "state.bin.npz").exists()
+
+    saved = load_state(path)
+    assert (saved.num_processes, saved.num_resources) == (len(allocation), len(available))
+    assert saved.to_matrices() == (allocation, request, available)
+    assert saved.status() == statuses(len(allocation))
+    assert saved.history == history
+    assert saved.version == FORMAT_VERSION
+
+
+def test_packed_state(system, tmp_path):
+    path = str(tmp_path / "state.npz")
+    save_state(path, *system)
+    packed = load_state(path).to_packed_state()
+    expected = PackedSystemState.from_matrices(*system)
+    assert packed.allocation_rows == expected.allocation_rows
+    assert packed.request_rows == expected.request_rows
+    assert packed.available == expected.available
+
+
+def test_paths_are_memory_mapped(random_system, tmp_path):
+    allocation, request, available = random_system(0, 40, 300, 0.3)
+    path = tmp_path / "large.state"
+    save_state(path, allocation, request, available)
+
+    mapped = load_state(path)
+    assert isinstance(mapped.allocation_bits, np.memmap)
+    assert isinstance(mapped.request_bits, np.memmap)
+    assert mapped.allocation_bits.shape == (40, 38)
+    assert (mapped.request_matrix() == np.array(request, dtype=bool)).all()
+
+    read = load_state(str(path), mmap=False)
+    assert not isinstance(read.allocation_bits, np.memmap)
+    assert read.to_matrices() == mapped.to_matrices()
+    assert read.status() == [None] * 40
+
+
+def test_file_objects(system):
+    buffer = io.BytesIO()
+    save_state(buffer, *system, status=statuses(len(system[0])))
+    buffer.seek(0)
+    saved = load_state(buffer)
+    assert not isinstance(saved.allocation_bits, np.memmap)
+    assert saved.to_matrices() == tuple(system)
+    assert saved.status() == statuses(len(system[0]))
+
+
+def test_members_are_stored_uncompressed(ring, tmp_path):
+    path = tmp_path / "ring"
+    save_state(path, *ring(12))
+    with zipfile.ZipFile(path) as archive:
+        assert {info.filename for info in archive.infolist()} == {
+            "header.npy", "allocation.npy", "request.npy", "available.npy", "status.npy"}
+        assert all(info.compress_type == zipfile.ZIP_STORED for info in archive.infolist())
+
+
+def rewrite_header(path, **changes):
+    """Replace header fields of a saved state"""
+    with zipfile.ZipFile(path) as archive:
+        members = {name[:-4]: np.load(archive.open(name)) for name in archive.namelist()}
+    header = json.loads(str(members["header"]))
+    header.update(changes)
+    members["header"] = np.array(json.dumps(header))
+    with open(path, "wb") as f:
+        np.savez(f, **members)
+
+
+@pytest.mark.parametrize("changes", [{"format": "something-else"}, {"version": FORMAT_VERSION + 1}])
+def test_unsupported_files(ring, tmp_path, changes):
+    path = tmp_path / "state.npz"
+    save_state(path, *ring(3))
+    rewrite_header(path, **changes)
+    with pytest.raises(ValueError):
+        load_state(path)
+
+
+def test_damaged_files(ring, tmp_path):
+    buffer = io.BytesIO()
+    save_state(buffer, *ring(3))
+    data = buffer.getvalue()
+    for damaged in [b"not a zip", data[:len(data) // 2], data[:-30]]:
+        with pytest.raises(ValueError):
+            load_state(io.BytesIO(damaged))
+
+    path = tmp_path / "state.npz"
+    with zipfile.ZipFile(path, "w") as archive:
+        archive.writestr("header.npy", b"")
+    with pytest.raises(ValueError):
+        load_state(path)
+
+
+def test_inconsistent_input(ring, tmp_path):
+    allocation, request, available = ring(3)
+    with pytest.raises(ValueError):
+        save_state(tmp_path / "a", allocation, request, available, status=["Running"])
+    with pytest.raises(ValueError):
+        save_state(tmp_path / "b", allocation, request[:2], available)
+    with pytest.raises(ValueError):
+        save_state(tmp_path / "c", allocation, request, available + [1])
@@ -0,0 +1,200 @@
+import json
+import random
+
+import pytest
+
+from deadlock_engine import DeadlockDetectorSingleInstance, DeadlockMonitor
+from deadlock_engine.stream import main, read_batches
+
+
+def random_events(seed, count, processes=6, resources=5):
+    """Lock events of a small system; acquires mostly follow a request of a free resource"""
+    rng = random.Random(seed)
+    holder = {}
+    events = []
+    for _ in range(count):
+        process, resource = f"p{rng.randrange(processes)}", f"r{rng.randrange(resources)}"
+        kind = rng.choice(["request", "request", "request", "acquire", "release", "exit"])
+        if kind == "acquire" and resource in holder and rng.random() < 0.9:
+            kind = "request"
+        if kind == "release" and resource in holder and rng.random() < 0.9:
+            process = holder[resource]
+        if kind == "acquire":
+            holder[resource] = process
+        elif kind == "release" and holder.get(resource) == process:
+            del holder[resource]
+        elif kind == "exit":
+            holder = {r: p for r, p in holder.items() if p != process}
+        events.append({"event": kind, "process": process, "resource": resource})
+    return events
+
+
+def wait_for_edges(allocation, request):
+    holder = {j: i for i, row in enumerate(allocation) for j, held in enumerate(row) if held}
+    return {(i, holder[j]) for i, row in enumerate(request) for j, wanted in enumerate(row)
+            if wanted and j in holder and holder[j] != i}
+
+
+@pytest.mark.parametrize("seed", range(8))
+def test_monitor_matches_batch_detection(seed, reference):
+    monitor = DeadlockMonitor()
+    for event in random_events(seed, 300):
+        had_cycle = monitor.graph.has_cycle()
+        reports = monitor.handle_events([event])
+        allocation, request, available = monitor.to_matrices()
+
+        deadlocked = reference(allocation, request, available)
+        assert monitor.deadlocked() == [monitor.process_names[pid] for pid in deadlocked]
+        assert monitor.graph.has_cycle() == bool(deadlocked)
+        assert {(v, w) for v in range(len(allocation)) for w in monitor.graph.successors[v]} == \
+            wait_for_edges(allocation, request)
+        if not had_cycle and monitor.graph.has_cycle():
+            assert reports
+        for report in reports:
+            cycle = [monitor.process_index[name] for name in report["cycle"]]
+            for k, name in enumerate(report["resources"]):
+                rid = monitor.resource_index[name]
+                assert request[cycle[k]][rid] and allocation[cycle[(k + 1) % len(cycle)]][rid]
+    assert monitor.events == 300
+
+
+def test_report_names_the_cycle():
+    found = []
+    monitor = DeadlockMonitor(on_deadlock=found.append)
+    lines = [
+        '{"event": "acquire", "process": "a", "resource": "x"}',
+        '{"event": "acquire", "process": "b", "resource": 7}',
+        '{"event": "request", "process": "a", "resource": 7}',
+        '',
+        '{"event": "request", "process": "b", "resource": "x"}',
+    ]
+    reports = monitor.handle_batch(lines)
+    assert reports == found == monitor.deadlocks
+    (report,) = reports
+    assert report["event"] == 4
+    assert sorted(zip(report["cycle"], report["resources"])) == [("a", 7), ("b", "x")]
+    assert monitor.deadlocked() == ["a", "b"]
+
+    monitor.handle_batch([b'{"event": "exit", "process": "b"}'])
+    assert monitor.deadlocked() == [] and not monitor.graph.has_cycle()
+    # a still waits for 7, which is free now
+    assert monitor.to_matrices() == ([[1, 0], [0, 0]], [[0, 1], [0, 0]], [0, 1])
+
+
+def test_bad_lines_are_counted():
+    monitor = DeadlockMonitor()
+    reports = monitor.handle_batch([
+        b'{"event": "acquire", "process": "a", "resource": "x"}',
+        b'not json',
+        b'{"event": "acquire", "process": "b", "resource": "y"}',
+        b'{"event": "teleport", "process": "a", "resource": "y"}',
+        b'{"process": "a"}',
+        b'{"event": "request", "process": "b", "resource": "x"}',
+        b'{"event": "request", "process": "a", "resource": "y"}',
+    ])
+    assert len(reports) == 1
+    assert monitor.errors == 3
+    assert monitor.handle_line("   ") is None and monitor.events == 7
+    bad = [{"event": "request", "process": "a"}, {"event": "jump", "process": "a", "resource": "x"}]
+    assert monitor.handle_events(bad) == []
+    assert (monitor.events, monitor.errors) == (9, 5)
+
+
+BAD_EVENTS = [
+    b'{"event": "request", "process": [1], "resource": "a"}',
+    b'{"event": "request", "process": "p", "resource": {}}',
+    b'{"event": ["exit"], "process": "p"}',
+    b'{"event": "teleport", "process": "ghost", "resource": "a"}',
+    b'{"event": "acquire", "process": "ghost", "resource": null}',
+    b'{"event": "exit"}',
+    b'7',
+]
+
+
+def test_bad_events_register_nothing():
+    lines = [b'{"event": "acquire", "process": "p", "resource": "a"}'] + BAD_EVENTS
+    fast, fallback = DeadlockMonitor(), DeadlockMonitor()
+    assert fast.handle_batch(lines) == []
+    # A line that isn't JSON makes the batch go line by line, with the same totals
+    assert fallback.handle_batch([b"{bad"] + lines) == []
+    assert (fast.events, fast.errors) == (8, 7)
+    assert (fallback.events, fallback.errors) == (9, 8)
+    for monitor in (fast, fallback):
+        assert monitor.process_names == ["p"] and monitor.resource_names == ["a"]
+    assert fast.handle("request", [1], "a") is None and fast.errors == 8
+
+
+def test_waits_inside_a_deadlock_are_not_reported_again():
+    monitor = DeadlockMonitor()
+    for process in "abcd":
+        monitor.handle("acquire", process, process.upper())
+    for waiter, resource in [("a", "B"), ("b", "C"), ("c", "A")]:
+        monitor.handle("request", waiter, resource)
+    assert len(monitor.deadlocks) == 1
+
+    # Another way around the cycle, a process waiting twice, a second resource of a member
+    assert monitor.handle("request", "a", "C") is None
+    assert monitor.handle("acquire", "b", "E") is None
+    assert monitor.handle("request", "c", "E") is None
+    assert len(monitor.deadlocks) == 1
+
+    # d joins the deadlock, so the deadlocked set grows
+    monitor.handle("request", "d", "A")
+    assert monitor.handle("request", "c", "D")["cycle"][0] == "c"
+    assert len(monitor.deadlocks) == 2
+    assert monitor.deadlocked() == ["a", "b", "c", "d"]
+
+
+def test_out_of_order_traces():
+    monitor = DeadlockMonitor()
+    monitor.handle("acquire", "a", "x")
+    monitor.handle("request", "c", "x")
+    # Missed release of x by a: b gets it anyway, c now waits for b
+    monitor.handle("acquire", "b", "x")
+    monitor.handle("release", "a", "x")
+    assert monitor.errors == 2
+    assert monitor.to_matrices()[0] == [[0], [0], [1]]
+    assert dict(monitor.graph.successors[monitor.process("c")]) == {monitor.process("b"): 1}
+
+
+def test_read_batches_keeps_lines_whole(tmp_path):
+    events = random_events(1, 50)
+    path = tmp_path / "trace.jsonl"
+    path.write_text("\n".join(json.dumps(event) for event in events))
+    batches = list(read_batches(str(path), chunk_size=37))
+    assert len(batches) > 1
+    lines = [line for batch in batches for line in batch if line]
+    assert [json.loads(line) for line in lines] == events
+
+
+def test_main(tmp_path, capsys):
+    path = tmp_path / "trace.jsonl"
+    path.write_text("\n".join(json.dumps(event) for event in [
+        {"event": "acquire", "process": 1, "resource": "x"},
+        {"event": "acquire", "process": 2, "resource": "y"},
+        {"event": "request", "process": 1, "resource": "y"},
+        {"event": "request", "process": 2, "resource": "x"},
+    ]) + "\n")
+    assert main([str(path)]) == 1
+    out, err = capsys.readouterr()
+    assert json.loads(out)["cycle"] in ([1, 2], [2, 1])
+    assert err.startswith("4 events, 1 deadlock(s), 0 error(s)")
+
+    path.write_text('{"event": "acquire", "process": 1, "resource": "x"}\n')
+    assert main([str(path), "--quiet"]) == 0
+    assert capsys.readouterr().out == ""
+
+
+def test_snapshot_detection(ring):
+    allocation, request, available = ring(5)
+    monitor = DeadlockMonitor()
+    for i in range(5):
+        monitor.handle("acquire", i, i)
+    for i in range(4):
+        monitor.handle("request", i, i + 1)
+    assert monitor.deadlocks == [] and monitor.deadlocked() == []
+    report = monitor.handle("request", 4, 0)
+    assert sorted(report["cycle"]) == [0, 1, 2, 3, 4]
+    assert monitor.to_matrices() == (allocation, request, available)
+    detector = DeadlockDetectorSingleInstance(5, 5)
+    assert detector.detect_deadlock(monitor.to_sparse_state()) == [0, 1, 2, 3, 4]